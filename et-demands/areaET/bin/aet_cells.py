@@ -13,6 +13,7 @@ import xlrd
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lib')))
 import aet_config
 import aet_utils
+import mod_csv_input
 import mod_dmis
 
 mmHaPerDay_to_cms = 0.001 * 10000 / 86400    # 0.001 (mm/m) * 10000 (m2/hectare) / 86400 (seconds/day)
@@ -164,19 +165,15 @@ class ETCell():
         """
         crops_dict = {}
         try:
-            # Get list of 0 based line numbers to skip
-            # Ignore header but assume header was set as 1's based index
-            data_skip = [i for i in range(cfg.input_cet['header_lines']) if i + 1 <> cfg.input_cet['names_line']]
             for ctCount in range(0, self.numUsedCropTypes, 1):
                 input_cet_path = os.path.join(cfg.input_cet['ws'], cfg.input_cet['name_format'].replace('%c', '%02d' % self.usedCropTypes[ctCount]) % self.cell_id)
                 if not os.path.isfile(input_cet_path):
                     logging.error('ERROR:  input crop et file {} does not exist'.format(input_cet_path))
                     return False
                 logging.debug('  {0}'.format(input_cet_path))
-                crop_df = pd.read_table(input_cet_path, engine = 'python',
-                        header = cfg.input_cet['names_line'] - len(data_skip) - 1, 
-                        skiprows = data_skip, sep = cfg.input_cet['delimiter'], 
-                        comment = "#", na_values = ['NaN'])
+                crop_df = mod_csv_input.read_delimited(input_cet_path, 
+                        cfg.input_cet['header_lines'], cfg.input_cet['names_line'], 
+                        cfg.input_cet['delimiter'], mia_value = ['NaN'], comment = "#")
 
                 # Check fields
 
@@ -196,14 +193,14 @@ class ETCell():
                 # Convert date strings to datetimes and index on date
         
                 if cfg.input_cet['fields']['date'] is not None:
-                    crop_df['date'] = pd.to_datetime(crop_df['date'])
+                    crop_df['date'] = mod_csv_input.parse_dates(crop_df['date'])
                 else:
                     if cfg.time_step == 'day':
-                        crop_df['date'] = crop_df[['year', 'month', 'day']].apply(
-                            lambda s : datetime.datetime(*s),axis = 1)
+                        crop_df['date'] = mod_csv_input.ymd_dates(
+                            crop_df['year'], crop_df['month'], crop_df['day'])
                     else:
-                        crop_df['date'] = crop_df[['year', 'month', 'day', 'hour']].apply(
-                        lambda s : datetime.datetime(*s),axis = 1)
+                        crop_df['date'] = mod_csv_input.ymd_dates(
+                            crop_df['year'], crop_df['month'], crop_df['day'], crop_df['hour'])
                 crop_df.set_index('date', inplace = True)
                 if cell_count == 0 and ctCount == 0:
                     # verify period
@@ -275,24 +272,14 @@ class ETCell():
         """
         crops_dict = {}
         try:
-            # Get list of 0 based line numbers to skip
-            # Ignore header but assume header was set as 1's based index
-            data_skip = [i for i in range(cfg.input_cet['header_lines']) if i + 1 <> cfg.input_cet['names_line']]
             input_cet_path = os.path.join(cfg.input_cet['ws'], cfg.input_cet['name_format'].replace('%s', self.cell_id)).replace("%c", "")
             if not os.path.isfile(input_cet_path):
                 logging.error('ERROR:  input crop et file {} does not exist'.format(input_cet_path))
                 return False
             logging.debug('  {0}'.format(input_cet_path))
-            """
-                crop_df = pd.read_table(input_cet_path, engine = 'python',
-                        header = cfg.input_cet['names_line'] - len(data_skip) - 1, 
-                        skiprows = data_skip, sep = cfg.input_cet['delimiter'], 
-                        comment = "#", na_values = ['NaN'])
-            """
-            rdb_cet_df = pd.read_table(input_cet_path, engine = 'python',
-                    header = cfg.input_cet['names_line'] - len(data_skip) - 1, 
-                    skiprows = data_skip, sep = cfg.input_cet['delimiter'], 
-                    comment = "#", na_values = ['NaN'])
+            rdb_cet_df = mod_csv_input.read_delimited(input_cet_path, 
+                    cfg.input_cet['header_lines'], cfg.input_cet['names_line'], 
+                    cfg.input_cet['delimiter'], mia_value = ['NaN'], comment = "#")
             crop_num_col = list(rdb_cet_df.columns)[0]
             rdb_cet_df[crop_num_col] = rdb_cet_df[[crop_num_col]].apply(lambda s: int(*s), axis = 1, raw = True, reduce = True)
 
@@ -313,14 +300,14 @@ class ETCell():
             # Convert date strings to datetimes and index on date
         
             if cfg.input_cet['fields']['date'] is not None:
-                rdb_cet_df['date'] = pd.to_datetime(rdb_cet_df['date'])
+                rdb_cet_df['date'] = mod_csv_input.parse_dates(rdb_cet_df['date'])
             else:
                 if cfg.time_step == 'day':
-                    rdb_cet_df['date'] = rdb_cet_df[['year', 'month', 'day']].apply(
-                        lambda s : datetime.datetime(*s),axis = 1)
+                    rdb_cet_df['date'] = mod_csv_input.ymd_dates(
+                        rdb_cet_df['year'], rdb_cet_df['month'], rdb_cet_df['day'])
                 else:
-                    rdb_cet_df['date'] = rdb_cet_df[['year', 'month', 'day', 'hour']].apply(
-                    lambda s : datetime.datetime(*s),axis = 1)
+                    rdb_cet_df['date'] = mod_csv_input.ymd_dates(
+                        rdb_cet_df['year'], rdb_cet_df['month'], rdb_cet_df['day'], rdb_cet_df['hour'])
             for ctCount in range(0, self.numUsedCropTypes, 1):
                 try:
                     crop_df = rdb_cet_df[rdb_cet_df[crop_num_col] == self.usedCropTypes[ctCount]]
@@ -0,0 +1,302 @@
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+try:
+    import tables
+except ImportError:
+    tables = None
+
+# Typed columnar output of daily, monthly and annual crop ET
+# Values are written with their numeric types (no text formatting)
+# and carry cell, crop and unit metadata so that downstream tools can
+# read only the columns they need.
+#
+# PARQUET - one file per crop if name_format has %c, otherwise one
+#           dataset folder per cell with one part file per crop
+# HDF5    - one file per crop if name_format has %c, otherwise one
+#           file per cell with crops appended to one table
+#
+# Per cell layouts have a Crop_Num column.  Crop names are in metadata.
+
+structure_types = ['PARQUET', 'HDF5']
+metadata_key = 'et_demands'
+crop_field = 'Crop_Num'
+
+# Integer output fields and their types (floats are written as float64)
+
+int_dtypes = {
+    'daily': {
+        crop_field: np.int16, 'Year': np.int16, 'Month': np.int8,
+        'Day': np.int8, 'DOY': np.int16, 'Season': np.int8,
+        'Cutting': np.int8},
+    'monthly': {
+        crop_field: np.int16, 'Year': np.int16, 'Month': np.int8,
+        'Season': np.int16, 'Cutting': np.int16},
+    'annual': {
+        crop_field: np.int16, 'Year': np.int16, 'Season': np.int16,
+        'Cutting': np.int16}}
+
+# Units of output fields by time step
+
+depth_fields = [
+    'ETact', 'ETpot', 'ETbas', 'PPT', 'Irrigation', 'Runoff', 'DPerc',
+    'NIWR']
+field_units = {
+    'daily': {'Kc': 'fraction', 'Kcb': 'fraction', 'Season': 'flag',
+              'Cutting': 'flag'},
+    'monthly': {'Kc': 'fraction', 'Kcb': 'fraction', 'Season': 'days',
+                'Cutting': 'count'},
+    'annual': {'Kc': 'fraction', 'Kcb': 'fraction', 'Season': 'days',
+               'Cutting': 'count'}}
+depth_units = {'daily': 'mm/day', 'monthly': 'mm', 'annual': 'mm'}
+
+def check_module(data_structure_type):
+    """Check that module needed by columnar output type is installed
+
+    Args:
+        data_structure_type (str): cet output data structure type
+
+    Returns:
+        Bool
+    """
+    if data_structure_type == 'PARQUET' and pq is None:
+        logging.error(
+            '\nERROR: PARQUET output requires pyarrow to be installed')
+        return False
+    elif data_structure_type == 'HDF5' and tables is None:
+        logging.error(
+            '\nERROR: HDF5 output requires pytables to be installed')
+        return False
+    return True
+
+def cell_layout(data):
+    """Check if crops of cell are written to one dataset
+
+    Args:
+        data (): configuration data
+
+    Returns:
+        Bool
+    """
+    return '%c' not in data.cet_out['name_format']
+
+def crop_output_path(data, output_ws, et_cell, crop):
+    """Columnar output path of cell and crop
+
+    Args:
+        data (): configuration data
+        output_ws (str): daily, monthly or annual output folder
+        et_cell (): ETCell instance
+        crop (): crop parameters
+
+    Returns:
+        str
+    """
+    if not cell_layout(data):
+        return os.path.join(output_ws, data.cet_out['name_format'].replace(
+            '%c', '%02d' % int(crop.class_number)) % et_cell.cell_id)
+    cell_path = os.path.join(output_ws, data.cet_out['name_format'].replace(
+        '%c', '').replace('__', '_') % et_cell.cell_id)
+    if data.cet_out['data_structure_type'] == 'PARQUET':
+        return os.path.join(
+            cell_path, 'crop_{:02d}.parquet'.format(int(crop.class_number)))
+    return cell_path
+
+def output_table(output_key, output_df, columns, data, crop):
+    """Typed output table of time step
+
+    Args:
+        output_key (str): 'daily', 'monthly' or 'annual'
+        output_df (): daily, monthly or annual output data frame
+        columns (list): output field names
+        data (): configuration data
+        crop (): crop parameters
+
+    Returns:
+        pandas.DataFrame
+    """
+    if cell_layout(data):
+        columns = [crop_field] + columns
+    table_df = pd.DataFrame(index = np.arange(len(output_df.index)))
+    if output_key != 'annual':
+        table_df['Date'] = output_df.index.values
+    for field in columns:
+        if field == crop_field:
+            values = np.full(len(output_df.index), int(crop.class_number))
+        elif field == 'Cutting' and not crop.cutting_crop:
+            values = np.zeros(len(output_df.index))
+        else:
+            values = output_df[field].values
+        if field in int_dtypes[output_key]:
+            table_df[field] = values.astype(int_dtypes[output_key][field])
+        else:
+            table_df[field] = values.astype(np.float64)
+    return table_df
+
+def table_metadata(output_key, table_df, et_cell, crop):
+    """Cell, crop and units metadata of output table
+
+    Args:
+        output_key (str): 'daily', 'monthly' or 'annual'
+        table_df (): typed output table
+        et_cell (): ETCell instance
+        crop (): crop parameters
+
+    Returns:
+        dict
+    """
+    return {
+        'cell_id': str(et_cell.cell_id),
+        'cell_name': str(et_cell.cell_name),
+        'time_step': output_key,
+        'crops': {str(int(crop.class_number)): crop.name},
+        'units': table_units(output_key, table_df.columns)}
+
+def table_units(output_key, fields):
+    """Units of output fields
+
+    Args:
+        output_key (str): 'daily', 'monthly' or 'annual'
+        fields (list): output field names
+
+    Returns:
+        dict of units by field name (fields without units are skipped)
+    """
+    units = {}
+    for field in fields:
+        if field in depth_fields or field.startswith('PM'):
+            units[field] = depth_units[output_key]
+        elif field in field_units[output_key]:
+            units[field] = field_units[output_key][field]
+    return units
+
+def write_crop_tables(crop_count, data, et_cell, crop, output_dfs, columns):
+    """Write typed columnar daily, monthly and annual output of crop
+
+    Args:
+        crop_count (int): count of crop being computed in cell
+        data (): configuration data
+        et_cell (): ETCell instance
+        crop (): crop parameters
+        output_dfs (dict): output data frames by time step
+        columns (dict): output field names by time step
+    """
+    for output_key in ['daily', 'monthly', 'annual']:
+        if output_key not in output_dfs:
+            continue
+        output_path = crop_output_path(
+            data, data.cet_out[output_key + '_output_ws'], et_cell, crop)
+        table_df = output_table(
+            output_key, output_dfs[output_key], columns[output_key],
+            data, crop)
+        metadata = table_metadata(output_key, table_df, et_cell, crop)
+        if data.cet_out['data_structure_type'] == 'PARQUET':
+            write_parquet(output_path, table_df, metadata)
+        else:
+            write_hdf5(
+                output_path, output_key, table_df, metadata,
+                cell_layout(data) and crop_count > 1)
+
+def write_parquet(output_path, table_df, metadata):
+    """Write output table to Parquet file with metadata
+
+    Args:
+        output_path (str): Parquet file path
+        table_df (): typed output table
+        metadata (dict): cell, crop and units metadata
+    """
+    if not os.path.isdir(os.path.dirname(output_path)):
+        os.makedirs(os.path.dirname(output_path))
+    table = pa.Table.from_pandas(table_df, preserve_index = False)
+    schema_metadata = dict(table.schema.metadata or {})
+    schema_metadata[metadata_key] = json.dumps(metadata, sort_keys = True)
+    table = table.replace_schema_metadata(schema_metadata)
+    pq.write_table(table, output_path, compression = 'snappy')
+
+def write_hdf5(output_path, output_key, table_df, metadata, append_flag):
+    """Write output table to HDF5 file with metadata
+
+    Table is written in table format with Crop_Num as data column
+    so that crops can be selected without reading whole table.
+
+    Args:
+        output_path (str): HDF5 file path
+        output_key (str): table key ('daily', 'monthly' or 'annual')
+        table_df (): typed output table
+        metadata (dict): cell, crop and units metadata
+        append_flag (bool): If True, append crop to existing table
+    """
+    with pd.HDFStore(output_path, mode = 'a' if append_flag else 'w',
+                     complevel = 5, complib = 'blosc') as store:
+        if append_flag and output_key in store:
+            storer = store.get_storer(output_key)
+            crops = dict(getattr(storer.attrs, metadata_key)['crops'])
+            crops.update(metadata['crops'])
+            metadata['crops'] = crops
+        data_columns = [crop_field] if crop_field in table_df.columns else None
+        store.append(
+            output_key, table_df, format = 'table', index = False,
+            data_columns = data_columns)
+        setattr(store.get_storer(output_key).attrs, metadata_key, metadata)
+
+def read_crop_output(output_path, columns = None, crop_num = None,
+                     output_key = None):
+    """Read columnar crop ET output
+
+    Args:
+        output_path (str): Parquet file or folder or HDF5 file path
+        columns (list): field names to read, all fields if None
+        crop_num (int): crop to read from per cell output, all if None
+        output_key (str): HDF5 table key, first table of file if None
+
+    Returns:
+        tuple of pandas.DataFrame and metadata dict
+    """
+    if output_path.lower().endswith(('.h5', '.hdf5', '.hdf')):
+        with pd.HDFStore(output_path, mode = 'r') as store:
+            if output_key is None:
+                output_key = store.keys()[0]
+            where = None
+            if crop_num is not None:
+                where = '{} == {}'.format(crop_field, int(crop_num))
+            output_df = store.select(output_key, where = where,
+                                     columns = columns)
+            metadata = getattr(
+                store.get_storer(output_key).attrs, metadata_key)
+        return output_df, metadata
+    if crop_num is not None and os.path.isdir(output_path):
+        output_path = os.path.join(
+            output_path, 'crop_{:02d}.parquet'.format(int(crop_num)))
+    if os.path.isdir(output_path):
+        part_paths = [
+            os.path.join(output_path, item)
+            for item in sorted(os.listdir(output_path))
+            if item.endswith('.parquet')]
+    else:
+        part_paths = [output_path]
+
+    # Crops of per cell dataset are collected from metadata of part files
+
+    metadata = {}
+    for part_path in part_paths:
+        schema_metadata = pq.read_schema(part_path).metadata
+        if not schema_metadata or metadata_key not in schema_metadata:
+            continue
+        part_metadata = json.loads(schema_metadata[metadata_key])
+        if metadata:
+            metadata['crops'].update(part_metadata['crops'])
+        else:
+            metadata = part_metadata
+    table = pq.read_table(output_path, columns = columns)
+    return table.to_pandas(), metadata
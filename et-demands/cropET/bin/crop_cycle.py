@@ -1,65 +1,344 @@
 #!/usr/bin/env python
 
+import copy
 import datetime
 import logging
 import multiprocessing as mp
 import os
+import pickle
+import shutil
+import tempfile
 
 import numpy as np
 import pandas as pd
 
 import calculate_height
+import columnar_output
 import compute_crop_et
 import compute_crop_gdd
-from initialize_crop_cycle import InitializeCropCycle
+import crop_et_lanes
+from initialize_crop_cycle import crop_cycle_dtype, InitializeCropCycle
 import kcb_daily
+import results_cube
 import sys
 
-class DayData:
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lib')))
+import mod_csv_output
+
+# Static data and cell set by crop_pool_init() in each pool worker
+
+crop_pool_data = {}
+
+# Daily data schema
+# Fields serialize to a flat NumPy record (see DayData.to_record())
+
+day_data_dtype = np.dtype([
+    ('sdays', 'i8'), ('doy_prev', 'i8'), ('doy', 'i8'), ('year', 'i8'),
+    ('month', 'i8'), ('day', 'i8'), ('tdew', 'f8'), ('u2', 'f8'),
+    ('precip', 'f8'), ('rh_min', 'f8'), ('etref', 'f8'),
+    ('snow_depth', 'f8'), ('tmean', 'f8'), ('tmin', 'f8'), ('tmax', 'f8'),
+    ('t30', 'f8'), ('co2', 'f8'), ('etref_array', 'f8', (30,))])
+
+class DayData(object):
+    # Date is only tracked for reference and is not part of record schema
+
+    __slots__ = list(day_data_dtype.names) + ['date']
+
     def __init__(self):
         """ """
+        self.sdays = 0
+        self.doy_prev = 0
+        self.doy = 0
+        self.year = 0
+        self.month = 0
+        self.day = 0
+        self.date = None
+        self.tdew = 0.
+        self.u2 = 0.
+        self.precip = 0.
+        self.rh_min = 0.
+        self.etref = 0.
+        self.snow_depth = 0.
+        self.tmean = 0.
+        self.tmin = 0.
+        self.tmax = 0.
+        self.t30 = 0.
+        self.co2 = 1.
 
         # Used in compute_crop_gdd(), needs to be persistent during day loop
         
         self.etref_array = np.zeros(30)
 
-def crop_cycle_mp(data, et_cell, mp_procs = 1):
+    def to_record(self):
+        """Return daily data as flat NumPy record
+
+        Returns:
+            numpy.void record with day_data_dtype fields
+        """
+        return np.array(
+            [tuple([getattr(self, field) for field in day_data_dtype.names])],
+            dtype=day_data_dtype)[0]
+
+    def load_record(self, record):
+        """Set daily data from flat NumPy record
+
+        Args:
+            record (): numpy.void record with day_data_dtype fields
+        """
+        for field in day_data_dtype.names:
+            if field == 'etref_array':
+                self.etref_array = np.array(record[field])
+            else:
+                setattr(self, field, record[field].item())
+
+def crop_cycle_mp(data, et_cell, mp_procs = 1, journal = None):
     """Compute crop ET for all crops using multiprocessing
 
-    crop_day_loop_mp() will unpack arguments and call crop_day_loop
+    Climate arrays of cell are written once to memory mapped .npy files
+    in a scratch folder.  Pool workers load static data and attach to
+    climate arrays once in crop_pool_init() and only receive
+    small task tuples that are passed to crop_day_loop_shared().
 
     Args:
         data ():
         et_cell ():
         mp_procs (int): number of cores to use for multiprocessing
+        journal (): RunJournal instance, each crop is recorded as
+            soon as its worker finishes
     """
     crop_count = 0
     crop_mp_list = []
     for crop_num, crop in sorted(et_cell.crop_params.items()):
         if et_cell.crop_flags[crop_num] != 0:
-
-            # Force debug_flag false when multiprocessing
             crop_count += 1
-            crop_mp_list.append([crop_count, data, et_cell, crop, False, mp_procs])
+            crop_mp_list.append([crop_count, crop_num, mp_procs])
     results = []
     if crop_mp_list:
-        pool = mp.Pool(mp_procs)
-        results = pool.imap(crop_day_loop_mp, crop_mp_list, chunksize=1)
-        pool.close()
-        pool.join()
-        del pool, results
+        scratch_ws = tempfile.mkdtemp(prefix='cet_', dir=data.scratch_ws)
+        try:
+            write_shared_climate(et_cell, scratch_ws)
+            pool = mp.Pool(
+                mp_procs, initializer=crop_pool_init,
+                initargs=(data, shared_et_cell(et_cell), scratch_ws))
+            results = pool.imap_unordered(
+                crop_day_loop_shared, crop_mp_list, chunksize=1)
+            for crop_num, crop_state in results:
+                if journal is not None and data.rdb_shard_ws is None:
+                    journal.record(et_cell, et_cell.crop_params[crop_num])
+                if crop_state is not None:
+                    et_cell.final_states[crop_num] = crop_state
+            pool.close()
+            pool.join()
+            del pool, results
+
+            # RDB crops are recorded once shards are merged
+
+            if data.rdb_shard_ws is not None:
+                crop_nums = [crop_num for _, crop_num, _ in crop_mp_list]
+                merge_rdb_shards(data, et_cell, crop_nums)
+                if journal is not None:
+                    for crop_num in sorted(crop_nums):
+                        journal.record(et_cell, et_cell.crop_params[crop_num])
+        finally:
+            shutil.rmtree(scratch_ws, ignore_errors=True)
+
+def write_shared_climate(et_cell, scratch_ws):
+    """Write cell climate arrays to .npy files for memory mapping
+
+    Args:
+        et_cell ():
+        scratch_ws (str): scratch folder path
+
+    Returns:
+        None
+    """
+    shared_arrays = dict(cell_climate_arrays(et_cell))
+    shared_arrays['date'] = et_cell.refet_df.index.values.astype('datetime64[ns]').view(np.int64)
+    shared_arrays['refet_doy'] = et_cell.refet_df['doy'].values
+    shared_arrays['refet_etref'] = et_cell.refet_df['etref'].values
+    for field, field_array in shared_arrays.items():
+        np.save(os.path.join(scratch_ws, field + '.npy'), field_array)
+
+def shared_et_cell(et_cell):
+    """Copy of cell without time series data frames for pool workers
+
+    Args:
+        et_cell ():
+
+    Returns:
+        ETCell instance
+    """
+    shared_cell = copy.copy(et_cell)
+    shared_cell.refet_df = None
+    shared_cell.weather_df = None
+    shared_cell.climate_df = None
+    shared_cell.hist_temps_df = None
+    shared_cell.climate_arrays = None
+    shared_cell.climate_lists = None
+    return shared_cell
+
+def crop_pool_init(data, et_cell, scratch_ws):
+    """Pool initializer that attaches worker to shared cell data
+
+    Climate arrays are memory mapped (read only) from scratch folder.
+    Data frames used by crop day loops are rebuilt from arrays once
+    per worker.
+
+    Args:
+        data ():
+        et_cell (): ETCell instance from shared_et_cell()
+        scratch_ws (str): scratch folder path
+
+    Returns:
+        None
+    """
+    attach_shared_climate(data, et_cell, scratch_ws)
+    crop_pool_data['data'] = data
+    crop_pool_data['et_cell'] = et_cell
+
+def attach_shared_climate(data, et_cell, scratch_ws):
+    """Attach cell to climate arrays written by write_shared_climate()
+
+    Args:
+        data ():
+        et_cell (): ETCell instance from shared_et_cell()
+        scratch_ws (str): scratch folder path
+
+    Returns:
+        None
+    """
+    shared_arrays = {}
+    for item in os.listdir(scratch_ws):
+        if item.endswith('.npy'):
+            shared_arrays[item[:-4]] = np.load(
+                os.path.join(scratch_ws, item), mmap_mode='r')
+    dt_index = pd.DatetimeIndex(
+        np.asarray(shared_arrays.pop('date')).astype('datetime64[ns]'))
+    et_cell.refet_df = pd.DataFrame(
+        {'doy': shared_arrays.pop('refet_doy'),
+         'etref': shared_arrays.pop('refet_etref')},
+        index=dt_index, columns=['doy', 'etref'])
+    et_cell.climate_arrays = shared_arrays
+    if data.day_loop_engine == 'dataframe':
+        climate_fields = [
+            'tdew', 'wind', 'ppt', 'rh_min', 'etref', 'snow_depth',
+            'tmean', 'tmin', 'tmax', 't30', 'meant', 'mint', 'maxt', '30t']
+    else:
+        climate_fields = ['ppt']
+    et_cell.climate_df = pd.DataFrame(
+        dict([(field, shared_arrays[field]) for field in climate_fields]),
+        index=dt_index, columns=climate_fields)
+
+def stage_shared_cell(et_cell, cell_ws):
+    """Write climate arrays and static copy of cell to cell scratch folder
+
+    Cell can then be reloaded by any pool worker with load_shared_cell()
+    without reading weather data or processing climate again.
+
+    Args:
+        et_cell ():
+        cell_ws (str): cell scratch folder path
+
+    Returns:
+        None
+    """
+    if not os.path.isdir(cell_ws):
+        os.makedirs(cell_ws)
+    write_shared_climate(et_cell, cell_ws)
+    with open(os.path.join(cell_ws, 'et_cell.pkl'), 'wb') as cell_f:
+        pickle.dump(shared_et_cell(et_cell), cell_f, protocol=2)
+
+def load_shared_cell(data, cell_ws):
+    """Load cell written by stage_shared_cell()
+
+    Args:
+        data ():
+        cell_ws (str): cell scratch folder path
+
+    Returns:
+        ETCell instance
+    """
+    with open(os.path.join(cell_ws, 'et_cell.pkl'), 'rb') as cell_f:
+        et_cell = pickle.load(cell_f)
+    attach_shared_climate(data, et_cell, cell_ws)
+    return et_cell
+
+def crop_task_cost(crop, day_count):
+    """Estimate relative cost of computing one crop of one cell
+
+    Cost scales with period length.  Crop type weights reflect
+    work done per day: open water crops return early from
+    compute_crop_et(), bare soil crops skip most of kcb_daily(),
+    and cutting crops evaluate cutting cycles.
+
+    Args:
+        crop (): crop parameters
+        day_count (int): number of days in period
+
+    Returns:
+        float
+    """
+    if crop.class_number in [55, 56, 57]:
+        weight = 0.5
+    elif crop.class_number in [44, 45, 46]:
+        weight = 0.8
+    elif crop.cutting_crop:
+        weight = 1.2
+    else:
+        weight = 1.0
+    return weight * day_count
+
+def crop_day_loop_shared(tup):
+    """Pool multiprocessing friendly crop day loop for shared cell data
+
+    Args:
+        tup (list): crop count, crop number and mp_procs
+
+    Returns:
+        crop number and end of period crop state (None if not saved)
+    """
+    crop_count, crop_num, mp_procs = tup
+    data = crop_pool_data['data']
+    et_cell = crop_pool_data['et_cell']
+
+    # Force debug_flag false when multiprocessing
 
-def crop_cycle(data, et_cell, debug_flag = False, mp_procs = 1):
+    crop_day_loop_mp([
+        crop_count, data, et_cell, et_cell.crop_params[crop_num],
+        False, mp_procs])
+    return crop_num, et_cell.final_states.pop(crop_num, None)
+
+def crop_cycle(data, et_cell, debug_flag = False, mp_procs = 1,
+               journal = None):
     """Compute crop ET for all crops
 
     Args:
         data ():
         et_cell ():
         debug_flag (bool): If True, write debug level comments to debug.txt
+        journal (): RunJournal instance, each crop is recorded as
+            soon as its output is written
 
     Returns:
         None
     """
+    if data.day_loop_engine == 'cell_batch':
+        return crop_cycle_cell_batch(data, [et_cell], debug_flag, journal)
+
+    # Lockstep engine steps all crops of cell together as vector lanes
+    # Debug messages are written per crop, so debug runs use array engine
+
+    if data.day_loop_engine == 'lockstep' and not debug_flag:
+        task_list = []
+        for crop_num, crop in sorted(et_cell.crop_params.items()):
+            if et_cell.crop_flags[crop_num] == 0:
+                continue
+            task_list.append((0, crop, len(task_list) + 1))
+            if mp_procs == 1:
+                logging.warning('Crop {} - {}'.format(
+                    crop.class_number, crop.name))
+        return vector_day_loop(
+            data, [et_cell], task_list, 'crop_cycle()', journal)
     crop_count = 0
     for crop_num, crop in sorted(et_cell.crop_params.items()):
         if et_cell.crop_flags[crop_num] == 0:
@@ -68,7 +347,14 @@ def crop_cycle(data, et_cell, debug_flag = False, mp_procs = 1):
                 logging.debug('  NOT USED')
             continue
         crop_count += 1
-        crop_day_loop(crop_count, data, et_cell, crop, debug_flag, mp_procs)
+        if data.day_loop_engine in ['array', 'lockstep']:
+            crop_day_loop_array(
+                crop_count, data, et_cell, crop, debug_flag, mp_procs,
+                journal)
+        else:
+            crop_day_loop(
+                crop_count, data, et_cell, crop, debug_flag, mp_procs,
+                journal)
 
 def crop_day_loop_mp(tup):
     """Pool multiprocessing friendly crop_day_loop function
@@ -87,9 +373,15 @@ def crop_day_loop_mp(tup):
     Returns:
 
     """
+    # Cell batch and lockstep engines step several lanes together so
+    # multiprocessing by crop falls back to array engine
+
+    if tup[1].day_loop_engine in ['array', 'cell_batch', 'lockstep']:
+        return crop_day_loop_array(*tup)
     return crop_day_loop(*tup)
 
-def crop_day_loop(crop_count, data, et_cell, crop, debug_flag = False, mp_procs = 1):
+def crop_day_loop(crop_count, data, et_cell, crop, debug_flag = False,
+                  mp_procs = 1, journal = None):
     """Compute crop ET for each daily timestep
 
     Args:
@@ -99,6 +391,8 @@ def crop_day_loop(crop_count, data, et_cell, crop, debug_flag = False, mp_procs
         crop ():
         debug_flag (bool): If True, write debug level comments to debug.txt
         mp_procs (int):
+        journal (): RunJournal instance, crop is recorded once its
+            output is written
 
     Returns
         Bool
@@ -136,6 +430,10 @@ def crop_day_loop(crop_count, data, et_cell, crop, debug_flag = False, mp_procs
         
     if not foo.in_season and foo.crop_setup_flag: foo.setup_crop(crop)
 
+    # Continue from state saved by previous run in daily update mode
+
+    load_crop_state(et_cell, crop, foo, foo_day)
+
     for step_dt, step_doy in foo.crop_df[['doy']].iterrows():
         if debug_flag:
             logging.debug(
@@ -284,13 +582,1032 @@ def crop_day_loop(crop_count, data, et_cell, crop, debug_flag = False, mp_procs
 
     # Write output files
     
+    save_crop_state(data, et_cell, crop, foo, foo_day)
     if (data.cet_out['daily_output_flag'] or 
             data.cet_out['monthly_output_flag'] or
             data.cet_out['annual_output_flag'] or 
-            data.gs_output_flag):
+            data.gs_output_flag or data.cube_output_flag):
         write_crop_output(crop_count, data, et_cell, crop, foo)
+    if journal is not None:
+        journal.record(et_cell, crop)
+    return True
+
+def cell_climate_arrays(et_cell):
+    """Pull cell climate columns into NumPy arrays aligned with refet_df
+
+    Arrays are built once per cell and cached on et_cell so that
+    each crop day loop only indexes them by integer day.
+
+    Args:
+        et_cell ():
+
+    Returns:
+        dict of NumPy arrays keyed by climate_df column name
+    """
+    if getattr(et_cell, 'climate_arrays', None) is not None:
+        return et_cell.climate_arrays
+    dt_index = et_cell.refet_df.index
+    climate_df = et_cell.climate_df.reindex(dt_index)
+    climate_arrays = {}
+    for field in ['tdew', 'wind', 'ppt', 'rh_min', 'etref', 'snow_depth',
+                  'tmean', 'tmin', 'tmax', 't30',
+                  'meant', 'mint', 'maxt', '30t']:
+        climate_arrays[field] = climate_df[field].values.astype(np.float64)
+    climate_arrays['doy'] = et_cell.refet_df['doy'].values.astype(np.int64)
+    climate_arrays['year'] = np.asarray(dt_index.year, dtype=np.int64)
+    climate_arrays['month'] = np.asarray(dt_index.month, dtype=np.int64)
+    climate_arrays['day'] = np.asarray(dt_index.day, dtype=np.int64)
+    et_cell.climate_arrays = climate_arrays
+    return climate_arrays
+
+def cell_climate_lists(et_cell):
+    """Cell climate values and dates as native Python lists
+
+    Lists are built once per cell from cell_climate_arrays() so that
+    loop values match casts in crop_day_loop() without converting
+    arrays again for each crop.  They are cached on et_cell together
+    with the arrays they were built from and are rebuilt whenever
+    climate arrays of cell are replaced.
+
+    Args:
+        et_cell ():
+
+    Returns:
+        dict of lists keyed by climate array name, plus 'date'
+    """
+    climate_arrays = cell_climate_arrays(et_cell)
+    cached_lists = getattr(et_cell, 'climate_lists', None)
+    if cached_lists is not None and cached_lists[0] is climate_arrays:
+        return cached_lists[1]
+    climate_lists = dict([
+        (field, field_array.tolist())
+        for field, field_array in climate_arrays.items()])
+    climate_lists['date'] = list(et_cell.refet_df.index)
+    et_cell.climate_lists = (climate_arrays, climate_lists)
+    return climate_lists
+
+def crop_temperature_fields(data, crop):
+    """Climate fields used for crop temperatures given phenology option
+
+    Args:
+        data ():
+        crop ():
+
+    Returns:
+        tuple of tmean, tmin, tmax and t30 field names
+    """
+    main_fields = ('tmean', 'tmin', 'tmax', 't30')
+    hist_fields = ('meant', 'mint', 'maxt', '30t')
+    if data.phenology_option == 0:
+        return main_fields
+    elif data.phenology_option == 1:    # annual crops only
+        return hist_fields if crop.is_annual else main_fields
+    elif data.phenology_option == 2:    # perennial crops only
+        return main_fields if crop.is_annual else hist_fields
+    else:    # both annual and perennial
+        return hist_fields
+
+def crop_day_loop_array(crop_count, data, et_cell, crop, debug_flag = False,
+                        mp_procs = 1, journal = None):
+    """Compute crop ET for each daily timestep using array indexing
+
+    Same computations as crop_day_loop() but climate values are read
+    from per cell lists by integer day and daily results are written
+    to preallocated arrays that are copied to crop_df after day loop
+    (see array_day_loop()).
+
+    Args:
+        crop_count: count of crop being computed
+        data ():
+        et_cell ():
+        crop ():
+        debug_flag (bool): If True, write debug level comments to debug.txt
+        mp_procs (int):
+        journal (): RunJournal instance, crop is recorded once its
+            output is written
+
+    Returns
+        Bool
+    """
+    if mp_procs == 1:
+        logging.warning('Crop {} - {}'.format(crop.class_number, crop.name))
+    return array_day_loop(
+        data, [et_cell], [(0, crop, crop_count)], debug_flag,
+        'crop_day_loop_array()', journal)
+
+def crop_cycle_cell_batch(data, et_cells, debug_flag = False, journal = None,
+                          cell_done = None):
+    """Compute crop ET for batch of cells one crop at a time
+
+    Cells of batch are split into groups that share the same dates,
+    since cells continued in daily update mode can start on different
+    days.  Climate of each group is stacked once into day x cell arrays
+    (see stack_cell_climate()) and each crop is advanced for all cells
+    of group as lanes of one vector day loop (see vector_day_loop()).
+    Daily results of each cell are fanned out to its crop output after
+    day loop.  Debug runs advance cells with array_day_loop().
+
+    Args:
+        data ():
+        et_cells (list): ETCell instances with input time series set
+        debug_flag (bool): If True, write debug level comments to debug.txt
+        journal (): RunJournal instance, each cell/crop is recorded as
+            soon as its output is written
+        cell_done (function): called with each cell as soon as output of
+            its last crop is written
+
+    Returns
+        Bool
+    """
+    date_groups = []
+    for et_cell in et_cells:
+        for group_cells in date_groups:
+            if group_cells[0].refet_df.index.equals(et_cell.refet_df.index):
+                group_cells.append(et_cell)
+                break
+        else:
+            date_groups.append([et_cell])
+
+    for group_cells in date_groups:
+        if len(date_groups) > 1:
+            logging.info('\nCells {} - {} to {}'.format(
+                ', '.join([str(et_cell.cell_id) for et_cell in group_cells]),
+                group_cells[0].refet_df.index[0].date(),
+                group_cells[0].refet_df.index[-1].date()))
+        if debug_flag:
+            climate_stack = None
+        else:
+            climate_stack = stack_cell_climate(group_cells)
+
+        # Crops of each cell are listed up front so cells can be handed to
+        #   cell_done (which may reset crop flags) once their last crop is done
+        # Crop order within each cell is crop count for RDB output
+
+        cell_crop_nums = [
+            sorted([crop_num for crop_num in et_cell.crop_params.keys()
+                    if et_cell.crop_flags[crop_num] != 0])
+            for et_cell in group_cells]
+        if cell_done is not None:
+            for cell_i, et_cell in enumerate(group_cells):
+                if not cell_crop_nums[cell_i]:
+                    cell_done(et_cell)
+        crop_num_list = sorted(set([
+            crop_num for crop_nums in cell_crop_nums
+            for crop_num in crop_nums]))
+        for crop_num in crop_num_list:
+            task_list = []
+            for cell_i, et_cell in enumerate(group_cells):
+                if crop_num not in cell_crop_nums[cell_i]:
+                    continue
+                task_list.append((
+                    cell_i, et_cell.crop_params[crop_num],
+                    cell_crop_nums[cell_i].index(crop_num) + 1))
+            crop = task_list[0][1]
+            logging.warning('Crop {} - {}  ({} cells)'.format(
+                crop.class_number, crop.name, len(task_list)))
+            if debug_flag:
+                array_day_loop(
+                    data, group_cells, task_list, debug_flag,
+                    'crop_cycle_cell_batch()', journal)
+            else:
+                vector_day_loop(
+                    data, group_cells, task_list, 'crop_cycle_cell_batch()',
+                    journal, climate_stack)
+            if cell_done is not None:
+                for cell_i, crop, crop_count in task_list:
+                    if crop_num == cell_crop_nums[cell_i][-1]:
+                        cell_done(group_cells[cell_i])
     return True
 
+def array_day_loop(data, et_cells, task_list, debug_flag = False,
+                   func_str = 'array_day_loop()', journal = None):
+    """Advance a set of cell/crop states together in one daily time loop
+
+    Climate values are read from per cell lists by integer day
+    (see cell_climate_lists()).  Daily results of each cell/crop are
+    written to preallocated arrays that are copied to its crop_df
+    after day loop.
+
+    Args:
+        data ():
+        et_cells (list): ETCell instances sharing the same dates
+        task_list (list): (cell index, crop, crop count) tuples
+        debug_flag (bool): If True, write debug level comments to debug.txt
+        func_str (str): name of calling function for debug messages
+        journal (): RunJournal instance, each cell/crop is recorded as
+            soon as its output is written
+
+    Returns
+        Bool
+    """
+    if not task_list:
+        return True
+
+    # Dates are shared by all cells
+
+    cell_lists = [cell_climate_lists(et_cell) for et_cell in et_cells]
+    doy_list = cell_lists[0]['doy']
+    year_list = cell_lists[0]['year']
+    month_list = cell_lists[0]['month']
+    day_list = cell_lists[0]['day']
+    dt_list = cell_lists[0]['date']
+    day_count, task_n = len(dt_list), len(task_list)
+
+    # Initialize state, climate lists and daily output arrays of each cell/crop
+
+    foo_list, foo_day_list, climate_list, output_list = [], [], [], []
+    for cell_i, crop, crop_count in task_list:
+        et_cell = et_cells[cell_i]
+        if debug_flag:
+            logging.debug(
+                '{}:  Curve {} {}  Class {}  Flag {}'.format(
+                    func_str, crop.curve_number, crop.curve_name,
+                    crop.class_number, et_cell.crop_flags[crop.class_number]))
+            logging.debug('  GDD trigger DOY: {}'.format(crop.gdd_trigger_doy))
+
+        # 'foo' is holder of all these global variables for now
+
+        foo = InitializeCropCycle()
+
+        # First time through for crop, load basic crop parameters and process climate data
+
+        foo.crop_load(data, et_cell, crop)
+
+        # GetCO2 correction factors for each crop
+
+        if data.co2_flag: foo.setup_co2(et_cell, crop)
+
+        # Initialize crop data frame
+
+        foo.setup_dataframe(et_cell)
+        foo_day = DayData()
+        foo_day.sdays = 0
+        foo_day.doy_prev = 0
+
+        # At very start for crop, set up for next season
+
+        if not foo.in_season and foo.crop_setup_flag: foo.setup_crop(crop)
+
+        # Continue from state saved by previous run in daily update mode
+
+        load_crop_state(et_cell, crop, foo, foo_day)
+        climate_lists = cell_lists[cell_i]
+        tmean_field, tmin_field, tmax_field, t30_field = crop_temperature_fields(
+            data, crop)
+        if data.co2_flag:
+            co2_list = foo.co2.reindex(foo.crop_df.index).values.astype(
+                np.float64).tolist()
+        else:
+            co2_list = None
+        climate_list.append((
+            climate_lists['tdew'], climate_lists['wind'],
+            climate_lists['ppt'], climate_lists['rh_min'],
+            climate_lists['etref'], climate_lists['snow_depth'],
+            climate_lists[tmean_field], climate_lists[tmin_field],
+            climate_lists[tmax_field], climate_lists[t30_field], co2_list))
+        output_list.append((
+            np.full(day_count, np.nan), np.full(day_count, np.nan),
+            np.full(day_count, np.nan), np.full(day_count, np.nan),
+            np.full(day_count, np.nan), np.full(day_count, np.nan),
+            np.full(day_count, np.nan), np.full(day_count, np.nan),
+            np.full(day_count, np.nan), np.zeros(day_count, dtype=np.int64),
+            np.zeros(day_count, dtype=np.int64)))
+        foo_list.append(foo)
+        foo_day_list.append(foo_day)
+
+    # Cells and crops are only named in messages when several are advanced
+
+    if task_n > 1:
+        task_str_list = [
+            'Cell {}  Crop {}  '.format(et_cells[cell_i].cell_id, crop.class_number)
+            for cell_i, crop, crop_count in task_list]
+    else:
+        task_str_list = ['']
+    if len(et_cells) > 1:
+        cell_str_list = [
+            '  Cell {}'.format(et_cells[cell_i].cell_id)
+            for cell_i, crop, crop_count in task_list]
+    else:
+        cell_str_list = [''] * task_n
+    year_start_i = 0
+
+    for i in range(day_count):
+        if debug_flag:
+            logging.debug(
+                '\n{}: DOY {}  Date {}'.format(
+                    func_str, doy_list[i], dt_list[i].date()))
+        for j in range(task_n):
+            cell_i, crop, crop_count = task_list[j]
+            et_cell, foo, foo_day = et_cells[cell_i], foo_list[j], foo_day_list[j]
+            (tdew_list, u2_list, precip_list, rh_min_list, etref_list,
+             snow_depth_list, tmean_list, tmin_list, tmax_list, t30_list,
+             co2_list) = climate_list[j]
+            if debug_flag:
+                # Log RefET values at time step
+
+                logging.debug(('{}: {}PPT {:.6f}  Wind {:.6f}  ' +
+                     'Tdew {:.6f} ETref {:.6f}').format(
+                        func_str, task_str_list[j], precip_list[i],
+                        u2_list[i], tdew_list[i], etref_list[i]))
+
+                # Log climate values at time step
+
+                logging.debug(('{}: {}tmax {:.6f}  tmin {:.6f}  ' +
+                     'tmean {:.6f}  t30 {:.6f}').format(
+                        func_str, task_str_list[j],
+                        cell_lists[cell_i]['tmax'][i],
+                        cell_lists[cell_i]['tmin'][i],
+                        cell_lists[cell_i]['tmean'][i],
+                        cell_lists[cell_i]['t30'][i]))
+
+            # At end of season for each crop, set up for non-growing and dormant season
+
+            if not foo.in_season and foo.dormant_setup_flag:
+                foo.setup_dormant(et_cell, crop)
+            if debug_flag:
+                logging.debug(
+                    '{}: {}in_season[{}]  crop_setup[{}]  dormant_setup[{}]'.format(
+                        func_str, task_str_list[j], foo.in_season,
+                        foo.crop_setup_flag, foo.dormant_setup_flag))
+
+            # Track variables for each day
+
+            foo_day.sdays += 1
+            foo_day.doy = doy_list[i]
+            foo_day.year = year_list[i]
+            foo_day.month = month_list[i]
+            foo_day.day = day_list[i]
+            foo_day.date = dt_list[i]
+            foo_day.tdew = tdew_list[i]
+            foo_day.u2 = u2_list[i]
+            foo_day.precip = precip_list[i]
+            foo_day.rh_min = rh_min_list[i]
+            foo_day.etref = etref_list[i]
+            foo_day.snow_depth = snow_depth_list[i]
+            foo_day.tmean = tmean_list[i]
+            foo_day.tmin = tmin_list[i]
+            foo_day.tmax = tmax_list[i]
+            foo_day.t30 = t30_list[i]
+
+            # Get CO2 correction factor for each day
+
+            if data.co2_flag: foo_day.co2 = co2_list[i]
+
+            # Compute crop growing degree days
+
+            compute_crop_gdd.compute_crop_gdd(crop, foo, foo_day)
+
+            # Calculate height of vegetation.
+            # Call was moved up to this point 12/26/07 for use in adj. Kcb and kc_max
+
+            calculate_height.calculate_height(crop, foo, debug_flag)
+
+            # Interpolate Kcb and make climate adjustment (for ETo basis)
+
+            kcb_daily.kcb_daily(data, et_cell, crop, foo, foo_day, debug_flag)
+
+            # Calculate Kcb, Ke, ETc
+
+            compute_crop_et.compute_crop_et(
+                data, et_cell, crop, foo, foo_day, debug_flag)
+
+            # Retrieve values from foo and write to output arrays
+
+            (et_act_array, et_pot_array, et_bas_array, kc_act_array,
+             kc_bas_array, irrigation_array, runoff_array, dperc_array,
+             niwr_array, season_array, cutting_array) = output_list[j]
+            et_act_array[i] = foo.etc_act
+            et_pot_array[i] = foo.etc_pot
+            et_bas_array[i] = foo.etc_bas
+            kc_act_array[i] = foo.kc_act
+            kc_bas_array[i] = foo.kc_bas
+            irrigation_array[i] = foo.irr_sim
+            runoff_array[i] = foo.sro
+            dperc_array[i] = foo.dperc
+            niwr_array[i] = foo.niwr + 0
+            season_array[i] = int(foo.in_season)
+            cutting_array[i] = int(foo.cutting)
+
+            # Write final output file variables to DEBUG file
+
+            if debug_flag:
+                logging.debug(
+                    ('{}: ETref  {:.6f}  Precip {:.6f}  T30 {:.6f}').format(
+                        func_str, foo_day.etref, foo_day.precip, foo_day.t30))
+                logging.debug(
+                    ('{}: ETact  {:.6f}  ETpot {:.6f}   ETbas {:.6f}').format(
+                        func_str, foo.etc_act, foo.etc_pot, foo.etc_bas))
+                logging.debug(
+                    ('{}: Irrig  {:.6f}  Runoff {:.6f}  ' +
+                     'DPerc {:.6f}  NIWR {:.6f}').format(
+                        func_str, foo.irr_sim, foo.sro, foo.dperc, foo.niwr))
+
+        # Check that season started
+
+        if i > 0 and year_list[i] != year_list[i - 1]:
+            year_start_i = i
+        if month_list[i] == 12 and day_list[i] == 31:
+            for j, (cell_i, crop, crop_count) in enumerate(task_list):
+                season_count = output_list[j][9][year_start_i:i + 1].sum()
+                if season_count == 0:
+                    logging.warning(
+                        '{}  Crop {} - {} growing season never started'.format(
+                            cell_str_list[j], crop.class_number, year_list[i]))
+                elif season_count == 1:
+                    logging.warning(
+                        '{}  Crop {} - {} growing season active for 1 day'.format(
+                            cell_str_list[j], crop.class_number, year_list[i]))
+
+    # Copy output arrays to crop data frames and write output files
+
+    for j, (cell_i, crop, crop_count) in enumerate(task_list):
+        foo = foo_list[j]
+        for field, field_array in zip(
+                ['et_act', 'et_pot', 'et_bas', 'kc_act', 'kc_bas',
+                 'irrigation', 'runoff', 'dperc', 'niwr', 'season', 'cutting'],
+                output_list[j]):
+            foo.crop_df[field] = field_array
+        save_crop_state(data, et_cells[cell_i], crop, foo, foo_day_list[j])
+        if (data.cet_out['daily_output_flag'] or
+                data.cet_out['monthly_output_flag'] or
+                data.cet_out['annual_output_flag'] or
+                data.gs_output_flag or data.cube_output_flag):
+            write_crop_output(crop_count, data, et_cells[cell_i], crop, foo)
+        if journal is not None:
+            journal.record(et_cells[cell_i], crop)
+        foo_list[j], output_list[j] = None, None
+    return True
+
+def stack_cell_climate(et_cells):
+    """Stack climate arrays of cells into day x cell arrays
+
+    Temperature stacks alternate main and historic temperature columns
+    of each cell (cell * 2 + 1 for historic temperatures).
+
+    Args:
+        et_cells (list): ETCell instances sharing the same dates
+
+    Returns:
+        dict of day x column NumPy arrays keyed by climate_df column name
+    """
+    cell_arrays = [cell_climate_arrays(et_cell) for et_cell in et_cells]
+    climate_stack = {}
+    for field in ['tdew', 'wind', 'ppt', 'rh_min', 'etref', 'snow_depth']:
+        climate_stack[field] = np.column_stack([
+            cell_array[field] for cell_array in cell_arrays])
+    for field, hist_field in [('tmean', 'meant'), ('tmin', 'mint'),
+                              ('tmax', 'maxt'), ('t30', '30t')]:
+        climate_stack[field] = np.column_stack([
+            cell_array[stack_field] for cell_array in cell_arrays
+            for stack_field in [field, hist_field]])
+    for field in ['doy', 'year', 'month', 'day']:
+        climate_stack[field] = cell_arrays[0][field]
+    return climate_stack
+
+def vector_day_loop(data, et_cells, task_list, func_str = 'vector_day_loop()',
+                    journal = None, climate_stack = None):
+    """Advance cell/crop lanes together with masked vector operations
+
+    State of all lanes is packed into crop_cycle_dtype and day_data_dtype
+    record arrays and each day is computed for all lanes at once by
+    crop_et_lanes.lane_day_loop().  Climate of cells is stacked into
+    day x cell arrays.  States are unpacked and daily results of each
+    lane are fanned out to its crop output after day loop.
+
+    Args:
+        data ():
+        et_cells (list): ETCell instances sharing the same dates
+        task_list (list): (cell index, crop, crop count) tuples
+        func_str (str): name of calling function for messages
+        journal (): RunJournal instance, each cell/crop is recorded as
+            soon as its output is written
+        climate_stack (dict): climate of et_cells from stack_cell_climate()
+            (stacked here if None)
+
+    Returns
+        Bool
+    """
+    if not task_list:
+        return True
+    refet_type = data.refet['type']
+    if refet_type not in ['eto', 'etr']:
+        logging.error(
+            '\nERROR: {} Unsupported reference ET type {}'.format(
+                func_str, refet_type))
+        sys.exit()
+    for cell_i, crop, crop_count in task_list:
+        if crop.flag_for_means_to_estimate_pl_or_gu not in [1, 2, 3, 4]:
+            logging.error(
+                '\nERROR: kcb_daily() Unrecognized ' +
+                'flag_for_means_to_estimate_pl_or_gu value')
+            sys.exit()
+
+    # Dates are shared by all cells
+
+    if climate_stack is None:
+        climate_stack = stack_cell_climate(et_cells)
+    dt_index = et_cells[0].refet_df.index
+    day_count, lane_count = len(dt_index), len(task_list)
+
+    # Initialize state of each cell/crop
+
+    foo_list, foo_day_list, temp_cols = [], [], []
+    for cell_i, crop, crop_count in task_list:
+        et_cell = et_cells[cell_i]
+        foo = InitializeCropCycle()
+        foo.crop_load(data, et_cell, crop)
+        if data.co2_flag: foo.setup_co2(et_cell, crop)
+        foo_day = DayData()
+        if not foo.in_season and foo.crop_setup_flag: foo.setup_crop(crop)
+        load_crop_state(et_cell, crop, foo, foo_day)
+        foo_list.append(foo)
+        foo_day_list.append(foo_day)
+        hist_temps = crop_temperature_fields(data, crop)[0] == 'meant'
+        temp_cols.append(cell_i * 2 + int(hist_temps))
+
+    if data.co2_flag:
+        co2_array = np.column_stack([
+            foo.co2.reindex(dt_index).values.astype(np.float64)
+            for foo in foo_list])
+    else:
+        co2_array = np.ones((1, lane_count))
+    climate = crop_et_lanes.LaneClimate(
+        climate_stack['tdew'], climate_stack['wind'], climate_stack['ppt'],
+        climate_stack['rh_min'], climate_stack['etref'],
+        climate_stack['snow_depth'], climate_stack['tmean'],
+        climate_stack['tmin'], climate_stack['tmax'], climate_stack['t30'],
+        co2_array)
+    calendar = crop_et_lanes.LaneCalendar(
+        climate_stack['doy'], climate_stack['year'], climate_stack['month'],
+        climate_stack['day'])
+    params = crop_et_lanes.lane_params(
+        data, et_cells, task_list, foo_list, temp_cols)
+    curves, lentry = crop_et_lanes.lane_curves(et_cells)
+
+    # Pack states into record arrays (one element per lane)
+    # Lanes step contiguous copies of record fields, so compiled day loop
+    #   sees the same array layout for any number of lanes
+
+    state_array = np.array(
+        [foo.to_record() for foo in foo_list], dtype=crop_cycle_dtype)
+    day_array = np.array(
+        [foo_day.to_record() for foo_day in foo_day_list],
+        dtype=day_data_dtype)
+    state = crop_et_lanes.LaneState(*[
+        np.ascontiguousarray(state_array[field])
+        for field in crop_et_lanes.LaneState._fields])
+    day = crop_et_lanes.LaneDay(*[
+        np.ascontiguousarray(day_array[field])
+        for field in crop_et_lanes.LaneDay._fields])
+    output = crop_et_lanes.LaneOutput(*(
+        [np.zeros((lane_count, day_count)) for i in range(9)] +
+        [np.zeros((lane_count, day_count), dtype=np.int64)
+         for i in range(2)]))
+    events = np.zeros((lane_count, day_count), dtype=np.int8)
+    status = np.zeros(3, dtype=np.int64)
+
+    # Masked lanes can divide by zero or take roots of negative values
+
+    if data.kernel_flag:
+        lane_day_loop = crop_et_lanes.lane_day_loop_kernel
+    else:
+        lane_day_loop = crop_et_lanes.lane_day_loop
+    with np.errstate(all='ignore'):
+        lane_day_loop(
+            state, day, params, curves, lentry, climate, calendar, output,
+            events, status, refet_type == 'eto', bool(data.co2_flag))
+    for field, field_array in zip(crop_et_lanes.LaneState._fields, state):
+        state_array[field] = field_array
+    for field, field_array in zip(crop_et_lanes.LaneDay._fields, day):
+        day_array[field] = field_array
+
+    # Cells are only named in messages when several are advanced
+
+    if len(et_cells) > 1:
+        cell_str_list = [
+            '  Cell {}'.format(et_cells[cell_i].cell_id)
+            for cell_i, crop, crop_count in task_list]
+    else:
+        cell_str_list = [''] * lane_count
+    if status[0]:
+        cell_i, crop, crop_count = task_list[status[1]]
+        logging.error(crop_et_lanes.status_messages[status[0]].format(
+            crop.class_number, dt_index[status[2]].date()) +
+            cell_str_list[status[1]])
+        sys.exit()
+    log_lane_events(
+        task_list, cell_str_list, events, output.season, calendar)
+
+    # Unpack states and write output files of each cell/crop
+
+    output_fields = [
+        'et_act', 'et_pot', 'et_bas', 'kc_act', 'kc_bas', 'irrigation',
+        'runoff', 'dperc', 'niwr', 'season', 'cutting']
+    for j, (cell_i, crop, crop_count) in enumerate(task_list):
+        et_cell, foo, foo_day = et_cells[cell_i], foo_list[j], foo_day_list[j]
+        foo.load_record(state_array[j])
+        foo_day.load_record(day_array[j])
+        foo.setup_dataframe(et_cell)
+        for field, field_array in zip(output_fields, output):
+            foo.crop_df[field] = field_array[j].copy()
+        save_crop_state(data, et_cell, crop, foo, foo_day)
+        if (data.cet_out['daily_output_flag'] or
+                data.cet_out['monthly_output_flag'] or
+                data.cet_out['annual_output_flag'] or
+                data.gs_output_flag or data.cube_output_flag):
+            write_crop_output(crop_count, data, et_cell, crop, foo)
+        if journal is not None:
+            journal.record(et_cell, crop)
+        foo_list[j] = None
+    return True
+
+def log_lane_events(task_list, cell_str_list, events, season, calendar):
+    """Log killing frosts, Kc warnings and season checks of lanes
+
+    Args:
+        task_list (list): (cell index, crop, crop count) tuples
+        cell_str_list (list): cell name of each lane for messages
+        events (): lane x day array of crop_et_lanes event flags
+        season (): lane x day array of in season flags
+        calendar (): crop_et_lanes.LaneCalendar
+
+    Returns:
+        None
+    """
+    year_end_i = np.where((calendar.month == 12) & (calendar.day == 31))[0]
+    year_start_i = np.searchsorted(calendar.year, calendar.year[year_end_i])
+    for j, (cell_i, crop, crop_count) in enumerate(task_list):
+        for i in np.nonzero(events[j])[0]:
+            if events[j, i] & crop_et_lanes.killing_frost_event:
+                logging.info(
+                    "Killing frost for crop %d of %.1f was found on DOY %d of %d" %
+                    (crop.class_number, crop.killing_frost_temperature,
+                     calendar.doy[i], calendar.year[i]))
+            if events[j, i] & crop_et_lanes.no_killing_frost_event:
+                logging.info("No killing frost in year %d" % (calendar.year[i]))
+            if events[j, i] & crop_et_lanes.kc_mult_event:
+                logging.warning("kcmult > 1.")
+            if events[j, i] & crop_et_lanes.ks_event:
+                logging.warning("ks > 1.")
+
+        # Check that season started
+
+        for start_i, end_i in zip(year_start_i, year_end_i):
+            season_count = season[j, start_i:end_i + 1].sum()
+            if season_count == 0:
+                logging.warning(
+                    '{}  Crop {} - {} growing season never started'.format(
+                        cell_str_list[j], crop.class_number,
+                        calendar.year[end_i]))
+            elif season_count == 1:
+                logging.warning(
+                    '{}  Crop {} - {} growing season active for 1 day'.format(
+                        cell_str_list[j], crop.class_number,
+                        calendar.year[end_i]))
+
+def cell_state_path(data, et_cell):
+    """Path of end of period crop state file of cell
+
+    Args:
+        data ():
+        et_cell ():
+
+    Returns:
+        str
+    """
+    return os.path.join(data.state_ws, '{}_state.npz'.format(et_cell.cell_id))
+
+def read_cell_state(data, et_cell):
+    """Continue cell from crop states saved by previous run
+
+    Input time series are cut to days after saved states.  Daily values
+    of last year of previous run are kept with states so monthly, annual
+    and growing season output of that year can be completed.
+
+    Args:
+        data ():
+        et_cell (): ETCell instance with processed climate
+
+    Returns:
+        number of new days (None if states could not be read)
+    """
+    state_path = cell_state_path(data, et_cell)
+    if not os.path.isfile(state_path):
+        logging.error(
+            '\nERROR: Crop state file {} does not exist'.format(state_path))
+        return None
+    state = np.load(state_path)
+    tail_index = pd.DatetimeIndex(
+        state['tail_date'].astype('datetime64[ns]'))
+    state_dt = tail_index[-1]
+    initial_states = {}
+    for i, crop_num in enumerate(state['crop_num'].tolist()):
+        tail_df = pd.DataFrame.from_records(
+            state['tail_{:02d}'.format(crop_num)])
+        tail_df.index = tail_index
+        initial_states[crop_num] = {
+            'crop_cycle': state['crop_cycle'][i],
+            'day_data': state['day_data'][i], 'tail': tail_df}
+    state.close()
+    for crop_num, crop_flag in sorted(et_cell.crop_flags.items()):
+        if crop_flag and crop_num not in initial_states:
+            logging.error(
+                '\nERROR: Crop {} has no saved state in {}'.format(
+                    crop_num, state_path))
+            return None
+    if et_cell.refet_df.index[0] > state_dt + datetime.timedelta(days=1):
+        logging.error(
+            ('\nERROR: Input data start after first day following ' +
+             'saved states ({})').format(state_dt.date()))
+        return None
+    et_cell.refet_df = et_cell.refet_df[et_cell.refet_df.index > state_dt]
+    et_cell.climate_df = et_cell.climate_df[et_cell.climate_df.index > state_dt]
+    et_cell.climate_arrays = None
+    et_cell.initial_states = initial_states
+    logging.info('  Continuing from saved states of {}'.format(state_dt.date()))
+    return len(et_cell.refet_df.index)
+
+def write_cell_state(data, et_cell, crop_states):
+    """Write end of period crop states of cell
+
+    Args:
+        data ():
+        et_cell ():
+        crop_states (dict): crop states from save_crop_state() by crop number
+
+    Returns:
+        None
+    """
+    if data.state_ws is None or not crop_states:
+        return
+    crop_nums = sorted(crop_states.keys())
+    state_arrays = {
+        'crop_num': np.array(crop_nums, dtype=np.int64),
+        'crop_cycle': np.array(
+            [crop_states[c]['crop_cycle'] for c in crop_nums],
+            dtype=crop_cycle_dtype),
+        'day_data': np.array(
+            [crop_states[c]['day_data'] for c in crop_nums],
+            dtype=day_data_dtype),
+        'tail_date': crop_states[crop_nums[0]]['tail'].index.values.astype(
+            'datetime64[ns]').view(np.int64)}
+    for crop_num in crop_nums:
+        state_arrays['tail_{:02d}'.format(crop_num)] = crop_states[crop_num][
+            'tail'].to_records(index=False)
+    np.savez_compressed(cell_state_path(data, et_cell), **state_arrays)
+
+def load_crop_state(et_cell, crop, foo, foo_day):
+    """Set crop cycle and daily data from state saved by previous run
+
+    Args:
+        et_cell ():
+        crop ():
+        foo (): InitializeCropCycle instance
+        foo_day (): DayData instance
+
+    Returns:
+        None
+    """
+    crop_state = et_cell.initial_states.get(crop.class_number)
+    if crop_state is not None:
+        foo.load_record(crop_state['crop_cycle'])
+        foo_day.load_record(crop_state['day_data'])
+
+def save_crop_state(data, et_cell, crop, foo, foo_day):
+    """Keep end of period state of crop for write_cell_state()
+
+    Args:
+        data ():
+        et_cell ():
+        crop ():
+        foo (): InitializeCropCycle instance
+        foo_day (): DayData instance
+
+    Returns:
+        None
+    """
+    if data.state_ws is None:
+        return
+    output_df = crop_output_df(et_cell, crop, foo)
+    et_cell.final_states[crop.class_number] = {
+        'crop_cycle': foo.to_record(), 'day_data': foo_day.to_record(),
+        'tail': output_df[output_df.index.year == output_df.index[-1].year]}
+
+def crop_output_df(et_cell, crop, foo):
+    """Merge daily crop data with precipitation
+
+    When continuing from saved state, days of last year of previous
+    run are prepended.
+
+    Args:
+        et_cell ():
+        crop ():
+        foo ():
+
+    Returns:
+        pandas.DataFrame
+    """
+    output_df = pd.merge(
+        foo.crop_df, et_cell.climate_df[['ppt']],
+        # foo.crop_df, et_cell.climate_df[['ppt', 't30']],
+        left_index=True, right_index=True)
+    crop_state = et_cell.initial_states.get(crop.class_number)
+    if crop_state is not None:
+        tail_df = crop_state['tail'].copy()
+        tail_df.index.name = output_df.index.name
+        output_df = pd.concat([tail_df, output_df])
+    return output_df
+
+def rdb_shard_path(data, output_key, cell_id, crop_num):
+    """Path of RDB output shard of cell and crop
+
+    Args:
+        data (): configuration data
+        output_key (str): 'daily', 'monthly' or 'annual'
+        cell_id (str): ET cell id
+        crop_num (int): crop number
+
+    Returns:
+        str
+    """
+    return os.path.join(data.rdb_shard_ws, '{}_{}_crop_{:02d}.csv'.format(
+        output_key, cell_id, int(crop_num)))
+
+def merge_rdb_shards(data, et_cell, crop_nums):
+    """Merge RDB output shards of cell in crop order
+
+    Shards are sorted by date, so crop shards are concatenated in crop
+    order with header of first crop.  Merged file has same layout as RDB
+    file written by single process.
+
+    Args:
+        data (): configuration data
+        et_cell (): ETCell instance
+        crop_nums (list): crop numbers of cell with shards
+
+    Returns:
+        None
+    """
+    output_name = data.cet_out['name_format'].replace(
+        '%c', '').replace('__', '_') % et_cell.cell_id
+    for output_key in ['daily', 'monthly', 'annual']:
+        if not data.cet_out[output_key + '_output_flag']:
+            continue
+        output_path = os.path.join(
+            data.cet_out[output_key + '_output_ws'], output_name)
+        with open(output_path, 'w') as output_f:
+            for crop_i, crop_num in enumerate(sorted(crop_nums)):
+                shard_path = rdb_shard_path(
+                    data, output_key, et_cell.cell_id, crop_num)
+                with open(shard_path, 'r') as shard_f:
+                    header_line = shard_f.readline()
+                    if crop_i == 0:
+                        output_f.write(header_line)
+                    shutil.copyfileobj(shard_f, output_f)
+                os.remove(shard_path)
+
+def trim_output_lines(output_path, line_count):
+    """Remove last lines of output file before appending updated rows
+
+    Args:
+        output_path (str): output file path
+        line_count (int): number of lines to remove
+
+    Returns:
+        None
+    """
+    if line_count <= 0:
+        return
+    with open(output_path, 'r') as output_f:
+        output_lines = output_f.readlines()
+    with open(output_path, 'w') as output_f:
+        output_f.writelines(output_lines[:-line_count])
+
+def period_starts(period_keys):
+    """Index of first day of each period in daily values sorted by date
+
+    Args:
+        period_keys (): integer period key of each day (i.e. year)
+
+    Returns:
+        numpy array of int
+    """
+    return np.concatenate(
+        [[0], np.flatnonzero(np.diff(period_keys)) + 1]).astype(np.int64)
+
+def period_stats(daily_output_df, starts, sum_fields, mean_fields):
+    """Sums and means of daily output values for each period
+
+    Floating point values of each period are added in day order starting
+    from zero and NaN values are skipped so that results match pandas
+    resample sums and means exactly.  Each period is one row of a period
+    by day array that is accumulated along days.
+
+    Args:
+        daily_output_df (): daily output data frame sorted by date
+        starts (): index of first day of each period from period_starts()
+        sum_fields (list): fields summed for each period
+        mean_fields (list): fields averaged for each period
+
+    Returns:
+        dict of numpy arrays by field
+    """
+    day_count = len(daily_output_df.index)
+    period_count = len(starts)
+    period_lengths = np.diff(np.append(starts, day_count))
+    stats = {}
+
+    # Integer sums are exact in any order
+
+    float_fields = []
+    for field in sum_fields + mean_fields:
+        values = daily_output_df[field].values
+        if field in sum_fields and values.dtype.kind in 'iu':
+            stats[field] = np.add.reduceat(values.astype(np.int64), starts)
+        else:
+            float_fields.append(field)
+    if not float_fields:
+        return stats
+
+    # Day 0 of each period row is zero start value
+
+    period_i = np.repeat(np.arange(period_count), period_lengths)
+    day_i = np.arange(day_count) - np.repeat(starts, period_lengths) + 1
+    values = daily_output_df[float_fields].values.astype(np.float64)
+    valid = ~np.isnan(values)
+    period_values = np.zeros(
+        (period_count, period_lengths.max() + 1, len(float_fields)))
+    period_values[period_i, day_i] = np.where(valid, values, 0.)
+    period_sums = np.cumsum(period_values, axis=1)[:, -1, :]
+    valid_counts = np.add.reduceat(valid.astype(np.int64), starts, axis=0)
+    for field_i, field in enumerate(float_fields):
+        if field in mean_fields:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                stats[field] = (
+                    period_sums[:, field_i] / valid_counts[:, field_i])
+        else:
+            stats[field] = period_sums[:, field_i]
+    return stats
+
+def growing_season_stats(doy, season, year_starts):
+    """Growing season start DOY, end DOY and length for each year
+
+    Start is DOY of first season onset in year and end is DOY of first
+    season end in year.  If season does not start (or end) within year,
+    first (or last) DOY of year is used.  Years without season days
+    have no values.
+
+    Args:
+        doy (): daily DOY values
+        season (): daily season flags
+        year_starts (): index of first day of each year from period_starts()
+
+    Returns:
+        tuple of start DOY, end DOY and season length arrays
+    """
+    day_count = len(doy)
+    year_i = np.repeat(
+        np.arange(len(year_starts)), np.diff(np.append(year_starts, day_count)))
+    season = season.astype(np.int64)
+    doy = doy.astype(np.int64)
+    gs_length = np.add.reduceat(season, year_starts).astype(np.float64)
+    gs_start_doy = np.minimum.reduceat(doy, year_starts).astype(np.float64)
+    gs_end_doy = np.maximum.reduceat(doy, year_starts).astype(np.float64)
+
+    # Season transitions within each year from one transition array
+
+    season_diff = np.diff(season)
+    same_year = year_i[1:] == year_i[:-1]
+    for diff_value, gs_doy in [(1, gs_start_doy), (-1, gs_end_doy)]:
+        change_i = np.flatnonzero((season_diff == diff_value) & same_year) + 1
+        change_years, first_i = np.unique(year_i[change_i], return_index=True)
+        gs_doy[change_years] = doy[change_i[first_i]]
+    no_season = gs_length == 0
+    gs_start_doy[no_season] = np.nan
+    gs_end_doy[no_season] = np.nan
+    gs_length[no_season] = np.nan
+    return gs_start_doy, gs_end_doy, gs_length
+
+def doy_dates(years, doys):
+    """ISO date strings of year and DOY values
+
+    Args:
+        years (): year values
+        doys (): DOY values (NaN if not set)
+
+    Returns:
+        numpy array of str ('None' where DOY is not set or not valid)
+    """
+    years = np.asarray(years, dtype=np.int64)
+    doys = np.asarray(doys, dtype=np.float64)
+    valid = ~np.isnan(doys)
+    dates = ((years - 1970).astype('datetime64[Y]').astype('datetime64[D]') +
+             (np.where(valid, doys, 1).astype(np.int64) - 1))
+    valid &= (np.where(valid, doys, 1) >= 1)
+    valid &= dates.astype('datetime64[Y]').astype(np.int64) + 1970 == years
+    return np.where(
+        valid, np.datetime_as_string(dates, unit='D'), 'None').astype(str)
+
 def write_crop_output(crop_count, data, et_cell, crop, foo):
     """Write ET-Demands output files for each cell and crop
 
@@ -330,111 +1647,141 @@ def write_crop_output(crop_count, data, et_cell, crop, foo):
     gs_end_date_field = 'End_Date'
     gs_length_field = 'GS_Length'
 
+    # In daily update mode new days are appended to existing output
+    # Rows of periods that started before new days are replaced
+
+    crop_state = et_cell.initial_states.get(crop.class_number)
+    update_flag = crop_state is not None
+    if update_flag:
+        update_start_dt = foo.crop_df.index[0]
+        state_end_dt = crop_state['tail'].index[-1]
+
     # Merge crop and weather data frames to form daily output
 
     if (data.cet_out['daily_output_flag'] or 
             data.cet_out['monthly_output_flag'] or
             data.cet_out['annual_output_flag'] or 
-            data.gs_output_flag):
-        daily_output_df = pd.merge(
-            foo.crop_df, et_cell.climate_df[['ppt']],
-            # foo.crop_df, et_cell.climate_df[['ppt', 't30']],
-            left_index=True, right_index=True)
+            data.gs_output_flag or data.cube_output_flag):
+        daily_output_df = crop_output_df(et_cell, crop, foo)
 
         # Rename output columns
         
         daily_output_df.index.rename('Date', inplace=True)
         daily_output_df[year_field] = daily_output_df.index.year
-        daily_output_df = daily_output_df.rename(columns={
+        daily_output_df.rename(inplace=True, columns={
             'doy': doy_field, 'ppt': precip_field, 'etref': pmet_field,
             'et_act': etact_field, 'et_pot': etpot_field,
             'et_bas': etbas_field, 'kc_act': kc_field, 'kc_bas': kcb_field,
             'niwr': niwr_field, 'irrigation': irrig_field,
             'runoff': runoff_field, 'dperc': dperc_field,
             'season': season_field, 'cutting': cutting_field})
+
+    # Write daily values in place to results cube before formatting
+
+    if data.cube_output_flag:
+        results_cube.write_crop_cube(data, et_cell, crop, daily_output_df)
             
-    # Compute monthly and annual stats before modifying daily format below
-    
+    # Compute monthly, annual and growing season stats in one pass
+    # before modifying daily format below
+    # Period boundaries are found once from sorted daily dates
+
+    if (data.cet_out['monthly_output_flag'] or
+            data.cet_out['annual_output_flag'] or data.gs_output_flag):
+        output_dates = daily_output_df.index.values
+        output_years = daily_output_df.index.year.values.astype(np.int64)
+        year_starts = period_starts(output_years)
+        year_index = pd.DatetimeIndex(
+            output_dates[year_starts].astype('datetime64[Y]').astype(
+                'datetime64[ns]'), name='Date')
+        sum_fields = [
+            pmet_field, etact_field, etpot_field, etbas_field, niwr_field,
+            precip_field, irrig_field, runoff_field, dperc_field,
+            season_field, cutting_field]
+        mean_fields = [kc_field, kcb_field]
     if data.cet_out['monthly_output_flag']:
-        monthly_resample_func = {
-            pmet_field: np.sum, etact_field: np.sum, etpot_field: np.sum,
-            etbas_field: np.sum, kc_field: np.mean, kcb_field: np.mean,
-            niwr_field: np.sum, precip_field: np.sum, irrig_field: np.sum,
-            runoff_field: np.sum, dperc_field: np.sum, season_field: np.sum,
-            cutting_field: np.sum}
-        # dri dm approach produces 'TypeError: ("'dict' object is not callable", 
-        # a u'occurred at index DOY')
-        monthly_output_df = daily_output_df.resample('MS').apply(monthly_resample_func)
+        month_starts = period_starts(
+            output_years * 12 + daily_output_df.index.month.values)
+        monthly_output_df = pd.DataFrame(
+            period_stats(daily_output_df, month_starts, sum_fields, mean_fields),
+            index=pd.DatetimeIndex(
+                output_dates[month_starts].astype('datetime64[M]').astype(
+                    'datetime64[ns]'), name='Date'),
+            columns=sum_fields + mean_fields)
     if data.cet_out['annual_output_flag']:
-        annual_resample_func = {
-            pmet_field: np.sum, etact_field: np.sum, etpot_field: np.sum,
-            etbas_field: np.sum, kc_field: np.mean, kcb_field: np.mean,
-            niwr_field: np.sum, precip_field: np.sum, irrig_field: np.sum,
-            runoff_field: np.sum, dperc_field: np.sum, season_field: np.sum,
-            cutting_field: np.sum}
-        # dri dm approach produces 'TypeError: ("'dict' object is not callable", 
-        # a u'occurred at index DOY')
-        annual_output_df = daily_output_df.resample('AS').apply(annual_resample_func)
+        annual_output_df = pd.DataFrame(
+            period_stats(daily_output_df, year_starts, sum_fields, mean_fields),
+            index=year_index, columns=sum_fields + mean_fields)
             
     # Get growing season start and end DOY for each year
     # Compute growing season length for each year
     
     if data.gs_output_flag:
-        # dri dm approach produces 'TypeError: ("'dict' object is not callable", 
-        # a u'occurred at index DOY')
-        gs_output_df = daily_output_df.resample('AS').apply({year_field: np.mean})
-        gs_output_df[gs_start_doy_field] = np.nan
-        gs_output_df[gs_end_doy_field] = np.nan
-        gs_output_df[gs_start_date_field] = None
-        gs_output_df[gs_end_date_field] = None
-        gs_output_df[gs_length_field] = np.nan
-        for year_i, (year, group) in enumerate(daily_output_df.groupby([year_field])):
-            if not np.any(group[season_field].values):
-                logging.debug('  Skipping, season flag was never set to 1')
-                continue
-            else:
-                season_diff = np.diff(group[season_field].values)
-                try:
-                    start_i = np.where(season_diff == 1)[0][0] + 1
-                    # gs_output_pd.set_value(
-                    #     group.index[0], gs_start_doy_field,
-                    #     int(group.ix[start_i, doy_field]))
-                    # Replacement for set_value Future Warning
-                    gs_output_df.at[group.index[0], gs_start_doy_field] = int(group.ix[start_i, doy_field])
-                except:
-                    # gs_output_pd.set_value(
-                    #     group.index[0], gs_start_doy_field,
-                    #     int(min(group[doy_field].values)))
-                    #Replacement for set_value Future Warning
-                    gs_output_df.at[group.index[0], gs_start_doy_field] = int(min(group[doy_field].values))
-                try:
-                    end_i = np.where(season_diff == -1)[0][0] + 1
-                    # gs_output_pd.set_value(
-                    #     group.index[0], gs_end_doy_field,
-                    #     int(group.ix[end_i, doy_field]))
-                    # Replacement for set_value Future Warning
-                    gs_output_df.at[group.index[0], gs_end_doy_field] = int(group.ix[end_i, doy_field])
-                except:
-                    # gs_output_pd.set_value(
-                    #     group.index[0], gs_end_doy_field,
-                    #     int(max(group[doy_field].values)))
-                    # Replacement for set_value Future Warning
-                    gs_output_df.at[group.index[0], gs_end_doy_field] = int(max(group[doy_field].values))
-                del season_diff
-            # gs_output_pd.set_value(
-            #     group.index[0], gs_length_field,
-            #     int(sum(group[season_field].values)))
-            # Replacement for set_value Future Warning
-            gs_output_df.at[group.index[0], gs_length_field] = int(sum(group[season_field].values))
-
-    if data.cet_out['data_structure_type'].upper() == 'DRI':
+        gs_start_doy, gs_end_doy, gs_length = growing_season_stats(
+            daily_output_df[doy_field].values,
+            daily_output_df[season_field].values, year_starts)
+        gs_output_df = pd.DataFrame(
+            {year_field: output_years[year_starts],
+             gs_start_doy_field: gs_start_doy, gs_end_doy_field: gs_end_doy,
+             gs_length_field: gs_length},
+            index=year_index,
+            columns=[year_field, gs_start_doy_field, gs_end_doy_field,
+                     gs_length_field])
+
+    # Typed columnar output replaces daily, monthly and annual text files
+    # Per cell layouts always have cutting column so crop tables match
+
+    columnar_flag = (
+        data.cet_out['data_structure_type'] in columnar_output.structure_types)
+    if columnar_flag:
+        columnar_dfs, columnar_columns = {}, {}
+        value_columns = [
+            pmet_field, etact_field, etpot_field, etbas_field, kc_field,
+            kcb_field, precip_field, irrig_field, runoff_field, dperc_field,
+            niwr_field, season_field]
+        if not data.kc_flag:
+            value_columns.remove(kc_field)
+            value_columns.remove(kcb_field)
+        if not data.niwr_flag:
+            value_columns.remove(niwr_field)
+        if data.cutting_flag and (
+                crop.cutting_crop or columnar_output.cell_layout(data)):
+            value_columns.append(cutting_field)
+        if data.cet_out['daily_output_flag']:
+            daily_output_df[month_field] = daily_output_df.index.month
+            daily_output_df[day_field] = daily_output_df.index.day
+            columnar_dfs['daily'] = daily_output_df
+            columnar_columns['daily'] = [
+                year_field, month_field, day_field, doy_field] + value_columns
+        if data.cet_out['monthly_output_flag']:
+            monthly_output_df[year_field] = monthly_output_df.index.year
+            monthly_output_df[month_field] = monthly_output_df.index.month
+            columnar_dfs['monthly'] = monthly_output_df
+            columnar_columns['monthly'] = [
+                year_field, month_field] + value_columns
+        if data.cet_out['annual_output_flag']:
+            annual_output_df[year_field] = annual_output_df.index.year
+            columnar_dfs['annual'] = annual_output_df
+            columnar_columns['annual'] = [year_field] + value_columns
+        columnar_output.write_crop_tables(
+            crop_count, data, et_cell, crop, columnar_dfs, columnar_columns)
+        del columnar_dfs
+
+    if data.cet_out['data_structure_type'].upper() == 'DRI' and update_flag:
+        base_columns = []
+        open_mode = 'a'
+        print_index = True
+        print_header = False
+    elif data.cet_out['data_structure_type'].upper() == 'DRI':
         base_columns = []
         open_mode = 'w'
         print_index = True
         print_header = True
     else:    # RDB
+        # Each crop of multiprocessing run is written to its own shard
+        # with header, shards are merged by merge_rdb_shards()
+
         base_columns = ['Crop Num', 'Crop Name', 'Date']
-        if crop_count == 1:
+        if crop_count == 1 or data.rdb_shard_ws is not None:
             open_mode = 'w'
             print_header = True
         else:
@@ -443,33 +1790,19 @@ def write_crop_output(crop_count, data, et_cell, crop, foo):
         print_index = False
 
     # Write daily cet
+    # Rows are formatted and written in chunks of days so that text
+    # columns are only held in memory for one chunk at a time
     
-    if data.cet_out['daily_output_flag']:
-        daily_output_df[year_field] = daily_output_df.index.year
-        daily_output_df[month_field] = daily_output_df.index.month
-        daily_output_df[day_field] = daily_output_df.index.day
-        
-        # format date attributes if values are formatted
-                    
-        if data.cet_out['daily_float_format'] is not None:
-            daily_output_df[year_field] = daily_output_df[year_field].map(lambda x: ' %4d' % x)
-            daily_output_df[month_field] = daily_output_df[month_field].map(lambda x: ' %2d' % x)
-            daily_output_df[day_field] = daily_output_df[day_field].map(lambda x: ' %2d' % x)
-            daily_output_df[doy_field] = daily_output_df[doy_field].map(lambda x: ' %3d' % x)
-
-        # This will convert negative "zeros" to positive
-        
-        daily_output_df[niwr_field] = np.round(daily_output_df[niwr_field], 6)
-        # daily_output_df[niwr_field] = np.round(daily_output_df[niwr_field].values, 6)
-        daily_output_df[season_field] = daily_output_df[season_field].map(lambda x: ' %1d' % x)
+    if data.cet_out['daily_output_flag'] and not columnar_flag:
         if data.cet_out['data_structure_type'].upper() == 'DRI':
             daily_output_path = os.path.join(data.cet_out['daily_output_ws'], 
                  data.cet_out['name_format'].replace('%c', '%02d' % int(crop.class_number)) % et_cell.cell_id)
         else:    # RDB
             daily_output_path = os.path.join(data.cet_out['daily_output_ws'], 
                 data.cet_out['name_format'].replace('%c', '').replace('__', '_') % et_cell.cell_id)
-            daily_output_df['Crop Num'] = crop.class_number
-            daily_output_df['Crop Name'] = crop.name
+            if data.rdb_shard_ws is not None:
+                daily_output_path = rdb_shard_path(
+                    data, 'daily', et_cell.cell_id, crop.class_number)
 
         # Set output column order
 
@@ -490,37 +1823,67 @@ def write_crop_output(crop_count, data, et_cell, crop, foo):
         # Most crops do not have cuttings, so append if needed
         
         if data.cutting_flag and crop.cutting_crop:
-            daily_output_df[cutting_field] = daily_output_df[cutting_field].map(
-                lambda x: ' %1d' % x)
             daily_output_columns.append(cutting_field)
+
+        # format date attributes if values are formatted
+
+        daily_column_formats = {season_field: ' %1d', cutting_field: ' %1d'}
+        if data.cet_out['daily_float_format'] is not None:
+            daily_column_formats.update({
+                year_field: ' %4d', month_field: ' %2d', day_field: ' %2d',
+                doy_field: ' %3d'})
             
+        if update_flag:
+            daily_output_df = daily_output_df[
+                daily_output_df.index >= update_start_dt]
         with open(daily_output_path, open_mode) as daily_output_f:
-            if data.cet_out['data_structure_type'].upper() == 'DRI': 
-                daily_output_f.write('# {0:2d} - {1}\n'.format(crop.class_number, crop.name))
-            else:    # RDB
-                daily_output_df.reset_index(inplace = True)
-            daily_output_df.to_csv(daily_output_f, header = print_header, 
-                index = print_index, sep = ',', columns = daily_output_columns,
-                float_format = data.cet_out['daily_float_format'], 
-                date_format = data.cet_out['daily_date_format'])
+            if data.cet_out['data_structure_type'].upper() == 'DRI':
+                if print_header:
+                    daily_output_f.write('# {0:2d} - {1}\n'.format(crop.class_number, crop.name))
+            for chunk_start in range(
+                    0, max(len(daily_output_df.index), 1),
+                    data.output_chunk_days):
+                chunk_df = daily_output_df.iloc[
+                    chunk_start:chunk_start + data.output_chunk_days].copy()
+                chunk_df[year_field] = chunk_df.index.year
+                chunk_df[month_field] = chunk_df.index.month
+                chunk_df[day_field] = chunk_df.index.day
+
+                # This will convert negative "zeros" to positive
+
+                chunk_df[niwr_field] = np.round(chunk_df[niwr_field], 6)
+                if data.cet_out['data_structure_type'].upper() != 'DRI':
+                    chunk_df['Crop Num'] = crop.class_number
+                    chunk_df['Crop Name'] = crop.name
+                    chunk_df.reset_index(inplace = True)
+                mod_csv_output.write_csv(chunk_df, daily_output_f,
+                    header = print_header and chunk_start == 0,
+                    index = print_index, sep = ',', columns = daily_output_columns,
+                    float_format = data.cet_out['daily_float_format'], 
+                    date_format = data.cet_out['daily_date_format'],
+                    column_formats = daily_column_formats)
+                del chunk_df
         del daily_output_df, daily_output_path, daily_output_columns
 
     # Write monthly cet
 
-    if data.cet_out['monthly_output_flag']:
+    if data.cet_out['monthly_output_flag'] and not columnar_flag:
         monthly_output_df[year_field] = monthly_output_df.index.year
         monthly_output_df[month_field] = monthly_output_df.index.month
         
         # format date attributes if values are formatted
                     
+        monthly_column_formats = {cutting_field: ' %1d'}
         if data.cet_out['monthly_float_format'] is not None:
-            monthly_output_df[year_field] = monthly_output_df[year_field].map(lambda x: ' %4d' % x)
-            monthly_output_df[month_field] = monthly_output_df[month_field].map(lambda x: ' %2d' % x)
-            monthly_output_df[season_field] = monthly_output_df[season_field].map(lambda x: ' %2d' % x)
+            monthly_column_formats.update({
+                year_field: ' %4d', month_field: ' %2d', season_field: ' %2d'})
         if data.cet_out['data_structure_type'].upper() == 'DRI':
             monthly_output_path = os.path.join(data.cet_out['monthly_output_ws'], data.cet_out['name_format'].replace('%c', '%02d' % int(crop.class_number)) % et_cell.cell_id)
         else:    # RDB
             monthly_output_path = os.path.join(data.cet_out['monthly_output_ws'], data.cet_out['name_format'].replace('%c', '').replace('__', '_') % et_cell.cell_id)
+            if data.rdb_shard_ws is not None:
+                monthly_output_path = rdb_shard_path(
+                    data, 'monthly', et_cell.cell_id, crop.class_number)
             monthly_output_df['Crop Num'] = crop.class_number
             monthly_output_df['Crop Name'] = crop.name
         monthly_output_columns = base_columns + \
@@ -529,28 +1892,34 @@ def write_crop_output(crop_count, data, et_cell, crop, foo):
             runoff_field, dperc_field, niwr_field,
             season_field]
         if data.cutting_flag and crop.cutting_crop:
-            monthly_output_df[cutting_field] = monthly_output_df[cutting_field].map(
-                lambda x: ' %1d' % x)
             monthly_output_columns.append(cutting_field)
+        if update_flag:
+            trim_output_lines(monthly_output_path, np.sum(
+                monthly_output_df.index <= state_end_dt))
         with open(monthly_output_path, open_mode) as monthly_output_f:
-            if data.cet_out['data_structure_type'].upper() == 'DRI': 
-                monthly_output_f.write('# {0:2d} - {1}\n'.format(crop.class_number, crop.name))
+            if data.cet_out['data_structure_type'].upper() == 'DRI':
+                if print_header:
+                    monthly_output_f.write('# {0:2d} - {1}\n'.format(crop.class_number, crop.name))
             else:    # RDB
                 monthly_output_df.reset_index(inplace = True)
-            monthly_output_df.to_csv(monthly_output_f, header = print_header, 
+            mod_csv_output.write_csv(monthly_output_df, monthly_output_f, header = print_header, 
                 index = print_index, sep = ',', columns = monthly_output_columns,
-                float_format = data.cet_out['monthly_float_format'], date_format = data.cet_out['monthly_date_format'])
+                float_format = data.cet_out['monthly_float_format'], date_format = data.cet_out['monthly_date_format'],
+                column_formats = monthly_column_formats)
         del monthly_output_df, monthly_output_path, monthly_output_columns
 
     # Write annual cet
     
-    if data.cet_out['annual_output_flag']:
+    if data.cet_out['annual_output_flag'] and not columnar_flag:
         annual_output_df[year_field] = annual_output_df.index.year
-        annual_output_df[season_field] = annual_output_df[season_field].map(lambda x: ' %3d' % x)
+        annual_column_formats = {season_field: ' %3d', cutting_field: ' %2d'}
         if data.cet_out['data_structure_type'].upper() == 'DRI':
             annual_output_path = os.path.join(data.cet_out['annual_output_ws'], data.cet_out['name_format'].replace('%c', '%02d' % int(crop.class_number)) % et_cell.cell_id)
         else:    # RDB
             annual_output_path = os.path.join(data.cet_out['annual_output_ws'], data.cet_out['name_format'].replace('%c', '').replace('__', '_') % et_cell.cell_id)
+            if data.rdb_shard_ws is not None:
+                annual_output_path = rdb_shard_path(
+                    data, 'annual', et_cell.cell_id, crop.class_number)
             annual_output_df['Crop Num'] = crop.class_number
             annual_output_df['Crop Name'] = crop.name
         annual_output_columns = base_columns + \
@@ -560,35 +1929,31 @@ def write_crop_output(crop_count, data, et_cell, crop, foo):
         try: annual_output_columns.remove('Date')
         except: pass
         if data.cutting_flag and crop.cutting_crop:
-            annual_output_df[cutting_field] = annual_output_df[cutting_field].map(
-                lambda x: ' %2d' % x)
             annual_output_columns.append(cutting_field)
+        if update_flag:
+            trim_output_lines(annual_output_path, np.sum(
+                annual_output_df.index <= state_end_dt))
         with open(annual_output_path, open_mode) as annual_output_f:
-            if data.cet_out['data_structure_type'].upper() == 'DRI': 
-                annual_output_f.write('# {0:2d} - {1}\n'.format(crop.class_number, crop.name))
+            if data.cet_out['data_structure_type'].upper() == 'DRI':
+                if print_header:
+                    annual_output_f.write('# {0:2d} - {1}\n'.format(crop.class_number, crop.name))
             else:    # RDB
                 annual_output_df.reset_index(inplace = True)
-            annual_output_df.to_csv(annual_output_f, header = print_header, 
+            mod_csv_output.write_csv(annual_output_df, annual_output_f, header = print_header, 
                 index = False, sep = ',', columns = annual_output_columns,
-                float_format = data.cet_out['annual_float_format'], date_format = data.cet_out['annual_date_format'])
+                float_format = data.cet_out['annual_float_format'], date_format = data.cet_out['annual_date_format'],
+                column_formats = annual_column_formats)
         del annual_output_df, annual_output_path, annual_output_columns
 
     # Write growing season statistics
     
     if data.gs_output_flag:
-        def doy_2_date(test_year, test_doy):
-            try:
-                return datetime.datetime.strptime(
-                    '{0}_{1}'.format(int(test_year),
-                    int(test_doy)), '%Y_%j').date().isoformat()
-            except:
-                return 'None'
-        gs_output_df[gs_start_date_field] = gs_output_df[
-            [year_field, gs_start_doy_field]].apply(
-                lambda s: doy_2_date(*s), axis=1)
-        gs_output_df[gs_end_date_field] = gs_output_df[
-            [year_field, gs_end_doy_field]].apply(
-                lambda s: doy_2_date(*s), axis=1)
+        gs_output_df[gs_start_date_field] = doy_dates(
+            gs_output_df[year_field].values,
+            gs_output_df[gs_start_doy_field].values)
+        gs_output_df[gs_end_date_field] = doy_dates(
+            gs_output_df[year_field].values,
+            gs_output_df[gs_end_doy_field].values)
         if data.gs_name_format is None:
             # default filename spec
 
@@ -603,11 +1968,27 @@ def write_crop_output(crop_count, data, et_cell, crop, foo):
         gs_output_columns = [
             year_field, gs_start_doy_field, gs_end_doy_field,
             gs_start_date_field, gs_end_date_field, gs_length_field]
+
+        # Mean dates of update mode also cover years of existing output
+        # (3 comment lines and column names precede yearly rows)
+
+        gs_doy_df = gs_output_df
+        if update_flag:
+            with open(gs_output_path, 'r') as gs_output_f:
+                gs_lines = gs_output_f.readlines()
+            gs_keep_count = len(gs_lines) - np.sum(
+                gs_output_df.index <= state_end_dt)
+            gs_doy_df = pd.concat([
+                pd.read_csv(
+                    gs_output_path, header=0, comment='#', sep=',',
+                    usecols=[gs_start_doy_field, gs_end_doy_field],
+                    nrows=gs_keep_count - 4),
+                gs_output_df[[gs_start_doy_field, gs_end_doy_field]]])
         with open(gs_output_path, 'w') as gs_output_f:
             gs_output_f.write(
                 '# {0:2d} - {1}\n'.format(crop.class_number, crop.name))
-            gs_start_doy = int(round(gs_output_df[gs_start_doy_field].mean()))
-            gs_end_doy = int(round(gs_output_df[gs_end_doy_field].mean()))
+            gs_start_doy = int(round(gs_doy_df[gs_start_doy_field].mean()))
+            gs_end_doy = int(round(gs_doy_df[gs_end_doy_field].mean()))
             gs_start_dt = datetime.datetime.strptime(
                 '2001_{:03d}'. format(gs_start_doy), '%Y_%j')
             gs_end_dt = datetime.datetime.strptime(
@@ -618,9 +1999,11 @@ def write_crop_output(crop_count, data, et_cell, crop, foo):
             gs_output_f.write(
                 '# Mean End Date:   {dt.month}/{dt.day}  ({doy})\n'.format(
                     dt=gs_end_dt, doy = gs_end_doy))
+            if update_flag:
+                gs_output_f.writelines(gs_lines[3:gs_keep_count])
             gs_output_df.to_csv(
                 gs_output_f, sep = ',', columns = gs_output_columns,
-                date_format = '%Y', index = False)
+                date_format = '%Y', index = False, header = not update_flag)
         del gs_output_df, gs_output_path, gs_output_columns
 
 if __name__ == '__main__':
@@ -9,7 +9,9 @@ import sys
 import numpy as np
 import pandas as pd
 
+import columnar_output
 import crop_coefficients
+import crop_et_lanes
 import crop_parameters
 import util
 
@@ -591,6 +593,11 @@ class CropETData():
         except:
             logging.debug('    growing_season_stats_flag = False')
             self.gs_output_flag = False
+        try:
+            self.cube_output_flag = config.getboolean(crop_et_sec, 'cube_output_flag')
+        except:
+            logging.debug('    cube_output_flag = False')
+            self.cube_output_flag = False
 
         #  Allow user to only run annual or perennial crops
         
@@ -681,6 +688,22 @@ class CropETData():
             except:
                 logging.debug('    gs_output_folder = growing_season_stats')
                 self.gs_output_ws = 'growing_season_stats'
+        if self.cube_output_flag:
+            try:
+                self.cube_output_ws = os.path.join(
+                    self.project_ws, config.get(crop_et_sec, 'cube_output_folder'))
+            except:
+                logging.debug('    cube_output_folder = cube')
+                self.cube_output_ws = os.path.join(self.project_ws, 'cube')
+            if not os.path.isdir(self.cube_output_ws):
+                os.makedirs(self.cube_output_ws)
+
+            # Day axis of results cube is set from start and end dates
+
+            if self.start_dt is None or self.end_dt is None:
+                logging.error(
+                    '\nERROR: start_date and end_date must be set for cube output')
+                sys.exit()
 
         # cet file type specifications
         
@@ -696,16 +719,32 @@ class CropETData():
                 self.cet_out['data_structure_type'] = "DRI"
         except:
             self.cet_out['data_structure_type'] = "DRI"
+        if self.cet_out['data_structure_type'] not in (
+                ['DRI', 'RDB'] + columnar_output.structure_types):
+            logging.error(
+                '\nERROR: Unsupported data_structure_type {}'.format(
+                    self.cet_out['data_structure_type']))
+            sys.exit()
+        if not columnar_output.check_module(self.cet_out['data_structure_type']):
+            sys.exit()
         try:
             self.cet_out['name_format'] = config.get(crop_et_sec, 'name_format')
             if self.cet_out['name_format'] is None or self.cet_out['name_format'] == 'None':
                 if self.cet_out['data_structure_type'] == "DRI":
                     self.cet_out['name_format'] = '%s_crop_%c.csv'
+                elif self.cet_out['data_structure_type'] == "PARQUET":
+                    self.cet_out['name_format'] = '%s_crop_%c.parquet'
+                elif self.cet_out['data_structure_type'] == "HDF5":
+                    self.cet_out['name_format'] = '%s_crop_%c.h5'
                 else:    # RDB format
                     self.cet_out['name_format'] = '%s_crop.csv'
         except:
             if self.cet_out['data_structure_type'] == "DRI":
                 self.cet_out['name_format'] = '%s_crop_%c.csv'
+            elif self.cet_out['data_structure_type'] == "PARQUET":
+                self.cet_out['name_format'] = '%s_crop_%c.parquet'
+            elif self.cet_out['data_structure_type'] == "HDF5":
+                self.cet_out['name_format'] = '%s_crop_%c.h5'
             else:    # RDB format
                 self.cet_out['name_format'] = '%s_crop.csv'
         try:
@@ -732,12 +771,17 @@ class CropETData():
         # pick up user growing season file specifications
         
         if self.gs_output_flag:
+            # growing season stats of columnar output are written as csv
+
+            gs_base_format = self.cet_out['name_format']
+            if self.cet_out['data_structure_type'] in columnar_output.structure_types:
+                gs_base_format = os.path.splitext(gs_base_format)[0] + '.csv'
             try:
                 self.gs_name_format = config.get(crop_et_sec, 'gs_name_format')
                 if self.gs_name_format is None or self.gs_name_format == 'None':
-                    self.gs_name_format = self.cet_out['name_format'].replace('%s', '%s_gs')
+                    self.gs_name_format = gs_base_format.replace('%s', '%s_gs')
             except:
-                self.gs_name_format = self.cet_out['name_format'].replace('%s', '%s_gs')
+                self.gs_name_format = gs_base_format.replace('%s', '%s_gs')
             if '%c' not in self.gs_name_format:
                 # cet is RDB format - need to add crop for gs
                 
@@ -785,6 +829,105 @@ class CropETData():
         except:
             self.co2_flag = False
 
+        # Daily loop engine
+        # 'dataframe' (default) indexes climate and output data frames by date
+        # 'array' indexes per cell climate arrays by integer day
+        # 'cell_batch' advances each crop for a batch of cells in one day loop
+        # 'lockstep' advances all crops of a cell as vector lanes in one day loop
+
+        try:
+            self.day_loop_engine = config.get(
+                crop_et_sec, 'day_loop_engine').lower()
+        except:
+            self.day_loop_engine = 'dataframe'
+        if self.day_loop_engine not in [
+                'dataframe', 'array', 'cell_batch', 'lockstep']:
+            logging.error(
+                '\nERROR: day_loop_engine {} is not supported\n'.format(
+                    self.day_loop_engine))
+            sys.exit()
+        try:
+            self.cell_batch_size = config.getint(crop_et_sec, 'cell_batch_size')
+        except:
+            self.cell_batch_size = 100
+        self.cell_batch_size = max(self.cell_batch_size, 1)
+
+        # Compile vector day loop of lockstep and cell_batch engines with numba
+
+        try:
+            self.kernel_flag = config.getboolean(crop_et_sec, 'kernel_flag')
+        except:
+            self.kernel_flag = False
+        if self.kernel_flag and crop_et_lanes.numba is None:
+            logging.warning(
+                '  Numba is not installed, vector day loop will run with NumPy')
+        elif self.kernel_flag and self.day_loop_engine not in [
+                'cell_batch', 'lockstep']:
+            logging.warning(
+                '  kernel_flag only applies to cell_batch and lockstep engines')
+
+        # Number of days of daily output formatted and written at a time
+
+        try:
+            self.output_chunk_days = config.getint(crop_et_sec, 'output_chunk_days')
+        except:
+            self.output_chunk_days = 3660
+        self.output_chunk_days = max(self.output_chunk_days, 1)
+
+        # Number of cells whose input is read ahead while a cell is computed
+        # 0 (default) reads input of each cell just before it is computed
+
+        try:
+            self.prefetch_depth = config.getint(crop_et_sec, 'prefetch_depth')
+        except:
+            self.prefetch_depth = 0
+        self.prefetch_depth = max(self.prefetch_depth, 0)
+
+        # Scratch folder for temporary files shared by multiprocessing workers
+        # Default is system temporary folder
+
+        try:
+            self.scratch_ws = config.get(crop_et_sec, 'scratch_folder')
+            if self.scratch_ws == 'None' or self.scratch_ws == '':
+                self.scratch_ws = None
+        except:
+            self.scratch_ws = None
+        if self.scratch_ws is not None:
+            self.scratch_ws = os.path.join(self.project_ws, self.scratch_ws)
+            if not os.path.isdir(self.scratch_ws):
+                os.makedirs(self.scratch_ws)
+
+        # Persistent cache of processed input time series in project folder
+        # Cache size limit is in MB, least recently used entries are removed
+
+        try:
+            self.input_cache_flag = config.getboolean(crop_et_sec, 'input_cache_flag')
+        except:
+            self.input_cache_flag = False
+        try:
+            self.input_cache_size = config.getfloat(crop_et_sec, 'input_cache_size')
+        except:
+            self.input_cache_size = 1024.
+
+        # Folder of per crop RDB shards written by multiprocessing workers
+        # Set by mod_crop_et for multiprocessing runs with RDB output
+
+        self.rdb_shard_ws = None
+
+        # Folder for end of period crop states used by daily update mode
+        # Default is no crop states are saved
+
+        try:
+            self.state_ws = config.get(crop_et_sec, 'state_folder')
+            if self.state_ws == 'None' or self.state_ws == '':
+                self.state_ws = None
+        except:
+            self.state_ws = None
+        if self.state_ws is not None:
+            self.state_ws = os.path.join(self.project_ws, self.state_ws)
+            if not os.path.isdir(self.state_ws):
+                os.makedirs(self.state_ws)
+
         # Spatially varying calibration
         
         try: self.spatial_cal_flag = config.getboolean(crop_et_sec, 'spatial_cal_flag')
@@ -0,0 +1,1220 @@
+import collections
+import datetime
+import types
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+from initialize_crop_cycle import crop_cycle_dtype
+
+# Lanes are cell/crop pairs that are advanced together through one daily
+#   time loop.  State of each lane is one element of crop_cycle_dtype (foo)
+#   and day_data_dtype (foo_day) record arrays, and the daily step below
+#   reads and writes whole fields of those arrays with masked vector
+#   operations that mirror compute_crop_gdd(), calculate_height(),
+#   kcb_daily(), compute_crop_et(), runoff() and grow_root().
+# Python max() and min() semantics, operation order and integer casts
+#   of the scalar code are kept so lanes reproduce it value for value.
+# Functions only use NumPy operations that numba can compile, see
+#   lane_day_loop_kernel at end of module.
+
+# Crop cycle state fields of lanes, kc_bas_wscc is constant and is a lane parameter
+
+lane_state_fields = [
+    field for field in crop_cycle_dtype.names if field != 'kc_bas_wscc']
+LaneState = collections.namedtuple('LaneState', lane_state_fields)
+
+# Daily data fields of lanes (see crop_cycle.day_data_dtype)
+
+LaneDay = collections.namedtuple('LaneDay', [
+    'sdays', 'doy_prev', 'doy', 'year', 'month', 'day', 'tdew', 'u2',
+    'precip', 'rh_min', 'etref', 'snow_depth', 'tmean', 'tmin', 'tmax',
+    't30', 'co2', 'etref_array'])
+
+# Crop and cell parameters of lanes, see lane_params()
+
+LaneParams = collections.namedtuple('LaneParams', [
+    'clim_col', 'temp_col', 'co2_col', 'curve_row', 'class_number',
+    'curve_number', 'curve_type', 'pl_gu_flag', 'gdd_trigger_doy',
+    't30_for_pl_or_gu_or_cgdd', 'date_of_pl_or_gu', 'date_of_pl_or_gu_int',
+    'doy_of_pl_or_gu', 'doy_of_pl_or_gu_leap', 'cgdd_for_efc',
+    'cgdd_for_termination', 'time_for_efc', 'time_for_harvest',
+    'cutting_crop', 'killing_frost_temperature', 'alfalfa', 'cutting_limit',
+    'crop_one', 'crop_one_reducer', 'cold_discount', 'frost_crop',
+    'frost_log', 'cover', 'water', 'water_kc', 'co2_crop', 'kc_max',
+    'cover_fc', 'winter_kc_max', 'winter_kc_flag', 'kc_bas_wscc',
+    'invoke_stress', 'days_after_planting_irrigation', 'height_initial',
+    'height_max', 'rooting_depth_initial', 'rooting_depth_max',
+    'end_of_root_growth_fraction_time', 'winter_crop', 'tbase',
+    'dormant_kc_bas', 'dormant_fc', 'dormant_wscc', 'cn2_dormant',
+    'cn2_dormant_flag'])
+
+# Stacked day x column climate arrays
+# Columns are cells, except temperatures (cell * 2 + 1 for historic
+#   temperatures) and CO2 correction factors (lane)
+
+LaneClimate = collections.namedtuple('LaneClimate', [
+    'tdew', 'u2', 'precip', 'rh_min', 'etref', 'snow_depth', 'tmean',
+    'tmin', 'tmax', 't30', 'co2'])
+
+# Dates shared by all lanes
+
+LaneCalendar = collections.namedtuple('LaneCalendar', [
+    'doy', 'year', 'month', 'day'])
+
+# Lane x day output arrays
+
+LaneOutput = collections.namedtuple('LaneOutput', [
+    'et_act', 'et_pot', 'et_bas', 'kc_act', 'kc_bas', 'irrigation',
+    'runoff', 'dperc', 'niwr', 'season', 'cutting'])
+
+# Lane events logged after day loop (bit flags of lane x day events array)
+
+killing_frost_event = 1
+no_killing_frost_event = 2
+kc_mult_event = 4
+ks_event = 8
+
+# Day loop status codes (status array is code, lane, day)
+
+season_length_error = 1
+dormant_root_error = 2
+depl_ze_error = 3
+depl_zep_error = 4
+setup_crop_error = 5
+
+# Number of values of each crop coefficient curve
+
+curve_size = 35
+
+# Day loop error messages by status code, formatted with crop number and date
+
+status_messages = {
+    season_length_error: (
+        'kc_daily.kcb_daily(): Problem with estimated season ' +
+        'length, crop_curve_type_4, crop {}'),
+    dormant_root_error: (
+        '\nERROR: Root zone of crop {} is not deeper than dormant ' +
+        'root zone on {}'),
+    depl_ze_error: (
+        'Problem in keeping depl_ze water balance within TEW ' +
+        'for crop {} on {}'),
+    depl_zep_error: (
+        'Problem in keeping De water balance within TEW ' +
+        'for crop {} on {}'),
+    setup_crop_error: (
+        '\nERROR: Initial rooting depth of crop {} must be ' +
+        'greater than zero ({})')}
+
+# Kc_max of winter time land use by winter surface cover class and reference type
+
+winter_kc_max = {
+    1: {'eto': 1.1, 'etr': 0.9}, 2: {'eto': 1.0, 'etr': 0.85},
+    3: {'eto': 0.95, 'etr': 0.8}}
+
+# Kcb of open water evaporation "crops" by class and reference type
+#   (open_water_evap() always falls back to 0.4 for class 56)
+
+open_water_kc = {
+    55: {'eto': 1.05, 'etr': 0.6}, 56: {'eto': 0.4, 'etr': 0.4},
+    57: {'eto': 0.85, 'etr': 0.7}}
+
+def py_max(a, b):
+    """Element-wise max(a, b) that returns a unless b > a"""
+    return np.where(b > a, b, a)
+
+def py_min(a, b):
+    """Element-wise min(a, b) that returns a unless b < a"""
+    return np.where(b < a, b, a)
+
+def put(field, mask, value):
+    """Set field of lanes in mask to value"""
+    field[:] = np.where(mask, value, field)
+
+def curve_value(curves, row, index, mask):
+    """Crop coefficient of curve row at integer index for lanes in mask"""
+    return curves[np.where(mask, row * curve_size + index, 0)]
+
+def curve_interp(curves, row, index, x, mask):
+    """Interpolate crop coefficient curve rows at x for lanes in mask
+
+    Args:
+        curves (): flattened crop coefficient curves
+        row (): curve row of each lane
+        index (): integer part of x
+        x (): position in tenths of curve
+        mask (): lanes to interpolate
+
+    Returns:
+        NumPy array
+    """
+    kc0 = curve_value(curves, row, index, mask)
+    kc1 = curve_value(curves, row, index + 1, mask)
+    return kc0 + (x - index) * (kc1 - kc0)
+
+def setup_crop(s, p, mask, status):
+    """Initialize lanes in mask for beginning of crop season
+
+    See InitializeCropCycle.setup_crop()
+    """
+    zr_dormant = 0.0
+    put(s.height_min, mask, p.height_initial)
+    put(s.height_max, mask, p.height_max)
+    put(s.zr_min, mask, p.rooting_depth_initial)
+    put(s.zr_max, mask, p.rooting_depth_max)
+    put(s.height, mask, s.height_min)
+    put(s.tew, mask, s.tew2)
+    put(s.tew, mask & (s.tew < s.tew3), s.tew3)
+    put(s.fw_irr, mask, s.fw_std)
+    put(s.irr_auto, mask, 0.0)
+    put(s.irr_sim, mask, 0.0)
+    daw3 = s.aw3 * (s.zr_max - zr_dormant)
+    taw3 = s.aw * (s.zr_max - zr_dormant)
+    daw3 = py_max(0.0, daw3)
+    taw3 = py_max(0.0, taw3)
+    deep = mask & (s.zr_min > zr_dormant)
+
+    # Scalar code divides by zr_dormant of 0 when roots start at surface
+
+    if (mask & ~deep & (s.zr_max > s.zr_min)).any():
+        status[0] = setup_crop_error
+        status[1] = np.argmax(mask & ~deep & (s.zr_max > s.zr_min))
+        return
+    put(s.depl_root, deep, (
+        s.depl_root + (taw3 - daw3) *
+        (s.zr_min - zr_dormant) / (s.zr_max - zr_dormant)))
+    put(s.depl_root, mask & (s.depl_root < 0.), 0.)
+    put(s.zr, mask, s.zr_min)
+    s.crop_setup_flag[:] = s.crop_setup_flag & ~mask
+
+def setup_dormant(s, p, mask, status):
+    """Set lanes in mask up for dormant season
+
+    See InitializeCropCycle.setup_dormant()
+    """
+    put(s.kc_bas, mask & p.dormant_wscc, p.dormant_kc_bas)
+    put(s.fc, mask & p.dormant_wscc, p.dormant_fc)
+    put(s.cn2, mask & p.cn2_dormant_flag, p.cn2_dormant)
+    zr_dormant = 0.1
+    daw3 = s.aw3 * (s.zr_max - s.zr)
+    taw_root = s.aw * (s.zr)
+    daw_root = py_max(taw_root - s.depl_root, 0.0)
+    ze = 0.1
+
+    # Water in dormant root zone is undefined in scalar code
+    #   when roots are not below dormant root depth
+
+    if (mask & ~(zr_dormant < s.zr)).any():
+        status[0] = dormant_root_error
+        status[1] = np.argmax(mask & ~(zr_dormant < s.zr))
+        return
+    aw_root = daw_root / s.zr
+    totwatinzr_dormant = (
+        (s.totwatin_ze * (1 - (ze - zr_dormant) / ze)) * (1 - s.fc) +
+        aw_root * zr_dormant * s.fc)
+    daw_below = np.where(
+        daw_root > totwatinzr_dormant, daw_root - totwatinzr_dormant, 0.0)
+    put(s.aw3, mask, (daw_below + daw3) / (s.zr_max - zr_dormant))
+    put(s.depl_root, mask, s.aw * zr_dormant - totwatinzr_dormant)
+    put(s.zr, mask, zr_dormant)
+    put(s.fw_irr, mask, s.fw_std)
+    put(s.irr_auto, mask, 0.0)
+    put(s.irr_sim, mask, 0.0)
+    s.dormant_setup_flag[:] = s.dormant_setup_flag & ~mask
+    put(s.cutting, mask, 0)
+
+def compute_crop_gdd(s, d, p):
+    """Compute crop growing degree days of lanes
+
+    See compute_crop_gdd.compute_crop_gdd()
+    """
+    # Calculate 30 day ETref
+
+    full = d.sdays > 30
+    etref_lost = np.where(full, d.etref_array[:, 0], 0.0)
+    if full.all():
+        d.etref_array[:, :29] = d.etref_array[:, 1:].copy()
+        d.etref_array[:, 29] = d.etref
+    else:
+        for j in range(full.shape[0]):
+            if full[j]:
+                d.etref_array[j, :29] = d.etref_array[j, 1:].copy()
+                d.etref_array[j, 29] = d.etref[j]
+            else:
+                d.etref_array[j, d.sdays[j] - 1] = d.etref[j]
+    s.etref_30[:] = np.where(
+        full, s.etref_30 + (d.etref - etref_lost) / 30.,
+        (s.etref_30 * (d.sdays - 1) + d.etref) / d.sdays)
+
+    # Reset CGDD if new year
+
+    reset = (
+        (p.winter_crop & (d.doy_prev < p.gdd_trigger_doy) &
+         (d.doy >= p.gdd_trigger_doy)) |
+        (~p.winter_crop & (d.doy_prev > (p.gdd_trigger_doy + 199)) &
+         (d.doy < (p.gdd_trigger_doy + 199))))
+    put(s.cgdd, reset, 0.0)
+    put(s.doy_start_cycle, reset, 0)
+    s.real_start[:] = s.real_start & ~reset
+    s.in_season[:] = s.in_season & ~reset
+    d.doy_prev[:] = d.doy
+
+    # Calculate CGDD since trigger date
+
+    crop = p.curve_number > 0
+    winter = crop & p.winter_crop
+    corn = crop & ~p.winter_crop & (p.tbase < 0)
+    simple = crop & ~p.winter_crop & ~(p.tbase < 0) & (d.tmean > p.tbase)
+
+    # Winter wheat or winter grain
+
+    gdd = np.where(
+        d.tmin < -4.0, 0.0,
+        np.where(d.tmean > p.tbase, d.tmean - p.tbase, 0.0))
+    gdd = gdd - s.gdd_penalty
+    gdd = py_max(gdd, 0.0)
+    cgdd = s.cgdd + (gdd - s.cgdd_penalty)
+    cgdd = py_max(0.0, cgdd)
+    put(s.gdd, winter, gdd)
+    put(s.cgdd, winter, cgdd)
+    put(s.gdd_penalty, winter, np.where(d.tmin < -10, 5.0, 0.0))
+    put(s.cgdd_penalty, winter, np.where(
+        (d.tmin < -25) & (d.snow_depth <= 0), s.cgdd * 0.1, 0.0))
+
+    # Corn
+
+    tmax_prev = np.where(d.tmax > 30, 30.0, d.tmax)
+    tmin_prev = np.where(d.tmin > 30, 30.0, d.tmin)
+    tmax_prev = np.where(d.tmax < -p.tbase, -p.tbase, tmax_prev)
+    tmin_prev = np.where(d.tmin < -p.tbase, -p.tbase, tmin_prev)
+    tmean_prev = 0.5 * (tmax_prev + tmin_prev)
+    put(s.cgdd, corn, s.cgdd + (tmean_prev + p.tbase))
+
+    # Simple method for all other crops
+
+    put(s.gdd, simple, d.tmean - p.tbase)
+    put(s.cgdd, simple, s.cgdd + s.gdd)
+
+def calculate_height(s, p):
+    """Determine height of lanes based on Kc and height limits
+
+    See calculate_height.calculate_height()
+    """
+    height_prev = s.height.copy()
+    height = np.where(
+        (s.kc_bas > s.kc_min) & (s.kc_bas_mid > s.kc_min),
+        p.height_initial + (s.kc_bas - s.kc_min) / (s.kc_bas_mid - s.kc_min) *
+        (p.height_max - p.height_initial),
+        p.height_initial)
+    s.height[:] = py_min(
+        py_max(p.height_initial, py_max(height_prev, height)), p.height_max)
+
+def kcb_daily(s, d, p, curves, lentry, eto, status, events, i):
+    """Compute basal crop coefficient of lanes
+
+    See kcb_daily.kcb_daily()
+    """
+    curve_number = p.curve_number.copy()
+    doy = d.doy
+    late_start = doy < (p.gdd_trigger_doy + 195)
+
+    # Flag_for_means_to_estimate_pl_or_gu Case 1 (cgdd) and Case 2 (t30)
+
+    flag_12 = ((p.pl_gu_flag == 1) | (p.pl_gu_flag == 2)) & late_start
+    late = (
+        flag_12 & (s.longterm_pl > 0) & (doy > (s.longterm_pl + 40)) &
+        ~s.real_start)
+    put(s.doy_start_cycle, late, doy)
+    s.real_start[:] = s.real_start | late
+    found = flag_12 & ~s.real_start & (
+        ((p.pl_gu_flag == 1) & (s.cgdd > p.t30_for_pl_or_gu_or_cgdd)) |
+        ((p.pl_gu_flag == 2) & (d.t30 > p.t30_for_pl_or_gu_or_cgdd)))
+    early = found & (s.longterm_pl > 0) & (doy < (s.longterm_pl - 40))
+    put(s.doy_start_cycle, early, s.longterm_pl - 40)
+    put(s.doy_start_cycle, early & (s.doy_start_cycle < 1),
+        s.doy_start_cycle + 365)
+    put(s.doy_start_cycle, found & ~early, doy)
+    s.real_start[:] = s.real_start | (found & ~early)
+    start_12 = flag_12 & (doy == s.doy_start_cycle)
+
+    # Flag_for_means_to_estimate_pl_or_gu Case 3 (planting or greenup day of year)
+
+    doy_of_pl_or_gu = np.where(
+        leap_year(d.year), p.doy_of_pl_or_gu_leap, p.doy_of_pl_or_gu)
+    start_3 = (p.pl_gu_flag == 3) & (
+        (doy == doy_of_pl_or_gu) |
+        ((d.sdays == 1) & (doy_of_pl_or_gu >= p.gdd_trigger_doy)))
+    put(s.doy_start_cycle, start_3, doy_of_pl_or_gu)
+
+    # Start of season
+
+    start = start_12 | start_3
+    s.real_start[:] = s.real_start | start_12
+    s.in_season[:] = s.in_season | start
+    s.stress_event[:] = s.stress_event & ~start
+    s.dormant_setup_flag[:] = s.dormant_setup_flag | start
+    if start.any():
+        setup_crop(s, p, start, status)
+        if status[0]:
+            return
+    put(s.cycle, start_12, 1)
+
+    # Some range grasses require backing up 10 days
+    # Case 2 backs start up twice as in scalar code
+
+    back = start_12 & (p.date_of_pl_or_gu < 0.0)
+    for back_count in range(2):
+        put(s.doy_start_cycle, back, s.doy_start_cycle + p.date_of_pl_or_gu_int)
+        put(s.doy_start_cycle, back & (s.doy_start_cycle < 1),
+            s.doy_start_cycle + 365)
+        back = back & (p.pl_gu_flag == 2)
+
+    # Flag_for_means_to_estimate_pl_or_gu Case 4 (on alltime)
+
+    flag_4 = p.pl_gu_flag == 4
+    s.in_season[:] = s.in_season | flag_4
+    s.stress_event[:] = s.stress_event & ~(flag_4 & (doy == p.gdd_trigger_doy))
+    s.dormant_setup_flag[:] = s.dormant_setup_flag | flag_4
+
+    # Set MAD to MADmid universally at start
+
+    s.mad[:] = s.mad_mid
+    in_season = s.in_season.copy()
+    max_index = s.max_lines_in_crop_curve_table - 1
+
+    # crop.curve_type Case 1 (NcumGDD)
+
+    type_1 = in_season & (p.curve_type == 1)
+    put(s.cgdd_at_planting, type_1 & (s.doy_start_cycle == doy), s.cgdd)
+    cgdd_in_season = py_max(0.0, s.cgdd - s.cgdd_at_planting)
+    put(s.cutting, type_1, 0)
+
+    # Special case for ALFALFA hay (typical, beef or dairy)
+
+    alfalfa = type_1 & p.alfalfa
+    next_cycle = alfalfa & (s.cycle > 1)
+    cgdd_efc = np.where(next_cycle, p.cgdd_for_termination, p.cgdd_for_efc)
+    cgdd_term = np.where(
+        next_cycle, p.cgdd_for_termination,
+        np.where(alfalfa, p.cgdd_for_efc, p.cgdd_for_termination))
+    curve_number = np.where(
+        next_cycle,
+        np.where(s.cycle < p.cutting_limit, p.curve_number + 1,
+                 p.curve_number + 2),
+        curve_number)
+    curve_row = p.curve_row + curve_number
+    before_efc = type_1 & (cgdd_in_season < cgdd_efc)
+    after_efc = type_1 & ~(cgdd_in_season < cgdd_efc)
+
+    # Function is same as for < EFC until cumGDD for termination
+
+    mid = after_efc & (cgdd_in_season < cgdd_term)
+    n_cgdd = cgdd_in_season / cgdd_efc
+    put(s.n_cgdd, before_efc, n_cgdd)
+    put(s.n_cgdd, mid, py_max(n_cgdd, 1.0))
+    int_cgdd = py_min(max_index, (s.n_cgdd * 10).astype(np.int64))
+    put(s.kc_bas, before_efc, curve_interp(
+        curves, curve_row, int_cgdd, s.n_cgdd * 10, before_efc))
+    put(s.mad, before_efc, s.mad_ini)
+    mid_lentry = lentry[np.where(mid, curve_row, 0)]
+    put(s.kc_bas, mid & (int_cgdd < mid_lentry), curve_interp(
+        curves, curve_row, int_cgdd, s.n_cgdd * 10,
+        mid & (int_cgdd < mid_lentry)))
+    put(s.kc_bas, mid & ~(int_cgdd < mid_lentry), curve_value(
+        curves, curve_row, mid_lentry, mid & ~(int_cgdd < mid_lentry)))
+
+    # End of season by exceeding cumGDD for termination
+
+    end = after_efc & ~(cgdd_in_season < cgdd_term)
+    s.in_season[:] = s.in_season & ~end
+    s.stress_event[:] = s.stress_event & ~end
+    cut = end & p.cutting_crop
+    put(s.cutting, cut, 1)
+    put(s.cycle, cut, s.cycle + 1)
+    s.in_season[:] = s.in_season | cut
+    put(s.cgdd_at_planting, cut, s.cgdd)
+    put(s.height, cut, s.height_min)
+    put(s.kc_bas, cut, curve_value(curves, curve_row, 0, cut))
+
+    # First alfalfa crop (typical production alfalfa) where kcb is reduced
+
+    put(s.kc_bas, after_efc & p.crop_one, s.kc_bas * p.crop_one_reducer)
+
+    # Total length limit (used for spring grain)
+
+    days_into_season = doy - s.doy_start_cycle + 1
+    days_into_season = np.where(
+        days_into_season < 1, days_into_season + 365, days_into_season)
+    harvest = type_1 & (p.time_for_harvest > 10) & (
+        days_into_season > p.time_for_harvest)
+    s.in_season[:] = s.in_season & ~harvest
+    s.stress_event[:] = s.stress_event & ~harvest
+
+    # crop.curve_type Case 2 (%PL-EC) and Case 3 (%PL-EC, daysafter)
+
+    curve_row = p.curve_row + p.curve_number
+    type_23 = in_season & ((p.curve_type == 2) | (p.curve_type == 3))
+    type_2 = in_season & (p.curve_type == 2)
+    type_3 = in_season & (p.curve_type == 3)
+    time_for_efc = py_max(p.time_for_efc, 1.)
+    put(s.n_pl_ec, type_23, days_into_season / time_for_efc)
+    int_pl_ec = py_min(max_index, (s.n_pl_ec * 10.).astype(np.int64))
+    extend = p.time_for_harvest < -0.5
+    kc_interp_2 = type_2 & (s.n_pl_ec * 100 <= np.abs(p.time_for_harvest))
+    put(s.mad, type_2 & (s.n_pl_ec < 1), s.mad_ini)
+    put(s.kc_bas, kc_interp_2, curve_interp(
+        curves, curve_row, int_pl_ec, s.n_pl_ec * 10., kc_interp_2))
+    put(s.kc_bas, type_2 & ~kc_interp_2 & extend, s.kc_bas_prev)
+    end = type_2 & ~kc_interp_2 & ~extend
+    s.in_season[:] = s.in_season & ~end
+    s.stress_event[:] = s.stress_event & ~end
+    before_efc = type_3 & (s.n_pl_ec < 1)
+    put(s.kc_bas, before_efc, curve_interp(
+        curves, curve_row, int_pl_ec, s.n_pl_ec * 10, before_efc))
+    put(s.mad, before_efc, s.mad_ini)
+    after_efc = type_3 & ~(s.n_pl_ec < 1)
+    days_after_efc = days_into_season - time_for_efc
+    kc_interp_3 = after_efc & (days_after_efc <= np.abs(p.time_for_harvest))
+    n_days_after_efc = days_after_efc / 10 + 11
+    int_days_after_efc = py_min(
+        n_days_after_efc.astype(np.int64), max_index)
+    put(s.kc_bas, kc_interp_3, curve_interp(
+        curves, curve_row, int_days_after_efc, n_days_after_efc, kc_interp_3))
+    put(s.kc_bas, after_efc & ~kc_interp_3 & extend, s.kc_bas_prev)
+    end = after_efc & ~kc_interp_3 & ~extend
+    s.in_season[:] = s.in_season & ~end
+    s.stress_event[:] = s.stress_event & ~end
+
+    # crop.curve_type Case 4 (%PL-Term)
+
+    type_4 = in_season & (p.curve_type == 4)
+    if (type_4 & ~(s.doy_start_cycle < (p.gdd_trigger_doy + 195))).any():
+        status[0] = season_length_error
+        status[1] = np.argmax(
+            type_4 & ~(s.doy_start_cycle < (p.gdd_trigger_doy + 195)))
+        return
+    length_of_season = 2 * (p.gdd_trigger_doy + 195 - s.doy_start_cycle)
+
+    # Put a minimum and maximum length on season for cheat grass
+
+    cheat_grass = p.class_number == 47
+    length_of_season = np.where(
+        cheat_grass, py_max(length_of_season, 60), length_of_season)
+    length_of_season = np.where(
+        cheat_grass & (length_of_season > 90), 100, length_of_season)
+    days_into_season = doy - s.doy_start_cycle
+    days_into_season = np.where(
+        days_into_season < 1, days_into_season + 365, days_into_season)
+    put(s.n_pl_ec, type_4,
+        days_into_season.astype(np.float64) / length_of_season)
+    put(s.mad, type_4 & (s.n_pl_ec < 0.5), s.mad_ini)
+    kc_interp_4 = type_4 & (s.n_pl_ec <= 1)
+    int_pl_ec = py_min(max_index, (s.n_pl_ec * 10).astype(np.int64))
+    put(s.kc_bas, kc_interp_4, curve_interp(
+        curves, curve_row, int_pl_ec, s.n_pl_ec * 10, kc_interp_4))
+    end = type_4 & ~kc_interp_4
+    s.in_season[:] = s.in_season & ~end
+    s.stress_event[:] = s.stress_event & ~end
+
+    # Discounting for cold shock to alfalfa, reset prior to August
+
+    fall = doy > (p.gdd_trigger_doy + 211)
+    discount = in_season & p.cold_discount
+    put(s.T2Days, discount & fall & (d.tmin < -3) & (s.T2Days < 1), 1)
+    put(s.T2Days, discount & ~fall, 0)
+    discount = discount & (s.T2Days > 0)
+    put(s.kc_bas, discount, s.kc_bas - s.T2Days * 0.005)
+    put(s.kc_bas, discount & (s.kc_bas < 0.1), 0.1)
+    put(s.T2Days, discount, s.T2Days + 1)
+
+    # Determine if killing frost to cut short - begin to check after August 1
+
+    frost = (
+        in_season & fall & (d.tmin < p.killing_frost_temperature) &
+        p.frost_crop & s.in_season)
+    no_frost = (
+        in_season & fall & ~frost & p.frost_log & s.in_season &
+        (d.month == 12) & (d.day == 31))
+    events[:, i] = events[:, i] | np.where(frost, killing_frost_event, 0)
+    events[:, i] = events[:, i] | np.where(no_frost, no_killing_frost_event, 0)
+    s.in_season[:] = s.in_season & ~frost
+    s.stress_event[:] = s.stress_event & ~frost
+
+    # Winter time kcb for bare soil, mulched soil and dormant turf
+
+    put(s.kc_bas, p.cover, 0.1)
+
+    # Open water evaporation "crops" have only kcb
+
+    put(s.kc_bas, p.water, p.water_kc)
+    put(s.kc_act, p.water, s.kc_bas)
+    put(s.kc_pot, p.water, s.kc_bas)
+    put(s.etc_act, p.water, s.kc_act * d.etref)
+    put(s.etc_pot, p.water, s.kc_pot * d.etref)
+    put(s.etc_bas, p.water, s.kc_bas * d.etref)
+
+    # Apply CO2 correction to all crops
+
+    put(s.kc_bas, p.co2_crop, s.kc_bas * d.co2)
+
+    # Save kcb value for use tomorrow in case curve needs to be extended until frost
+
+    s.kc_bas_prev[:] = s.kc_bas
+
+    # Limit crop height for numerical stability
+
+    s.height[:] = py_max(s.height, 0.05)
+    if eto:
+        s.kc_bas[:] = (
+            s.kc_bas + (0.04 * (d.u2 - 2) - 0.004 * (d.rh_min - 45)) *
+            np.power(s.height / 3, 0.3))
+
+def leap_year(year):
+    """Leap year flags of years"""
+    return ((year % 4 == 0) & (year % 100 != 0)) | (year % 400 == 0)
+
+def runoff(s, d, mask):
+    """Curve number method for computing runoff of lanes in mask
+
+    See runoff.runoff()
+    """
+    CNII = py_min(py_max(s.cn2, 10.0), 100.0)
+    CNI = CNII / (2.281 - 0.01281 * CNII)
+    CNIII = CNII / (0.427 + 0.00573 * CNII)
+    AWCIII = 0.5 * s.rew
+    AWCI = 0.7 * s.rew + 0.3 * s.tew
+    AWCI = np.where(AWCI <= AWCIII, AWCIII + 0.01, AWCI)
+    cn = np.where(
+        s.depl_surface < AWCIII, CNIII,
+        np.where(
+            s.depl_surface > AWCI, CNI,
+            ((s.depl_surface - AWCIII) * CNI +
+             (AWCI - s.depl_surface) * CNIII) / (AWCI - AWCIII)))
+    put(s.s, mask, 250 * (100 / cn - 1))
+
+    # Average conditions of prior four days when irrigations are scheduled
+
+    irr = mask & s.irr_flag
+    ppt_net4 = py_max(d.precip - 0.2 * s.s4, 0.0)
+    ppt_net3 = py_max(d.precip - 0.2 * s.s3, 0.0)
+    ppt_net2 = py_max(d.precip - 0.2 * s.s2, 0.0)
+    ppt_net1 = py_max(d.precip - 0.2 * s.s1, 0.0)
+    put(s.sro, irr, 0.25 * (
+        np.power(ppt_net4, 2) / (d.precip + 0.8 * s.s4) +
+        np.power(ppt_net3, 2) / (d.precip + 0.8 * s.s3) +
+        np.power(ppt_net2, 2) / (d.precip + 0.8 * s.s2) +
+        np.power(ppt_net1, 2) / (d.precip + 0.8 * s.s1)))
+    put(s.s4, irr, s.s3)
+    put(s.s3, irr, s.s2)
+    put(s.s2, irr, s.s1)
+    put(s.s1, irr, s.s)
+
+    # Non-irrigated runoff
+
+    ppt_net = py_max(d.precip - 0.2 * s.s, 0.0)
+    put(s.sro, mask & ~s.irr_flag, ppt_net * ppt_net / (d.precip + 0.8 * s.s))
+
+def grow_root(s, p, mask):
+    """Determine depth of root zone of lanes in mask
+
+    See grow_root.grow_root()
+    """
+    fractime = np.where(
+        (p.curve_type == 1) & (p.end_of_root_growth_fraction_time != 0.0),
+        s.n_cgdd / p.end_of_root_growth_fraction_time,
+        np.where(
+            (p.curve_type > 1) & (p.end_of_root_growth_fraction_time != 0.0),
+            s.n_pl_ec / p.end_of_root_growth_fraction_time, 0.0))
+    fractime = py_min(py_max(fractime, 0.0), 1.0)
+
+    # Borg and Grimes (1986) sigmoidal function
+
+    zr_prev = s.zr.copy()
+    put(s.zr, mask, (
+        (0.5 + 0.5 * np.sin(3.03 * fractime - 1.47)) *
+        (s.zr_max - s.zr_min) + s.zr_min))
+    delta_zr = s.zr - zr_prev
+    put(s.depl_root, mask & (delta_zr > 0),
+        s.depl_root + delta_zr * (s.aw - s.aw3))
+    put(s.zr, mask, py_max(s.zr, zr_prev))
+
+def compute_crop_et(s, d, p, eto, status, events, i):
+    """Crop ET computations of lanes
+
+    See compute_crop_et.compute_crop_et(), open water lanes are skipped
+    """
+    crop = ~p.water
+
+    # Maximum Kc when soil is wet
+
+    put(s.height, crop, py_max(0.05, s.height))
+    if eto:
+        kc_max = (
+            (0.04 * (d.u2 - 2) - 0.004 * (d.rh_min - 45)) *
+            np.power(s.height / 3, 0.3))
+        kc_max = kc_max + np.where(p.kc_max > 0.3, p.kc_max, 1.2)
+    else:
+        kc_max = np.where(p.kc_max > 0.3, p.kc_max, 1.0)
+
+    # Fraction of ground covered and Kc_max of winter cover types
+
+    put(s.fc, crop & p.cover, p.cover_fc)
+    winter = (d.month < 4) | (d.month > 10)
+    kc_max = np.where(winter & p.winter_kc_flag, p.winter_kc_max, kc_max)
+
+    # Use winter cover class Kc_bas if non-growing season
+
+    put(s.kc_bas, crop & ~s.in_season, p.kc_bas_wscc)
+    kc_max = py_max(kc_max, s.kc_bas + 0.05)
+    put(s.kc_min, crop, 0.1)
+    vegetation = crop & ~p.cover
+    kc_max = np.where(
+        vegetation & (kc_max <= s.kc_min), s.kc_min + 0.001, kc_max)
+    growing = vegetation & s.in_season
+    put(s.fc, growing & (s.kc_bas > s.kc_min), py_min(np.power(
+        (s.kc_bas - s.kc_min) / (kc_max - s.kc_min), 1 + 0.5 * s.height),
+        0.99))
+    put(s.fc, growing & ~(s.kc_bas > s.kc_min), 0.001)
+
+    # Estimate infiltrating precipitation
+
+    put(s.ppt_inf_prev, crop, s.ppt_inf)
+    put(s.ppt_inf, crop, 0.0)
+    put(s.sro, crop, 0.0)
+    wet = crop & (d.precip > 0)
+    if wet.any():
+        put(s.depl_surface, wet,
+            s.wt_irr * s.depl_ze + (1 - s.wt_irr) * s.depl_zep)
+        runoff(s, d, wet)
+        put(s.ppt_inf, wet, d.precip - s.sro)
+
+    # Update fw of irrigation if an irrigation yesterday
+
+    put(s.fw_irr, crop & (s.irr_auto > 0), s.fw_std)
+
+    # Current water in fw_irr and fwp portions of Ze layer
+
+    watin_ze = s.tew - s.depl_ze
+    watin_ze = np.where(watin_ze <= 5e-7, 0.001, watin_ze)
+    watin_ze = py_min(watin_ze, s.tew)
+    watin_zep = s.tew - s.depl_zep
+    watin_zep = np.where(watin_zep <= 5e-7, 0.001, watin_zep)
+    watin_zep = py_min(watin_zep, s.tew)
+
+    # Fraction of ground that is both exposed and wet
+
+    few = 1 - s.fc
+    few = py_min(py_max(few, 0.001), s.fw_irr)
+    fewp = 1 - s.fc - few
+    fewp = py_max(fewp, 0.001)
+    put(s.totwatin_ze, crop,
+        (watin_ze * few + watin_zep * fewp) / (few + fewp))
+
+    # Deep percolation from Ze layer and initial balance of Ze layer
+
+    fw_irr = np.where(s.fw_irr > 0.0001, s.fw_irr, 1.0)
+    dperc_ze = s.ppt_inf + s.irr_sim / fw_irr - s.depl_ze
+    dperc_ze = py_max(dperc_ze, 0.0)
+    depl_zep_prev = s.ppt_inf - s.depl_zep
+    depl_zep_prev = py_max(depl_zep_prev, 0.0)
+    put(s.depl_ze, crop,
+        s.depl_ze - s.ppt_inf - s.irr_sim / fw_irr + dperc_ze)
+    put(s.depl_ze, crop, py_min(py_max(s.depl_ze, 0.0), s.tew))
+    put(s.depl_zep, crop, s.depl_zep - s.ppt_inf + depl_zep_prev)
+    put(s.depl_zep, crop, py_min(py_max(s.depl_zep, 0.0), s.tew))
+
+    # Reducer coefficient for evaporation based on moisture left
+
+    put(s.kr2, crop & (s.tew3 < 0.1), 0.0)
+    put(s.etref_30, crop, py_max(0.1, s.etref_30))
+    etr_threshold = 5 if eto else 4
+    reduce_tew = s.etref_30 < etr_threshold
+    tew2use = np.where(
+        reduce_tew, s.tew2 * np.sqrt(s.etref_30 / etr_threshold), s.tew2)
+    tew3use = np.where(
+        reduce_tew, s.tew3 * np.sqrt(s.etref_30 / etr_threshold), s.tew3)
+    rew2use = np.where(
+        reduce_tew & (s.rew > 0.8 * tew2use), 0.8 * tew2use, s.rew)
+    kr = np.where(
+        s.depl_ze <= rew2use, 1.0,
+        np.where(
+            s.depl_ze <= tew2use,
+            s.kr2 + (1 - s.kr2) * (tew2use - s.depl_ze) / (tew2use - rew2use),
+            np.where(
+                tew3use > tew2use,
+                s.kr2 * (tew3use - s.depl_ze) / (tew3use - tew2use), 0.0)))
+    krp = np.where(
+        s.depl_zep <= rew2use, 1.0,
+        np.where(
+            s.depl_zep <= tew2use,
+            s.kr2 + (1 - s.kr2) * (tew2use - s.depl_zep) / (tew2use - rew2use),
+            np.where(
+                tew3use > tew2use,
+                s.kr2 * (tew3use - s.depl_zep) / (tew3use - tew2use), 0.0)))
+
+    # Partition Ke into that from irrigation wetted and from precip wetted
+
+    watin_few = few * watin_ze + fewp * watin_zep
+    put(s.wt_irr, crop, np.where(
+        watin_few > 0.0001, few * watin_ze / watin_few, few * watin_ze))
+    put(s.wt_irr, crop, py_min(py_max(s.wt_irr, 0.0), 1.0))
+    ke_irr = kr * (kc_max - s.kc_bas) * s.wt_irr
+    ke_ppt = krp * (kc_max - s.kc_bas) * (1 - s.wt_irr)
+    ke_irr = py_min(py_max(ke_irr, 0.0), few * kc_max)
+    ke_ppt = py_min(py_max(ke_ppt, 0.0), fewp * kc_max)
+    ke = ke_irr + ke_ppt
+
+    # Transpiration coefficient for moisture stress
+
+    taw = s.aw * s.zr
+    taw = py_max(taw, 0.001)
+    raw = s.mad * taw / 100
+    ks = np.where(
+        s.depl_root > raw, py_max((taw - s.depl_root) / (taw - raw), 0.0), 1.0)
+    ks = np.where(p.invoke_stress < 1, 1.0, ks)
+    stress = p.invoke_stress == 1
+    s.stress_event[:] = s.stress_event | (
+        crop & stress & (ks < 0.05) & s.in_season & (s.kc_bas > 0.3))
+    ks = np.where(stress & s.stress_event, 0.0, ks)
+
+    # Kc during snow cover
+
+    k_rad = (
+        0.000000022 * d.doy ** 3 - 0.0000242 * d.doy ** 2 +
+        0.006 * d.doy + 0.011)
+    albedo_snow = 0.8
+    albedo_soil = 0.25
+    kc_mult = 1 - k_rad + (1 - albedo_snow) / (1 - albedo_soil) * k_rad
+    kc_mult = kc_mult * 0.7
+    kc_mult = np.where(d.snow_depth > 0.01, kc_mult, 1.0)
+    ke = ke * kc_mult
+    ke_irr = ke_irr * kc_mult
+    ke_ppt = ke_ppt * kc_mult
+    put(s.kc_act, crop, kc_mult * ks * s.kc_bas + ke)
+    put(s.kc_pot, crop, s.kc_bas + ke)
+    put(s.etc_act, crop, s.kc_act * d.etref)
+    put(s.etc_pot, crop, s.kc_pot * d.etref)
+    put(s.etc_bas, crop, s.kc_bas * d.etref)
+    e_irr = ke_irr * d.etref
+    e_ppt = ke_ppt * d.etref
+
+    # Transpiration from Ze layer
+
+    ze = 0.0001
+    put(s.zr, crop & (s.zr < 0.0001), 0.01)
+    kt_prop = np.power(ze / s.zr, 0.6)
+    kt_prop = py_min(kt_prop, 1.0)
+    kt_reducer_denom = py_max(1 - s.depl_root / taw, 0.001)
+    kt_reducer = few * (1 - s.depl_ze / tew2use) / kt_reducer_denom
+    kt_prop = kt_prop * kt_reducer
+    kt_prop = py_min(kt_prop, 1.0)
+    te_irr = kc_mult * ks * s.kc_bas * d.etref * kt_prop
+    kt_reducer = fewp * (1 - s.depl_zep / tew2use) / kt_reducer_denom
+    kt_prop = kt_prop * kt_reducer
+    kt_prop = py_min(kt_prop, 1.0)
+    te_ppt = kc_mult * ks * s.kc_bas * d.etref * kt_prop
+
+    # Finish water balance of Ze evaporation layer
+
+    depl_ze_prev = s.depl_ze.copy()
+    depl_zep_prev = s.depl_zep.copy()
+    put(s.depl_ze, crop, depl_ze_prev + e_irr / few + te_irr)
+    put(s.depl_ze, crop & (s.depl_ze < 0), 0.0)
+
+    # Keep a days potential E from exceeding evaporable water available
+
+    over = crop & (s.depl_ze > s.tew)
+    potential_e = s.depl_ze - depl_ze_prev
+    potential_e = np.where(potential_e < 0.0001, 0.0001, potential_e)
+    e_factor = 1 - (s.depl_ze - s.tew) / potential_e
+    e_factor = py_min(py_max(e_factor, 0.0), 1.0)
+    e_irr = np.where(over, e_irr * e_factor, e_irr)
+    te_irr = np.where(over, te_irr * e_factor, te_irr)
+    put(s.depl_ze, over, depl_ze_prev + e_irr / few + te_irr)
+    if (over & (s.depl_ze > s.tew + 0.2)).any():
+        status[0] = depl_ze_error
+        status[1] = np.argmax(over & (s.depl_ze > s.tew + 0.2))
+        return
+    put(s.depl_zep, crop, depl_zep_prev + e_ppt / fewp + te_ppt)
+    put(s.depl_zep, crop, py_max(s.depl_zep, 0.0))
+    over = crop & (s.depl_zep > s.tew)
+    potential_e = s.depl_zep - depl_zep_prev
+    potential_e = np.where(potential_e < 0.0001, 0.0001, potential_e)
+    e_factor = 1 - (s.depl_zep - s.tew) / potential_e
+    e_factor = py_min(py_max(e_factor, 0.0), 1.0)
+    e_ppt = np.where(over, e_ppt * e_factor, e_ppt)
+    te_ppt = np.where(over, te_ppt * e_factor, te_ppt)
+    put(s.depl_zep, over, depl_zep_prev + e_ppt / fewp + te_ppt)
+    if (over & (s.depl_zep > s.tew + 0.2)).any():
+        status[0] = depl_zep_error
+        status[1] = np.argmax(over & (s.depl_zep > s.tew + 0.2))
+        return
+
+    # Recomputed these based on corrections above if depl_ze > TEW
+
+    etref_divisor = np.where(d.etref < 0.01, 0.01, d.etref)
+    ke_irr = e_irr / etref_divisor
+    ke_ppt = e_ppt / etref_divisor
+    ke_irr = py_min(py_max(ke_irr, 0.0), 1.5)
+    ke_ppt = py_min(py_max(ke_ppt, 0.0), 1.5)
+    ke = ke_irr + ke_ppt
+
+    # Rest of day is skipped for lanes with Kc multiplier or Ks above 1
+
+    events[:, i] = events[:, i] | np.where(
+        crop & (kc_mult > 1), kc_mult_event, 0)
+    events[:, i] = events[:, i] | np.where(
+        crop & ~(kc_mult > 1) & (ks > 1), ks_event, 0)
+    crop = crop & ~(kc_mult > 1) & ~(ks > 1)
+    put(s.kc_act, crop, kc_mult * ks * s.kc_bas + ke)
+    put(s.kc_pot, crop, s.kc_bas + ke)
+    put(s.etc_act, crop, s.kc_act * d.etref)
+    put(s.etc_pot, crop, s.kc_pot * d.etref)
+    put(s.etc_bas, crop, s.kc_bas * d.etref)
+
+    # Accumulate evaporation following each irrigation event
+
+    put(s.cum_evap_prev, crop,
+        s.cum_evap_prev + e_irr - (s.ppt_inf - depl_zep_prev))
+    put(s.cum_evap_prev, crop, py_max(s.cum_evap_prev, 0.0))
+
+    # Depletion of root zone
+
+    put(s.depl_root, crop, s.depl_root + (s.etc_act - s.ppt_inf))
+
+    # Determine if there is a need for an automatic irrigation
+
+    irr_sim_prev = s.irr_sim.copy()
+    put(s.irr_sim, crop, 0.0)
+    doy_to_start_irr = s.doy_start_cycle + p.days_after_planting_irrigation
+    doy_to_start_irr = np.where(
+        doy_to_start_irr > 365, doy_to_start_irr - 365, doy_to_start_irr)
+    crop_doy = d.doy - s.doy_start_cycle + 1
+    crop_doy = np.where(crop_doy < 1, crop_doy + 365, crop_doy)
+    irrigate = (
+        crop & s.irr_flag &
+        (crop_doy >= p.days_after_planting_irrigation) &
+        (d.doy >= doy_to_start_irr) & s.in_season &
+        (s.depl_root > raw) & (s.kc_bas > 0.22))
+    put(s.irr_sim, irrigate, py_max(s.depl_root, s.irr_min))
+    put(s.depl_root, crop, s.depl_root - s.irr_sim)
+    put(s.irr_auto, crop, s.irr_sim)
+    irrigated = crop & (s.irr_sim > 0)
+    put(s.cum_evap, irrigated, s.cum_evap_prev)
+    put(s.cum_evap_prev, irrigated, 0.0)
+
+    # Deep percolation from root zone
+
+    no_excess = (
+        ((s.irr_sim + irr_sim_prev + s.ppt_inf + s.ppt_inf_prev) <= 0.0001) |
+        (s.zr < 0.2))
+    put(s.dperc, crop & no_excess,
+        np.where(s.depl_root < 0.0, -s.depl_root, 0.0))
+    put(s.dperc, crop & ~no_excess,
+        np.where(s.depl_root < -20, -20.0 - s.depl_root, 0.0))
+    put(s.depl_root, crop, s.depl_root + s.dperc)
+
+    # If depl_root > taw, assume it is because we have overshot E+T on this day
+
+    overshot = crop & (p.invoke_stress > 0.5) & (s.depl_root > taw)
+    put(s.etc_act, overshot, s.etc_act - (s.depl_root - taw))
+    put(s.etc_act, overshot, py_max(s.etc_act, 0.0))
+    put(s.kc_act, overshot & (d.etref > 0.1), s.etc_act / d.etref)
+    put(s.depl_root, overshot, taw)
+
+    # Update average Avail. Water in soil layer below current root depth
+
+    gross_dperc = s.dperc + 0.1 * s.irr_sim
+    daw3 = s.aw3 * (s.zr_max - s.zr)
+    taw3 = s.aw * (s.zr_max - s.zr)
+    daw3 = py_max(daw3, 0.0)
+    taw3 = py_max(taw3, 0.0)
+    daw3 = daw3 + gross_dperc
+    put(s.dperc, crop, np.where(daw3 > taw3, daw3 - taw3, 0.0))
+    daw3 = np.where(daw3 > taw3, taw3, daw3)
+    daw3 = py_max(daw3, 0.0)
+    put(s.aw3, crop, np.where(
+        s.zr_max > s.zr, daw3 / (s.zr_max - s.zr), 0.0))
+
+    # Compute NIWR (ET - precip + runoff + deep percolation)
+
+    put(s.niwr, crop, np.where(
+        s.irr_sim > 0, s.etc_act - (d.precip - s.sro),
+        s.etc_act - (d.precip - s.sro - s.dperc)))
+
+    # Get setup for next time step
+
+    grow_root(s, p, crop & s.in_season)
+
+def lane_day_loop(s, d, p, curves, lentry, climate, calendar, output,
+                  events, status, eto, co2_flag):
+    """Advance all lanes through daily time loop
+
+    Args:
+        s (): LaneState of crop cycle record array views
+        d (): LaneDay of daily data record array views
+        p (): LaneParams
+        curves (): flattened crop coefficient curves
+        lentry (): last nonzero entry of each curve
+        climate (): LaneClimate of stacked day x column arrays
+        calendar (): LaneCalendar of day arrays
+        output (): LaneOutput of lane x day arrays
+        events (): lane x day array of event flags
+        status (): status code, lane and day of error that stops day loop
+        eto (bool): True for ETo reference, False for ETr
+        co2_flag (bool): If True, apply CO2 correction
+
+    Returns:
+        None
+    """
+    for i in range(calendar.doy.shape[0]):
+        # At end of season for each crop, set up for non-growing and dormant season
+
+        dormant = ~s.in_season & s.dormant_setup_flag
+        if dormant.any():
+            setup_dormant(s, p, dormant, status)
+            if status[0]:
+                status[2] = i
+                return
+
+        # Track variables for each day
+
+        d.sdays[:] += 1
+        d.doy[:] = calendar.doy[i]
+        d.year[:] = calendar.year[i]
+        d.month[:] = calendar.month[i]
+        d.day[:] = calendar.day[i]
+        d.tdew[:] = climate.tdew[i][p.clim_col]
+        d.u2[:] = climate.u2[i][p.clim_col]
+        d.precip[:] = climate.precip[i][p.clim_col]
+        d.rh_min[:] = climate.rh_min[i][p.clim_col]
+        d.etref[:] = climate.etref[i][p.clim_col]
+        d.snow_depth[:] = climate.snow_depth[i][p.clim_col]
+        d.tmean[:] = climate.tmean[i][p.temp_col]
+        d.tmin[:] = climate.tmin[i][p.temp_col]
+        d.tmax[:] = climate.tmax[i][p.temp_col]
+        d.t30[:] = climate.t30[i][p.temp_col]
+        if co2_flag:
+            d.co2[:] = climate.co2[i][p.co2_col]
+
+        compute_crop_gdd(s, d, p)
+        calculate_height(s, p)
+        kcb_daily(s, d, p, curves, lentry, eto, status, events, i)
+        if status[0]:
+            status[2] = i
+            return
+        compute_crop_et(s, d, p, eto, status, events, i)
+        if status[0]:
+            status[2] = i
+            return
+
+        output.et_act[:, i] = s.etc_act
+        output.et_pot[:, i] = s.etc_pot
+        output.et_bas[:, i] = s.etc_bas
+        output.kc_act[:, i] = s.kc_act
+        output.kc_bas[:, i] = s.kc_bas
+        output.irrigation[:, i] = s.irr_sim
+        output.runoff[:, i] = s.sro
+        output.dperc[:, i] = s.dperc
+        output.niwr[:, i] = s.niwr + 0
+        output.season[:, i] = s.in_season
+        output.cutting[:, i] = s.cutting
+
+def is_alfalfa_1st_cycle(crop):
+    """Check if crop uses alfalfa first cycle curve"""
+    return (crop.class_number > 3 and
+            crop.curve_name.upper() == "ALFALFA 1ST CYCLE")
+
+def lane_params(data, et_cells, task_list, foo_list, temp_cols):
+    """Build lane parameters from crop and cell properties
+
+    Args:
+        data ():
+        et_cells (list): ETCell instances of lanes
+        task_list (list): (cell index, crop, crop count) tuples
+        foo_list (list): InitializeCropCycle instances of lanes
+        temp_cols (list): temperature column of each lane
+
+    Returns:
+        LaneParams
+    """
+    refet_type = data.refet['type']
+    curve_rows = max([
+        max(et_cell.crop_coeffs.keys()) for et_cell in et_cells]) + 3
+    values = dict([(field, []) for field in LaneParams._fields])
+    for lane_i, ((cell_i, crop, crop_count), foo) in enumerate(
+            zip(task_list, foo_list)):
+        et_cell = et_cells[cell_i]
+        class_number = crop.class_number
+        wscc = crop.winter_surface_cover_class
+        pl_gu_flag = crop.flag_for_means_to_estimate_pl_or_gu
+        alfalfa_1st_cycle = is_alfalfa_1st_cycle(crop)
+        cover = class_number in [44, 45, 46]
+        water = class_number in [55, 56, 57]
+        values['clim_col'].append(cell_i)
+        values['temp_col'].append(temp_cols[lane_i])
+        values['co2_col'].append(lane_i)
+        values['curve_row'].append(cell_i * curve_rows)
+        values['class_number'].append(class_number)
+        values['curve_number'].append(crop.curve_number)
+        values['curve_type'].append(crop.curve_type)
+        values['pl_gu_flag'].append(pl_gu_flag)
+        values['gdd_trigger_doy'].append(crop.gdd_trigger_doy)
+        values['t30_for_pl_or_gu_or_cgdd'].append(
+            crop.t30_for_pl_or_gu_or_cgdd)
+        values['date_of_pl_or_gu'].append(crop.date_of_pl_or_gu)
+        values['date_of_pl_or_gu_int'].append(int(crop.date_of_pl_or_gu))
+
+        # Planting or greenup day of year in leap and other years
+
+        if pl_gu_flag == 3:
+            values['doy_of_pl_or_gu'].append(datetime.datetime(
+                2001, crop.month_of_pl_or_gu,
+                crop.day_of_pl_or_gu).timetuple().tm_yday)
+            values['doy_of_pl_or_gu_leap'].append(datetime.datetime(
+                2000, crop.month_of_pl_or_gu,
+                crop.day_of_pl_or_gu).timetuple().tm_yday)
+        else:
+            values['doy_of_pl_or_gu'].append(0)
+            values['doy_of_pl_or_gu_leap'].append(0)
+        values['cgdd_for_efc'].append(crop.cgdd_for_efc)
+        values['cgdd_for_termination'].append(crop.cgdd_for_termination)
+        values['time_for_efc'].append(crop.time_for_efc)
+        values['time_for_harvest'].append(crop.time_for_harvest)
+        values['cutting_crop'].append(crop.cutting_crop)
+        values['killing_frost_temperature'].append(
+            crop.killing_frost_temperature)
+
+        # Alfalfa hay (typical, beef or dairy) and cuttings before fall cycle
+
+        values['alfalfa'].append(
+            (class_number == 1 and bool(data.crop_one_flag)) or
+            class_number in [2, 3] or alfalfa_1st_cycle)
+        if class_number == 2:
+            values['cutting_limit'].append(et_cell.dairy_cuttings + 0.01 - 1)
+        else:
+            values['cutting_limit'].append(et_cell.beef_cuttings + 0.01 - 1)
+        values['crop_one'].append(
+            class_number == 1 and bool(data.crop_one_flag))
+        values['crop_one_reducer'].append(
+            data.crop_one_reducer if class_number == 1 else 1.)
+        values['cold_discount'].append(
+            class_number < 4 or alfalfa_1st_cycle)
+        values['frost_crop'].append(not cover)
+        values['frost_log'].append(
+            class_number in [2, 3] or alfalfa_1st_cycle)
+        values['cover'].append(cover)
+        values['water'].append(water)
+        if water:
+            values['water_kc'].append(open_water_kc[class_number][refet_type])
+        else:
+            values['water_kc'].append(0.)
+        values['co2_crop'].append(
+            bool(data.co2_flag) and not cover and not water)
+        values['kc_max'].append(crop.kc_max)
+        values['cover_fc'].append({44: 0.0, 45: 0.4, 46: 0.7}.get(
+            class_number, 0.))
+
+        # Winter time Kc_max (Nov-Mar) only applies in northern hemisphere
+
+        winter_class = class_number - 43 if cover else wscc
+        if et_cell.latitude > 0 and winter_class in winter_kc_max:
+            values['winter_kc_max'].append(
+                winter_kc_max[winter_class][refet_type])
+            values['winter_kc_flag'].append(True)
+        else:
+            values['winter_kc_max'].append(0.)
+            values['winter_kc_flag'].append(False)
+        values['kc_bas_wscc'].append(foo.kc_bas_wscc.get(wscc, np.nan))
+        values['invoke_stress'].append(crop.invoke_stress)
+        values['days_after_planting_irrigation'].append(
+            crop.days_after_planting_irrigation)
+        values['height_initial'].append(crop.height_initial)
+        values['height_max'].append(crop.height_max)
+        values['rooting_depth_initial'].append(crop.rooting_depth_initial)
+        values['rooting_depth_max'].append(crop.rooting_depth_max)
+        values['end_of_root_growth_fraction_time'].append(
+            crop.end_of_root_growth_fraction_time)
+        values['winter_crop'].append(crop.winter_crop)
+        values['tbase'].append(crop.tbase)
+
+        # Dormant season surface and curve number
+
+        values['dormant_kc_bas'].append(
+            {1: 0.1, 2: 0.1, 3: 0.2}.get(wscc, 0.))
+        values['dormant_fc'].append({1: 0., 2: 0.4, 3: 0.7}.get(wscc, 0.))
+        values['dormant_wscc'].append(wscc in [1, 2, 3])
+        if et_cell.stn_hydrogroup in [1, 2, 3]:
+            cover_params = et_cell.crop_params[wscc + 43]
+            values['cn2_dormant'].append([
+                cover_params.cn_coarse_soil, cover_params.cn_medium_soil,
+                cover_params.cn_fine_soil][et_cell.stn_hydrogroup - 1])
+            values['cn2_dormant_flag'].append(True)
+        else:
+            values['cn2_dormant'].append(0.)
+            values['cn2_dormant_flag'].append(False)
+    lane_dtypes = {
+        'clim_col': np.int64, 'temp_col': np.int64, 'co2_col': np.int64,
+        'curve_row': np.int64, 'class_number': np.int64,
+        'curve_number': np.int64, 'curve_type': np.int64,
+        'pl_gu_flag': np.int64, 'gdd_trigger_doy': np.int64,
+        'date_of_pl_or_gu_int': np.int64, 'doy_of_pl_or_gu': np.int64,
+        'doy_of_pl_or_gu_leap': np.int64, 'invoke_stress': np.int64,
+        'days_after_planting_irrigation': np.int64,
+        'cutting_crop': np.bool_, 'alfalfa': np.bool_, 'crop_one': np.bool_,
+        'cold_discount': np.bool_, 'frost_crop': np.bool_,
+        'frost_log': np.bool_, 'cover': np.bool_, 'water': np.bool_,
+        'co2_crop': np.bool_, 'winter_kc_flag': np.bool_,
+        'winter_crop': np.bool_, 'dormant_wscc': np.bool_,
+        'cn2_dormant_flag': np.bool_}
+    return LaneParams(*[
+        np.array(values[field], dtype=lane_dtypes.get(field, np.float64))
+        for field in LaneParams._fields])
+
+def lane_curves(et_cells):
+    """Flatten crop coefficient curves of cells
+
+    Curve of curve number c of cell i starts at (i * rows + c) * curve_size
+    where rows is largest curve number plus 3 (see lane_params()).
+
+    Args:
+        et_cells (list): ETCell instances of lanes
+
+    Returns:
+        tuple of flattened curves and last nonzero entry of each curve row
+    """
+    curve_rows = max([
+        max(et_cell.crop_coeffs.keys()) for et_cell in et_cells]) + 3
+    curves = np.zeros((len(et_cells) * curve_rows, curve_size))
+    lentry = np.zeros(len(et_cells) * curve_rows, dtype=np.int64)
+    for cell_i, et_cell in enumerate(et_cells):
+        for curve_number, crop_coeff in et_cell.crop_coeffs.items():
+            row = cell_i * curve_rows + curve_number
+            curves[row, :len(crop_coeff.data)] = crop_coeff.data
+            lentry[row] = crop_coeff.lentry
+    return curves.ravel(), lentry
+
+# Compile day loop and lane functions it calls when numba is available
+# Compiled copies are bound to their own globals so they call each other,
+#   while module functions stay pure NumPy for runs without kernel_flag
+
+kernel_functions = [
+    'py_max', 'py_min', 'put', 'curve_value', 'curve_interp', 'setup_crop',
+    'setup_dormant', 'compute_crop_gdd', 'calculate_height', 'kcb_daily',
+    'leap_year', 'runoff', 'grow_root', 'compute_crop_et', 'lane_day_loop']
+
+if numba is not None:
+    kernel_globals = dict(globals())
+    for kernel_name in kernel_functions:
+        kernel_func = globals()[kernel_name]
+        kernel_globals[kernel_name] = numba.njit(
+            cache=True, error_model='numpy')(types.FunctionType(
+                kernel_func.__code__, kernel_globals, kernel_name,
+                kernel_func.__defaults__))
+    lane_day_loop_kernel = kernel_globals['lane_day_loop']
+else:
+    lane_day_loop_kernel = lane_day_loop
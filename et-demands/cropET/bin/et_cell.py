@@ -13,9 +13,16 @@ import numpy as np
 import pandas as pd
 import xlrd
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lib')))
 import crop_et_data
 import util
+import mod_csv_input
+import mod_dbf_input
 import mod_dmis
 
 mpdToMps = 3.2808399 * 5280 / 86400
@@ -26,6 +33,7 @@ class ETCellData():
         """ """
         self.et_cells_dict = dict()
         self.crop_num_list = []
+        self.et_cells_refet_data = {}
         self.et_cells_weather_data = {}
         self.et_cells_historic_data = {}
 
@@ -308,10 +316,17 @@ class ETCellData():
             cell = self.et_cells_dict[cell_id]
             cell.crop_coeffs = copy.deepcopy(crop_coeffs)
 
-    def set_spatial_crop_params(self, calibration_ws):
-        """"""
-        import shapefile
+    def set_spatial_crop_params(self, calibration_ws, cache_ws = None):
+        """Set spatially varying crop parameters from crop DBF files
+
+        Args:
+            calibration_ws (str): spatial calibration folder path
+            cache_ws (str): folder of binary parameter tables,
+                DBF files are parsed every run if None
 
+        Returns:
+            success: True or False
+        """
         logging.info('Setting spatially varying crop parameters')
         cell_id_field = 'CELL_ID'
         crop_dbf_re = re.compile('crop_\d{2}_\w+.dbf$', re.I)
@@ -393,67 +408,64 @@ class ETCellData():
         # Crop parameter shapefiles are by crop,
         #   but parameters need to be separated first by ETCell
         # Process each crop parameter shapefile
-        
+        # DBF is read into typed columns in one pass and columns are
+        # joined to cells through dictionary of cell id row indices
+
         for crop_num, crop_dbf in sorted(crop_dbf_dict.items()):
             logging.debug('    {0:2d} {1}'.format(crop_num, crop_dbf))
+            crop_fields, crop_columns = mod_dbf_input.read_dbf_table(
+                crop_dbf, cache_ws)
+            if cell_id_field not in crop_fields:
+                logging.error('\nERROR: {0} field was not found in {1}'.format(
+                    cell_id_field, crop_dbf))
+                sys.exit()
 
-            # Process using dbfread
-            # crop_f = DBF(crop_dbf)
-            # for record in crop_f:
-            #     _id = record[cell_id_field]
-            #      field_name, row_value in dict(record).items():
-
-            # Process using shapefile/pyshp
+            # Records of duplicate cell ids are applied in file order
 
-            crop_f = shapefile.Reader(crop_dbf)
-            crop_fields = [f[0] for f in crop_f.fields if f[0] != 'DeletionFlag']
-            for record in crop_f.iterRecords():
-                cell_id = record[crop_fields.index(cell_id_field)]
+            cell_rows = defaultdict(list)
+            for row, cell_id in enumerate(
+                    crop_columns[crop_fields.index(cell_id_field)].tolist()):
+                cell_rows[cell_id].append(row)
 
-                # Skip cells
+            # Field map of parameter fields, values as float (NaN if invalid)
 
-                if cell_id not in self.et_cells_dict.keys():
+            field_map = []
+            for field_name, column in zip(crop_fields, crop_columns):
+                if field_name in param_field_dict:
+                    param_name, param_type = param_field_dict[field_name], 'crop'
+                elif field_name in cutting_field_dict:
+                    param_name, param_type = cutting_field_dict[field_name], 'cutting'
+                else:
                     continue
-                for field_name, row_value in zip(crop_fields, record):
-                    # DEADBEEF - I really want to skip non-crop parameter fields
-                    #   but also tell the user if a crop parameter field is missing
-
-                    try:
-                        param_name = param_field_dict[field_name]
-                    except:
-                        param_name = None
-                    try:
-                        cutting_name = cutting_field_dict[field_name]
-                    except:
-                        cutting_name = None
-                    if param_name is not None:
-                        try:
-                            setattr(
-                                self.et_cells_dict[cell_id].crop_params[crop_num],
-                                param_name, float(row_value))
-                        except:
-                            logging.warning(
-                                ('  The spatial crop parameter was not updated\n' +
-                                 '    cell_id:    {0}\n    crop_num:   {1}\n' +
-                                 '    field_name: {2}\n    parameter:  {3}').format(
-                                 cell_id, crop_num, field_name, param_name))
-                    elif cutting_name is not None:
-                        try:
-                            setattr(
-                                self.et_cells_dict[cell_id],
-                                cutting_name, float(row_value))
-                        except:
+                if column.dtype != np.float64:
+                    column = mod_dbf_input.numeric_values(column)
+                field_map.append((field_name, param_name, param_type, column.tolist()))
+            for cell_id, cell in sorted(self.et_cells_dict.items()):
+                if cell_id not in cell_rows:
+                    continue
+                crop_param = cell.crop_params[crop_num]
+                for row in cell_rows[cell_id]:
+                    for field_name, param_name, param_type, values in field_map:
+                        if values[row] != values[row]:
                             logging.warning(
-                                ('  The spatial cutting parameter was not updated\n' +
+                                ('  The spatial {4} parameter was not updated\n' +
                                  '    cell_id:    {0}\n    crop_num:   {1}\n' +
                                  '    field_name: {2}\n    parameter:  {3}').format(
-                                 cell_id, crop_num, field_name, cutting_name))
+                                 cell_id, crop_num, field_name, param_name, param_type))
+                        elif param_type == 'crop':
+                            setattr(crop_param, param_name, values[row])
+                        else:
+                            setattr(cell, param_name, values[row])
         return True
 
 class ETCell():
     def __init__(self):
         """ """
-        pass
+        # Crop states read from and kept for daily update mode
+        # (see crop_cycle.read_cell_state() and crop_cycle.save_crop_state())
+
+        self.initial_states = {}
+        self.final_states = {}
 
     def __str__(self):
         """ """
@@ -590,6 +602,38 @@ class ETCell():
         self.process_climate(data)
         return True
 
+    def input_paths(self, data):
+        """Paths of input files read by set_input_timeseries()
+
+        Args:
+            data: configuration data from INI file
+
+        Returns:
+            list of file paths
+        """
+        input_params = [(data.refet, [('etref', data.refet.get('fnspec'), None)]),
+                        (data.weather, None)]
+        if data.phenology_option > 0:
+            input_params.append((data.hist_temps, None))
+        input_paths = []
+        for data_params, field_specs in input_params:
+            if data_params['data_structure_type'].upper() == 'SF P':
+                input_paths.append(os.path.join(
+                    data_params['ws'], data_params['name_format'] % self.refet_id))
+                continue
+            if field_specs is None:
+                field_specs = self.DMI_field_specs(data_params)
+            for field_key, fnspec, wsspec in field_specs:
+                if '%p' in data_params['name_format']:
+                    input_paths.append(os.path.join(data_params['ws'],
+                        data_params['name_format'].replace('%p', fnspec)))
+                else:
+                    input_paths.append(os.path.join(
+                        data_params['ws'], data_params['name_format']))
+        if data.refet_ratios_path:
+            input_paths.append(data.refet_ratios_path)
+        return sorted(set(input_paths))
+
     def set_refet_data(self, data, cells):
         """Read ETo/ETr data file for single station
 
@@ -642,7 +686,7 @@ class ETCell():
 
         # set date attributes
         
-        self.refet_df['doy'] = [int(ts.strftime('%j')) for ts in self.refet_df.index]
+        self.refet_df['doy'] = mod_csv_input.doy_values(self.refet_df.index)
         return True
 
     def SF_P_refet_data(self, data):
@@ -657,14 +701,10 @@ class ETCell():
         refet_path = os.path.join(data.refet['ws'], data.refet['name_format'] % self.refet_id)
         logging.debug('  {0}'.format(refet_path))
 
-        # Get list of 0 based line numbers to skip
-        # Ignore header but assume header was set as a 1's based index
-        skiprows = [i for i in range(data.refet['header_lines'])
-                    if i + 1 != data.refet['names_line']]
         try:
-            self.refet_df = pd.read_table(
-                refet_path, engine = 'python', header = data.refet['names_line']- len(skiprows)  - 1,
-                skiprows = skiprows, delimiter = data.refet['delimiter'])
+            self.refet_df = mod_csv_input.read_delimited(
+                refet_path, data.refet['header_lines'], data.refet['names_line'],
+                data.refet['delimiter'], *mod_csv_input.input_fields(data.refet['fields']))
         except IOError:
             logging.error(('  IOError: RefET data file could not be read ' +
                            'and may not exist\n  {}').format(refet_path))
@@ -693,10 +733,10 @@ class ETCell():
         # Convert date strings to datetimes
         
         if data.refet['fields']['date'] is not None:
-            self.refet_df['date'] = pd.to_datetime(self.refet_df['date'])
+            self.refet_df['date'] = mod_csv_input.parse_dates(self.refet_df['date'])
         else:
-            self.refet_df['date'] = self.refet_df[['year', 'month', 'day']].apply(
-                lambda s : datetime.datetime(*s),axis = 1)
+            self.refet_df['date'] = mod_csv_input.ymd_dates(
+                self.refet_df['year'], self.refet_df['month'], self.refet_df['day'])
         self.refet_df.set_index('date', inplace = True)
 
         # truncate period
@@ -711,50 +751,24 @@ class ETCell():
             return False
         return True
 
-    def DMI_refet_data(self, data):
+    def DMI_refet_data(self, data, cells):
         """Read reference ET for single station using specified DMI format
 
         Args:
             data: configuration data from INI file
+            cells: ET cells data (dict)
 
         Returns:
             success: True or False
         """
         self.refet_df = None
-        if '%p' in data.refet['name_format']:
-            refet_path = os.path.join(data.refet['ws'], data.refet['name_format'].replace('%p', data.refet['fnspec']))
-        else:
-            refet_path = os.path.join(data.refet['ws'], data.refet['name_format'])
-        if not os.path.isfile(refet_path):
-            logging.error('ERROR:  Reference ET data path {0} does not exist'.format(refet_path))
-            return False
-        logging.debug('  Reference ET path is {0}'.format(refet_path))
-        if data.refet['data_structure_type'].upper() == 'PF S.P':
-            if data.refet['file_type'].lower() == 'csf':
-                param_df = mod_dmis.ReadOneColumnSlot(
-                    refet_path, data.refet['header_lines'], data.refet['names_line'],
-                    self.refet_id, data.refet['fields']['etref'], data.refet['units']['etref'], 1.0,
-                    'day', 1, data.refet['delimiter'], data.start_dt, data.end_dt)
-            elif data.refet['file_type'].lower() == 'rdb':
-                param_df = mod_dmis.ReadOneTextRDB(
-                    refet_path, data.refet['header_lines'], data.refet['names_line'],
-                    self.refet_id, data.refet['fields']['etref'], data.refet['units']['etref'], 1.0,
-                    'day', 1, data.refet['delimiter'], data.start_dt, data.end_dt)
-            elif data.refet['file_type'].lower() == 'xls' or data.refet['file_type'].lower() == 'wb':
-                param_df = mod_dmis.ReadOneExcelColumn(
-                    refet_path, data.refet['wsspec'], data.refet['header_lines'], data.refet['names_line'],
-                    self.refet_id, data.refet['fields']['etref'], data.refet['units']['etref'], 1.0,
-                    'day', 1, data.start_dt, data.end_dt)
-        else:
-            logging.error('ERROR:  File type {} is not supported'.format(data.refet['file_type']))
-            return False
-        if param_df is None:
-            logging.error('ERROR:  unable to read {}'.format(refet_path))
+        field_specs = [('etref', data.refet['fnspec'], data.refet.get('wsspec'))]
+        if not self.DMI_station_stores(
+                data, data.refet, field_specs, cells.et_cells_refet_data):
             return False
-        else:
-            self.refet_df = mod_dmis.make_ts_dataframe('day', 1, data.start_dt, data.end_dt)
-            self.refet_df['etref'] = param_df[[0]].values
-        return True
+        self.refet_df = self.DMI_station_dataframe(
+            data, data.refet, cells.et_cells_refet_data)
+        return self.refet_df is not None
 
     def set_refet_ratio_data(self, data):
         """Read ETo/ETr ratios static file
@@ -891,7 +905,7 @@ class ETCell():
 
         # set date attributes
         
-        self.weather_df['doy'] = [int(ts.strftime('%j')) for ts in self.weather_df.index]
+        self.weather_df['doy'] = mod_csv_input.doy_values(self.weather_df.index)
 
         # Scale wind height to 2m if necessary
         
@@ -958,14 +972,10 @@ class ETCell():
         weather_path = os.path.join(data.weather['ws'], data.weather['name_format'] % self.refet_id)
         logging.debug('  {0}'.format(weather_path))
 
-        # Get list of 0 based line numbers to skip
-        # Ignore header but assume header was set as 1's based index
-        skiprows = [i for i in range(data.weather['header_lines'])
-                    if i+1 != data.weather['names_line']]
         try:
-            self.weather_df = pd.read_table(weather_path, engine = 'python', 
-                    header = data.weather['names_line'] - len(skiprows) - 1,
-                    skiprows = skiprows, delimiter = data.weather['delimiter'])
+            self.weather_df = mod_csv_input.read_delimited(
+                weather_path, data.weather['header_lines'], data.weather['names_line'],
+                data.weather['delimiter'], *mod_csv_input.input_fields(data.weather['fields']))
         except IOError:
             logging.error(('  IOError: Weather data file could not be read ' +
                            'and may not exist\n  {}').format(weather_path))
@@ -1000,10 +1010,10 @@ class ETCell():
         # Convert date strings to datetimes
         
         if data.weather['fields']['date'] is not None:
-            self.weather_df['date'] = pd.to_datetime(self.weather_df['date'])
+            self.weather_df['date'] = mod_csv_input.parse_dates(self.weather_df['date'])
         else:
-            self.weather_df['date'] = self.weather_df[['year', 'month', 'day']].apply(
-                lambda s : datetime.datetime(*s),axis = 1)
+            self.weather_df['date'] = mod_csv_input.ymd_dates(
+                self.weather_df['year'], self.weather_df['month'], self.weather_df['day'])
         self.weather_df.set_index('date', inplace = True)
 
         # truncate period
@@ -1024,81 +1034,19 @@ class ETCell():
         Args:
             cell_count: count of et cell being processed
             data: configuration data from INI file
+            cells: ET cells data (dict)
 
         Returns:
             success: True or False
         """
-
-        # Read data from files by fields
-
         self.weather_df = None
-        input_buffer = None
-        field_count = 0
-        for field_key, field_name in data.weather['fields'].items():
-            if field_name is None or field_name.lower() == 'date': continue
-            if field_name.lower() == 'year' or field_name.lower() == 'month': continue
-            if field_name.lower() == 'day' or field_name.lower() == 'doy': continue
-            if data.weather['fnspec'][field_key].lower() == 'estimated': continue
-            if data.weather['fnspec'][field_key].lower() == 'unused': continue
-
-            # pull data for field_name
-
-            if cell_count == 1:
-                last_path = ''
-                if '%p' in data.weather['name_format']:
-                    weather_path = os.path.join(data.weather['ws'], 
-                        data.weather['name_format'].replace('%p', data.weather['fnspec'][field_key]))
-                else:
-                    weather_path = os.path.join(data.weather['ws'], data.weather['name_format'])
-                if not os.path.isfile(weather_path):
-                    logging.error('ERROR:  Weather data path for {0} is {1} does not exist'.format(field_key, weather_path))
-                    return False
-                logging.debug('  Weather data path for {0} is {1}'.format(field_key, weather_path))
-                if data.weather['data_structure_type'].upper() == 'PF S.P':
-                    if data.weather['file_type'].lower() == 'csf':
-                        param_df = mod_dmis.ColumnSlotToDataframe(weather_path, data.weather['header_lines'],
-                            data.weather['names_line'], 'day', 1,
-                            data.weather['delimiter'], data.start_dt, data.end_dt)
-                    elif data.weather['file_type'].lower() == 'rdb':
-                        param_df = mod_dmis.TextRDBToDataframe(weather_path, data.weather['header_lines'],
-                            data.weather['names_line'], 'day', 1,
-                            data.weather['delimiter'], data.start_dt, data.end_dt)
-                    elif data.weather['file_type'].lower() == 'xls' or data.weather['file_type'].lower() == 'wb':
-                        # TODO weather_buffer Isn't Used; input_buffer no defined
-                        if '%p' in data.weather['name_format'] or field_count == 1:
-                            weather_buffer = pd.ExcelFile(weather_path)
-                        param_df = mod_dmis.ExcelWorksheetToDataframe(input_buffer, 
-                            data.weather['wsspec'][field_key],
-                            data.weather['header_lines'], data.weather['names_line'],
-                            time_step='day', ts_quantity=1,
-                            start_dt=data.start_dt, end_dt=data.end_dt)
-                    else:
-                        logging.error('ERROR:  File type {} is not supported'.format(data.weather['file_type']))
-                        return False
-                    if param_df is None:
-                        logging.error('ERROR:  unable to read {}'.format(weather_path))
-                        return False
-                    else:
-                        if data.start_dt is None:
-                            pydt = param_df.index[0]
-                            data.start_dt = pd.to_datetime(datetime.datetime(pydt.year, pydt.month, pydt.day, pydt.hour, pydt.minute))
-                        if data.end_dt is None: 
-                            pydt = param_df.index[len(param_df) - 1]
-                            data.end_date = pd.to_datetime(datetime.datetime(pydt.year, pydt.month, pydt.day, pydt.hour, pydt.minute))
-                        param_df = mod_dmis.ReduceDataframeToParameter(param_df, field_name)
-                        cells.et_cells_weather_data[field_key] = param_df
-                    del param_df
-        del input_buffer
-
-        # pull et cell's data from parameter data frames
-        
-        self.weather_df = mod_dmis.make_ts_dataframe('day', 1, data.start_dt, data.end_dt)
-        for field_key, param_df in cells.et_cells_weather_data.items():
-            self.weather_df[field_key] = mod_dmis.ReadOneDataframeColumn(param_df, self.refet_id, 
-                    data.weather['fields'][field_key], data.weather['units'][field_key], 1,
-                    'day', 1,
-                    data.start_dt, data.end_dt).values
-        return True
+        if not self.DMI_station_stores(
+                data, data.weather, self.DMI_field_specs(data.weather),
+                cells.et_cells_weather_data):
+            return False
+        self.weather_df = self.DMI_station_dataframe(
+            data, data.weather, cells.et_cells_weather_data)
+        return self.weather_df is not None
 
     def set_historic_temps(self, cell_count, data, cells):
         """Read historic max and min temperatures to support historic phenology
@@ -1138,7 +1086,7 @@ class ETCell():
 
         # set date attributes
         
-        self.hist_temps_df['doy'] = [int(ts.strftime('%j')) for ts in self.hist_temps_df.index]
+        self.hist_temps_df['doy'] = mod_csv_input.doy_values(self.hist_temps_df.index)
         return True
 
     def SF_P_historic_temps(self, data):
@@ -1153,14 +1101,10 @@ class ETCell():
         historic_path = os.path.join(data.hist_temps['ws'], data.hist_temps['name_format'] % self.refet_id)
         logging.debug('  {0}'.format(historic_path))
 
-        # Get list of 0 based line numbers to skip
-        # Ignore header but assume header was set as 1's based index
-        skiprows = [i for i in range(data.hist_temps['header_lines'])
-                    if i+1 != data.hist_temps['names_line']]
         try:
-            self.hist_temps_df = pd.read_table(historic_path, engine = 'python', 
-                    header = data.hist_temps['names_line'] - len(skiprows) - 1,
-                    skiprows = skiprows, delimiter = data.hist_temps['delimiter'])
+            self.hist_temps_df = mod_csv_input.read_delimited(
+                historic_path, data.hist_temps['header_lines'], data.hist_temps['names_line'],
+                data.hist_temps['delimiter'], *mod_csv_input.input_fields(data.hist_temps['fields']))
         except IOError:
             logging.error(('  IOError: historic data file could not be read ' +
                            'and may not exist\n  {}').format(historic_path))
@@ -1190,10 +1134,10 @@ class ETCell():
         # Convert date strings to datetimes
         
         if data.hist_temps['fields']['date'] is not None:
-            self.hist_temps_df['date'] = pd.to_datetime(self.hist_temps_df['date'])
+            self.hist_temps_df['date'] = mod_csv_input.parse_dates(self.hist_temps_df['date'])
         else:
-            self.hist_temps_df['date'] = self.hist_temps_df[['year', 'month', 'day']].apply(
-                lambda s : datetime.datetime(*s),axis = 1)
+            self.hist_temps_df['date'] = mod_csv_input.ymd_dates(
+                self.hist_temps_df['year'], self.hist_temps_df['month'], self.hist_temps_df['day'])
         self.hist_temps_df.set_index('date', inplace = True)
 
         # truncate period
@@ -1209,89 +1153,123 @@ class ETCell():
         return True
 
     def DMI_historic_temps(self, cell_count, data, cells):
-        """Read meteorological/climate data for single station using specified DMI format
+        """Read historic temperature data for single station using specified DMI format
 
         Args:
             cell_count: count of et cell being processed
             data: configuration data from INI file
+            cells: ET cells data (dict)
 
         Returns:
             success: True or False
         """
+        self.hist_temps_df = None
+        if not self.DMI_station_stores(
+                data, data.hist_temps, self.DMI_field_specs(data.hist_temps),
+                cells.et_cells_historic_data):
+            return False
+        self.hist_temps_df = self.DMI_station_dataframe(
+            data, data.hist_temps, cells.et_cells_historic_data)
+        return self.hist_temps_df is not None
 
-        # Read data from files by fields
+    def DMI_field_specs(self, data_params):
+        """File name and worksheet specifications of DMI parameter fields
 
-        self.hist_temps_df = None
-        input_buffer = None
-        field_count = 0
-        for field_key, field_name in data.hist_temps['fields'].items():
+        Args:
+            data_params: weather or historic temperature parameters from INI file
+
+        Returns:
+            list of field key, file name spec and worksheet spec tuples
+        """
+        field_specs = []
+        for field_key, field_name in data_params['fields'].items():
             if field_name is None or field_name.lower() == 'date': continue
             if field_name.lower() == 'year' or field_name.lower() == 'month': continue
             if field_name.lower() == 'day' or field_name.lower() == 'doy': continue
-            if data.hist_temps['fnspec'][field_key].lower() == 'estimated': continue
-            if data.hist_temps['fnspec'][field_key].lower() == 'unused': continue
+            if data_params['fnspec'][field_key].lower() == 'estimated': continue
+            if data_params['fnspec'][field_key].lower() == 'unused': continue
+            field_specs.append((field_key, data_params['fnspec'][field_key],
+                                data_params['wsspec'].get(field_key)))
+        return field_specs
 
-            # pull data for field_name
+    def DMI_station_stores(self, data, data_params, field_specs, stores):
+        """Read multi-station DMI files into station stores shared by all cells
 
-            if cell_count == 1:
-                last_path = ''
-                if '%p' in data.hist_temps['name_format']:
-                    historic_path = os.path.join(data.hist_temps['ws'], 
-                    data.hist_temps['name_format'].replace('%p', data.hist_temps['fnspec'][field_key]))
-                else:
-                    historic_path = os.path.join(data.hist_temps['ws'], data.hist_temps['name_format'])
-                if not os.path.isfile(historic_path):
-                    logging.error('ERROR:  historic data path for {0} is {1} does not exist'.format(field_key, historic_path))
-                    return False
-                logging.debug('  historic data path for {0} is {1}'.format(field_key, historic_path))
-                # TODO Use keyword function calls
-                if data.hist_temps['data_structure_type'].upper() == 'PF S.P':
-                    if data.hist_temps['file_type'].lower() == 'csf':
-                        param_df = mod_dmis.ColumnSlotToDataframe(historic_path, data.hist_temps['header_lines'],
-                                data.hist_temps['names_line'], 'day', 1, 
-                                data.hist_temps['delimiter'], data.start_dt, data.end_dt)
-                    elif data.hist_temps['file_type'].lower() == 'rdb':
-                        param_df = mod_dmis.TextRDBToDataframe(historic_path, data.hist_temps['header_lines'], 
-
-                                data.hist_temps['names_line'], 'day', 1, 
-                                data.hist_temps['delimiter'], data.start_dt, data.end_dt)
-                    elif data.hist_temps['file_type'].lower() == 'xls' or data.hist_temps['file_type'].lower() == 'wb':
-                        if '%p' in data.hist_temps['name_format'] or field_count == 1:
-                            #TODO What are historic_buffer and last_path used for
-                            historic_buffer = pd.ExcelFile(historic_path)
-                        last_path = historic_path
-                        param_df = mod_dmis.ExcelWorksheetToDataframe(input_buffer, 
-                                data.hist_temps['wsspec'][field_key], 
-                                data.hist_temps['header_lines'], data.hist_temps['names_line'],
-                                'day', 1, data.start_dt, data.end_dt)
-                    else:
-                        logging.error('ERROR:  File type {} is not supported'.format(data.hist_temps['file_type']))
-                        return False
-                    if param_df is None:
-                        logging.error('ERROR:  unable to read {}'.format(historic_path))
-                        return False
-                    else:
-                        if data.start_dt is None:
-                            pydt = param_df.index[0]
-                            data.start_dt = pd.to_datetime(datetime.datetime(pydt.year, pydt.month, pydt.day, pydt.hour, pydt.minute))
-                        if data.end_dt is None: 
-                            pydt = param_df.index[len(param_df) - 1]
-                            data.end_date = pd.to_datetime(datetime.datetime(pydt.year, pydt.month, pydt.day, pydt.hour, pydt.minute))
-                        param_df = mod_dmis.ReduceDataframeToParameter(param_df, field_name)
-                        cells.et_cells_historic_data[field_key] = param_df
-                    del param_df
-        del input_buffer
-
-        # pull et cell's data from parameter data frames
-        
-        self.hist_temps_df = mod_dmis.make_ts_dataframe('day', 1, data.start_dt, data.end_dt)
-        for field_key, param_df in cells.et_cells_historic_data.items():
-            self.hist_temps_df[field_key] = mod_dmis.ReadOneDataframeColumn(param_df, self.refet_id, 
-                    data.hist_temps['fields'][field_key], data.hist_temps['units'][field_key], 1,
-                    'day', 1, 
-                    data.start_dt, data.end_dt).values
+        Each parameter file is read once, by first cell that needs it,
+        and each cell then slices its station from store.
+
+        Args:
+            data: configuration data from INI file
+            data_params: refet, weather or historic temperature parameters
+            field_specs: field key, file name spec and worksheet spec of fields
+            stores: station stores by field key (updated in place)
+
+        Returns:
+            success: True or False
+        """
+        for field_key, fnspec, wsspec in field_specs:
+            if field_key in stores: continue
+            if '%p' in data_params['name_format']:
+                input_path = os.path.join(data_params['ws'],
+                    data_params['name_format'].replace('%p', fnspec))
+            else:
+                input_path = os.path.join(data_params['ws'], data_params['name_format'])
+            if not os.path.isfile(input_path):
+                logging.error('ERROR:  Data path for {0} is {1} does not exist'.format(field_key, input_path))
+                return False
+            logging.debug('  Data path for {0} is {1}'.format(field_key, input_path))
+            if data_params['data_structure_type'].upper() != 'PF S.P':
+                logging.error('ERROR:  Data structure type {} is not supported'.format(
+                    data_params['data_structure_type']))
+                return False
+            if data_params['file_type'].lower() == 'csf':
+                param_df = mod_dmis.ColumnSlotToDataframe(input_path,
+                    data_params['header_lines'], data_params['names_line'], 'day', 1,
+                    data_params['delimiter'], data.start_dt, data.end_dt)
+            elif data_params['file_type'].lower() == 'rdb':
+                param_df = mod_dmis.TextRDBToDataframe(input_path,
+                    data_params['header_lines'], data_params['names_line'], 'day', 1,
+                    data_params['delimiter'], data.start_dt, data.end_dt)
+            elif data_params['file_type'].lower() == 'xls' or data_params['file_type'].lower() == 'wb':
+                param_df = mod_dmis.ExcelWorksheetToDataframe(input_path, wsspec,
+                    data_params['header_lines'], data_params['names_line'], 'day', 1,
+                    data.start_dt, data.end_dt)
+            else:
+                logging.error('ERROR:  File type {} is not supported'.format(data_params['file_type']))
+                return False
+            if param_df is None:
+                logging.error('ERROR:  unable to read {}'.format(input_path))
+                return False
+            if data.start_dt is None:
+                pydt = param_df.index[0]
+                data.start_dt = pd.to_datetime(datetime.datetime(pydt.year, pydt.month, pydt.day, pydt.hour, pydt.minute))
+            if data.end_dt is None: 
+                pydt = param_df.index[len(param_df) - 1]
+                data.end_dt = pd.to_datetime(datetime.datetime(pydt.year, pydt.month, pydt.day, pydt.hour, pydt.minute))
+            stores[field_key] = mod_dmis.StationStore(
+                mod_dmis.ReduceDataframeToParameter(param_df, data_params['fields'][field_key]))
+            del param_df
         return True
 
+    def DMI_station_dataframe(self, data, data_params, stores):
+        """Time series of cell station sliced from station stores
+
+        Args:
+            data: configuration data from INI file
+            data_params: refet, weather or historic temperature parameters
+            stores: station stores by field key
+
+        Returns:
+            dataframe of station parameters or None if station is not found
+        """
+        station_df = mod_dmis.make_ts_dataframe('day', 1, data.start_dt, data.end_dt)
+        for field_key, store in stores.items():
+            values = store.station_values(self.refet_id, data_params['fields'][field_key])
+            if values is None:
+                return None
+            station_df[field_key] = values
+        return station_df
+
     def process_climate(self, data):
         """
         Compute long term averages (DAY LOOP)
@@ -1313,6 +1291,10 @@ class ETCell():
             success: True or False
         """
         
+        # Clear climate arrays cached by crop_cycle.cell_climate_arrays()
+
+        self.climate_arrays = None
+
         # Initialize climate dataframe
 
         self.climate_df = self.weather_df[['doy', 'ppt', 'tmax', 'tmin', 'tdew', 'wind', 'rh_min', 'snow', 'snow_depth']].copy()
@@ -1338,8 +1320,8 @@ class ETCell():
             # Interpolate value for aridity adjustment
             
             aridity_adj = [0., 0., 0., 0., 1., 1.5, 2., 3.5, 4.5, 3., 0., 0., 0.]
-            month = np.array([dt.month for dt in self.climate_df.index])
-            day = np.array([dt.day for dt in self.climate_df.index])
+            month = np.asarray(self.climate_df.index.month)
+            day = np.asarray(self.climate_df.index.day)
             moa_frac = np.clip((month + (day - 15) / 30.4), 1, 11)
             arid_adj = np.interp(moa_frac, range(len(aridity_adj)), aridity_adj)
             arid_adj *= self.aridity_rating / 100.
@@ -1360,31 +1342,28 @@ class ETCell():
 
         # Accumulate T30 over period of record
         
-        main_t30_lt = np.array(
-            self.climate_df[['t30', 'doy']].groupby('doy').mean()['t30'])
-        hist_t30_lt = np.array(
-            self.climate_df[['30t', 'doy']].groupby('doy').mean()['30t'])
+        doy = self.climate_df['doy'].values.astype(np.int64)
+        main_t30_lt = doy_means(self.climate_df['t30'].values, doy)
+        hist_t30_lt = doy_means(self.climate_df['30t'].values, doy)
 
         # Compute GDD for each day
         
-        self.climate_df['main_cgdd'] = self.climate_df['tmean']
-        self.climate_df.ix[self.climate_df['tmean'] <= 0, 'main_cgdd'] = 0
-        self.climate_df['hist_cgdd'] = self.climate_df['meant']
-        self.climate_df.ix[self.climate_df['tmean'] <= 0, 'hist_cgdd'] = 0
+        tmean = self.climate_df['tmean'].values
+        with np.errstate(invalid = 'ignore'):
+            main_cgdd = np.where(tmean <= 0, 0., tmean)
+            hist_cgdd = np.where(tmean <= 0, 0., self.climate_df['meant'].values)
 
         # Compute cumulative GDD for each year
-        
-        self.climate_df['main_cgdd'] = self.climate_df[['doy', 'main_cgdd']].groupby(
-            self.climate_df.index.map(lambda x: x.year)).main_cgdd.cumsum()
-        self.climate_df['hist_cgdd'] = self.climate_df[['doy', 'hist_cgdd']].groupby(
-            self.climate_df.index.map(lambda x: x.year)).hist_cgdd.cumsum()
+
+        year = np.asarray(self.climate_df.index.year)
+        self.climate_df['main_cgdd'] = year_cumsum(main_cgdd, year)
+        self.climate_df['hist_cgdd'] = year_cumsum(hist_cgdd, year)
 
         # Compute mean cumulative GDD for each DOY
 
-        main_cgdd_0_lt = np.array(
-            self.climate_df[['main_cgdd', 'doy']].groupby('doy').mean()['main_cgdd'])
-        hist_cgdd_0_lt = np.array(
-            self.climate_df[['hist_cgdd', 'doy']].groupby('doy').mean()['hist_cgdd'])
+        main_cgdd_0_lt = doy_means(self.climate_df['main_cgdd'].values, doy)
+        hist_cgdd_0_lt = doy_means(self.climate_df['hist_cgdd'].values, doy)
+        del doy, tmean, main_cgdd, hist_cgdd, year
 
         # Revert from indexing by I to indexing by DOY (for now)
         # Copy DOY 1 value into DOY 0
@@ -1403,23 +1382,85 @@ class ETCell():
         # Calculate an estimated depth of snow on ground using simple melt rate function))
 
         if np.any(self.climate_df['snow']):
-            for i, doy in self.climate_df['doy'].iteritems():
-                # Calculate an estimated depth of snow on ground using simple melt rate function
-                
-                snow = self.climate_df['snow'][i]
-                snow_depth = self.climate_df['snow_depth'][i]
-                
-                # Assume settle rate of 2 to 1
-                
-                snow_accum += snow * 0.5  # assume a settle rate of 2 to 1
-                
-                # 4 mm/day melt per degree C
-                
-                snow_melt = max(4 * self.climate_df['tmax'][i], 0.0)
-                snow_accum = max(snow_accum - snow_melt, 0.0)
-                snow_depth = min(snow_depth, snow_accum)
-                self.climate_df['snow_depth'][i] = snow_depth
+            self.climate_df['snow_depth'] = snow_depth_kernel(
+                self.climate_df['snow'].values.astype(np.float64),
+                self.climate_df['snow_depth'].values.astype(np.float64),
+                self.climate_df['tmax'].values.astype(np.float64))
         return True
 
+def doy_means(values, doy):
+    """Long term mean of values for each day of year in period
+
+    Same values and order as grouping by DOY and taking mean of each
+    group, missing values are skipped.
+
+    Args:
+        values (): numpy array of daily values
+        doy (): numpy array of int day of year
+
+    Returns:
+        numpy array of means of DOYs in period, sorted by DOY
+    """
+    valid = ~np.isnan(values)
+    present = np.bincount(doy) > 0
+    doy_sums = np.bincount(
+        doy[valid], weights = values[valid], minlength = len(present))
+    doy_counts = np.bincount(doy[valid], minlength = len(present))
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        return (doy_sums / doy_counts)[present]
+
+def year_cumsum(values, year):
+    """Cumulative sum of daily values restarting each year
+
+    Missing values are skipped and stay missing.
+
+    Args:
+        values (): numpy array of daily values sorted by date
+        year (): numpy array of year of each day
+
+    Returns:
+        numpy array of cumulative values
+    """
+    missing = np.isnan(values)
+    cum_values = np.where(missing, 0., values)
+    bounds = np.concatenate((
+        [0], np.flatnonzero(np.diff(year)) + 1, [len(year)]))
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        cum_values[start:end] = np.cumsum(cum_values[start:end])
+    cum_values[missing] = np.nan
+    return cum_values
+
+def snow_depth_scan(snow, snow_depth, tmax):
+    """Estimate depth of snow on ground using simple melt rate function
+
+    Args:
+        snow (): numpy array of daily snow fall
+        snow_depth (): numpy array of daily snow depth
+        tmax (): numpy array of daily maximum temperature [C]
+
+    Returns:
+        numpy array of snow depth limited to accumulated snow
+    """
+    snow_accum = 0.0
+    snow_depth_out = np.empty(len(snow))
+    for i in range(len(snow)):
+        # Assume settle rate of 2 to 1
+
+        snow_accum += snow[i] * 0.5
+
+        # 4 mm/day melt per degree C
+
+        snow_melt = max(4 * tmax[i], 0.0)
+        snow_accum = max(snow_accum - snow_melt, 0.0)
+        snow_depth_out[i] = min(snow_depth[i], snow_accum)
+    return snow_depth_out
+
+# Compile snow scan when numba is available
+
+if numba is not None:
+    snow_depth_kernel = numba.njit(cache=True)(snow_depth_scan)
+else:
+    snow_depth_kernel = snow_depth_scan
+
 if __name__ == '__main__':
     pass
@@ -6,7 +6,44 @@ import numpy as np
 
 de_initial = 10.0  # mm initial depletion for first day of crop
 
-class InitializeCropCycle:
+# Crop cycle state schema
+# Scalar state fields serialize to a flat NumPy record (see to_record())
+# Order of fields is stable, new fields should be appended
+
+crop_cycle_dtype = np.dtype([
+    ('ad', 'f8'), ('aw', 'f8'), ('aw3', 'f8'), ('cn2', 'f8'),
+    ('cgdd', 'f8'), ('cgdd_penalty', 'f8'), ('cum_evap', 'f8'),
+    ('cum_evap_prev', 'f8'), ('depl_ze', 'f8'), ('depl_zep', 'f8'),
+    ('dperc', 'f8'), ('dperc_ze', 'f8'), ('density', 'f8'),
+    ('depl_surface', 'f8'), ('depl_root', 'f8'), ('etc_act', 'f8'),
+    ('etc_pot', 'f8'), ('etc_bas', 'f8'), ('etref_30', 'f8'), ('fc', 'f8'),
+    ('fw', 'f8'), ('fw_spec', 'f8'), ('fw_std', 'f8'), ('fw_irr', 'f8'),
+    ('gdd', 'f8'), ('gdd_penalty', 'f8'), ('height_min', 'f8'),
+    ('height_max', 'f8'), ('height', 'f8'), ('irr_auto', 'f8'),
+    ('irr_sim', 'f8'), ('kc_act', 'f8'), ('kc_pot', 'f8'), ('kc_max', 'f8'),
+    ('kc_min', 'f8'), ('kc_bas', 'f8'), ('kc_bas_mid', 'f8'),
+    ('kc_bas_prev', 'f8'), ('ke', 'f8'), ('ke_irr', 'f8'), ('ke_ppt', 'f8'),
+    ('kr2', 'f8'), ('ks', 'f8'), ('kt_reducer', 'f8'), ('mad', 'f8'),
+    ('mad_ini', 'f8'), ('mad_mid', 'f8'), ('n_cgdd', 'f8'), ('n_pl_ec', 'f8'),
+    ('niwr', 'f8'), ('ppt_inf', 'f8'), ('ppt_inf_prev', 'f8'), ('rew', 'f8'),
+    ('tew', 'f8'), ('tew2', 'f8'), ('tew3', 'f8'), ('s', 'f8'), ('s1', 'f8'),
+    ('s2', 'f8'), ('s3', 'f8'), ('s4', 'f8'), ('sro', 'f8'),
+    ('zr_min', 'f8'), ('zr_max', 'f8'), ('z', 'f8'), ('zr', 'f8'),
+    ('totwatin_ze', 'f8'), ('cgdd_at_planting', 'f8'), ('wt_irr', 'f8'),
+    ('irr_min', 'f8'),
+    ('doy_start_cycle', 'i8'), ('cutting', 'i8'), ('cycle', 'i8'),
+    ('longterm_pl', 'i8'), ('T2Days', 'i8'),
+    ('max_lines_in_crop_curve_table', 'i8'),
+    ('real_start', '?'), ('irr_flag', '?'), ('in_season', '?'),
+    ('dormant_setup_flag', '?'), ('crop_setup_flag', '?'),
+    ('stress_event', '?'),
+    ('kc_bas_wscc', 'f8', (3,))])
+
+class InitializeCropCycle(object):
+    # Data frames and CO2 series are not part of record schema
+
+    __slots__ = list(crop_cycle_dtype.names) + ['crop_df', 'co2']
+
     def __init__(self):
         """Initialize for crops cycle"""
         self.ad = 0.
@@ -74,6 +111,7 @@ class InitializeCropCycle:
         self.zr_min = 0.
         self.zr_max = 0.
         self.z = 0.
+        self.zr = 0.
 
         # CGM - I don't remember why these are grouped separately
         # Maybe because they are "flags"
@@ -86,6 +124,8 @@ class InitializeCropCycle:
         self.in_season = False  # false if outside season, true if inside
         self.dormant_setup_flag = False
         self.crop_setup_flag = True  # flag to setup crop parameter information
+        self.stress_event = False
+        self.longterm_pl = 0
 
         # TP - Looks like its value comes from compute_crop_et(),
         # but needed for setup_dormant() below...
@@ -122,7 +162,8 @@ class InitializeCropCycle:
         # self.cutting = np.zeros(20, dtype=np.int)
 
         # TP - Not initialized in VB code, probably should be initialized to 0
-        # self.T2Days = 0
+
+        self.T2Days = 0
 
         # CGM - It doesn't seem like these need to be initialized?
         # self.e = 0.
@@ -138,6 +179,33 @@ class InitializeCropCycle:
         # self.kt_prop = 1
         # self.ze = 0.
 
+    def to_record(self):
+        """Return scalar crop cycle state as flat NumPy record
+
+        Returns:
+            numpy.void record with crop_cycle_dtype fields
+        """
+        values = []
+        for field in crop_cycle_dtype.names:
+            if field == 'kc_bas_wscc':
+                values.append([self.kc_bas_wscc[wscc] for wscc in [1, 2, 3]])
+            else:
+                values.append(getattr(self, field))
+        return np.array([tuple(values)], dtype=crop_cycle_dtype)[0]
+
+    def load_record(self, record):
+        """Set scalar crop cycle state from flat NumPy record
+
+        Args:
+            record (): numpy.void record with crop_cycle_dtype fields
+        """
+        for field in crop_cycle_dtype.names:
+            if field == 'kc_bas_wscc':
+                self.kc_bas_wscc = dict(zip(
+                    [1, 2, 3], record[field].tolist()))
+            else:
+                setattr(self, field, record[field].item())
+
     def crop_load(self, data, et_cell, crop):
         """Assign characteristics for crop from crop Arrays
 
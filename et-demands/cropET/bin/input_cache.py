@@ -0,0 +1,227 @@
+import hashlib
+import logging
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+
+import et_cell
+import run_journal
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lib')))
+import mod_csv_input
+import mod_dmis
+
+# Persistent cache of processed cell input time series
+# Each entry holds refet and climate data frames and long term climate
+# of a cell after process_climate().  Entries are keyed by content hash
+# of input files, INI parameters used to read them and source of reading
+# code, so changed inputs or code are never read from cache.
+# Least recently used entries are removed once cache exceeds size limit.
+# Binary spatial crop parameter tables (see mod_dbf_input) share cache
+# folder and size limit.
+
+cache_name = '.etd_cache'
+entry_ext = '.pkl'
+
+# Modules whose source is part of cache key
+
+code_modules = [et_cell, mod_csv_input, mod_dmis]
+
+# Content hashes of input files by path, size and modification time
+# Multi-station files are hashed once per run, not once per cell
+
+file_hashes = {}
+code_hashes = []
+
+def cache_ws(data):
+    """Cache folder of project
+
+    Args:
+        data (): configuration data
+
+    Returns:
+        str
+    """
+    return os.path.join(data.project_ws, cache_name)
+
+def file_hash(file_path):
+    """Hash of file content
+
+    Args:
+        file_path (str): file path
+
+    Returns:
+        str
+    """
+    file_stat = os.stat(file_path)
+    file_key = (file_path, file_stat.st_size, file_stat.st_mtime)
+    if file_key not in file_hashes:
+        md5 = hashlib.md5()
+        with open(file_path, 'rb') as input_f:
+            for block in iter(lambda: input_f.read(1 << 20), b''):
+                md5.update(block)
+        file_hashes[file_key] = md5.hexdigest()
+    return file_hashes[file_key]
+
+def code_hash():
+    """Hash of source of input reading code and library versions
+
+    Returns:
+        str
+    """
+    if not code_hashes:
+        md5 = hashlib.md5()
+        md5.update(np.__version__ + pd.__version__)
+        for module in code_modules:
+            with open(os.path.splitext(module.__file__)[0] + '.py', 'rb') as code_f:
+                md5.update(code_f.read())
+        code_hashes.append(md5.hexdigest())
+    return code_hashes[0]
+
+def cell_cache_key(data, cell):
+    """Cache key of cell input time series
+
+    Args:
+        data (): configuration data
+        cell (): ETCell instance
+
+    Returns:
+        str (None if an input file does not exist)
+    """
+    input_paths = cell.input_paths(data)
+    for input_path in input_paths:
+        if not os.path.isfile(input_path):
+            return None
+    md5 = hashlib.md5()
+    md5.update(code_hash())
+    run_journal.update_hash(md5, [file_hash(p) for p in input_paths])
+    input_params = {
+        'refet': data.refet, 'weather': data.weather,
+        'phenology_option': data.phenology_option,
+        'start_dt': data.start_dt, 'end_dt': data.end_dt,
+        'refet_ratios_path': data.refet_ratios_path,
+        'refet_id': cell.refet_id, 'aridity_rating': cell.aridity_rating,
+        'elevation': cell.elevation}
+    if data.phenology_option > 0:
+        input_params['hist_temps'] = data.hist_temps
+    if data.refet_ratios_path:
+        input_params['eto_ratios'] = dict([
+            (k, v) for k, v in data.__dict__.items()
+            if k.startswith('eto_ratios_')])
+    run_journal.update_hash(md5, input_params)
+    return md5.hexdigest()
+
+def load_cell_input(data, cell):
+    """Set processed input time series of cell from cache
+
+    Args:
+        data (): configuration data
+        cell (): ETCell instance
+
+    Returns:
+        cache key of cell and True if cell was loaded from cache
+    """
+    cache_key = cell_cache_key(data, cell)
+    if cache_key is None:
+        return None, False
+    entry_path = os.path.join(cache_ws(data), cache_key + entry_ext)
+    if not os.path.isfile(entry_path):
+        return cache_key, False
+    try:
+        with open(entry_path, 'rb') as entry_f:
+            entry = pickle.load(entry_f)
+    except Exception:
+        logging.warning('  Unable to read input cache entry {}'.format(
+            entry_path))
+        return cache_key, False
+
+    # Touch entry so it is most recently used
+
+    try:
+        os.utime(entry_path, None)
+    except OSError:
+        pass
+    logging.debug('  Reading input time series from cache')
+    cell.refet_df = entry['refet_df']
+    cell.climate_df = entry['climate_df']
+    cell.climate = entry['climate']
+    cell.climate_arrays = None
+
+    # DMI readers set period of run from first file read
+
+    if data.start_dt is None:
+        data.start_dt = entry['start_dt']
+    if data.end_dt is None:
+        data.end_dt = entry['end_dt']
+    return cache_key, True
+
+def save_cell_input(data, cell, cache_key):
+    """Write processed input time series of cell to cache
+
+    Entry is written to temporary file and renamed so that
+    concurrent workers never read a partial entry.
+
+    Args:
+        data (): configuration data
+        cell (): ETCell instance with processed climate
+        cache_key (str): key returned by load_cell_input()
+
+    Returns:
+        None
+    """
+    entry_ws = cache_ws(data)
+    try:
+        if not os.path.isdir(entry_ws):
+            os.makedirs(entry_ws)
+    except OSError:
+        pass
+    entry_path = os.path.join(entry_ws, cache_key + entry_ext)
+    temp_path = '{}.{}.tmp'.format(entry_path, os.getpid())
+    entry = {
+        'refet_df': cell.refet_df, 'climate_df': cell.climate_df,
+        'climate': cell.climate,
+        'start_dt': data.start_dt, 'end_dt': data.end_dt}
+    try:
+        with open(temp_path, 'wb') as entry_f:
+            pickle.dump(entry, entry_f, protocol=2)
+        if os.path.isfile(entry_path):
+            os.remove(entry_path)
+        os.rename(temp_path, entry_path)
+    except (IOError, OSError):
+        logging.warning('  Unable to write input cache entry {}'.format(
+            entry_path))
+        return
+    evict_entries(entry_ws, data.input_cache_size)
+
+def evict_entries(entry_ws, size_limit):
+    """Remove least recently used entries until cache fits size limit
+
+    Args:
+        entry_ws (str): cache folder path
+        size_limit (float): size limit of cache in MB
+
+    Returns:
+        None
+    """
+    entry_list = []
+    for item in os.listdir(entry_ws):
+        if not item.endswith((entry_ext, '.npz')):
+            continue
+        try:
+            item_stat = os.stat(os.path.join(entry_ws, item))
+        except OSError:
+            continue
+        entry_list.append((item_stat.st_mtime, item_stat.st_size, item))
+    cache_size = sum([entry[1] for entry in entry_list])
+    for mtime, size, item in sorted(entry_list):
+        if cache_size <= size_limit * 1024 * 1024:
+            break
+        logging.debug('  Removing input cache entry {}'.format(item))
+        try:
+            os.remove(os.path.join(entry_ws, item))
+        except OSError:
+            pass
+        cache_size -= size
@@ -5,20 +5,29 @@ import datetime
 import logging
 import multiprocessing as mp
 import os
+import Queue
+import shutil
 import sys
+import tempfile
+import threading
 from time import clock
 
 import numpy as np
 import pandas as pd
 
+import columnar_output
 import crop_et_data
 import crop_cycle
 import et_cell
+import input_cache
+import results_cube
+import run_journal
 import util
 
 def main(ini_path, log_level = logging.WARNING, 
         etcid_to_run = 'ALL',debug_flag = False, 
-        cal_flag = False, mp_procs = 1):
+        cal_flag = False, mp_procs = 1, resume_flag = False,
+        update_flag = False):
     """ Main function for running crop ET model
 
     Args:
@@ -28,6 +37,10 @@ def main(ini_path, log_level = logging.WARNING,
         debug_flag (bool): If True, write debug level comments to debug.txt
         cal_flag (bool): If True, display mean annual start/end dates to screen
         mp_procs (int): number of cores to use for multiprocessing
+        resume_flag (bool): If True, skip crops already completed in
+            run journal of previous run
+        update_flag (bool): If True, continue from saved crop states and
+            append new days to existing output
 
     Returns:
         None
@@ -45,6 +58,10 @@ def main(ini_path, log_level = logging.WARNING,
         logging.warning('  Multiprocessing mode, {0} cores'.format(mp_procs))
     if cal_flag:
         logging.warning('  Displaying additional calibration information')
+    if resume_flag:
+        logging.warning('  Resuming previous run')
+    if update_flag:
+        logging.warning('  Daily update mode')
 
     # All general data are handled in this class
 
@@ -60,6 +77,19 @@ def main(ini_path, log_level = logging.WARNING,
         logger = util.file_logger(
             logger, log_level = logging.DEBUG, output_ws = data.project_ws)
 
+    # Daily update mode continues from saved states and appends output
+
+    if update_flag and data.state_ws is None:
+        logging.error('\nERROR: state_folder must be set for daily update mode')
+        sys.exit()
+    if update_flag and data.cet_out['data_structure_type'].upper() != 'DRI':
+        logging.error('\nERROR: Daily update mode requires DRI output')
+        sys.exit()
+    if update_flag and data.cube_output_flag:
+        logging.error(
+            '\nERROR: Daily update mode is not available for cube output')
+        sys.exit()
+
     # Growing season summary CSV files must be written
 
     if cal_flag:
@@ -93,73 +123,134 @@ def main(ini_path, log_level = logging.WARNING,
     # Read spatially varying crop parameters
     
     if data.spatial_cal_flag:
-        cells.set_spatial_crop_params(data.spatial_cal_ws)
+        if data.input_cache_flag:
+            cells.set_spatial_crop_params(
+                data.spatial_cal_ws, input_cache.cache_ws(data))
+        else:
+            cells.set_spatial_crop_params(data.spatial_cal_ws)
+
+    # Results cube is preallocated before any crop is computed
+    # Crops of a resumed run are all recomputed if cube is new
+
+    if (data.cube_output_flag and
+            results_cube.create_cube(data, cells, resume_flag) and
+            resume_flag):
+        logging.warning('  Results cube was recreated, restarting run')
+        resume_flag = False
+
+    # Completed (cell, crop) outputs are recorded in run journal
+
+    journal = run_journal.RunJournal(data, resume_flag)
 
     # Multiprocessing logic
-    # If cell count is low, process crops in parallel
-    # If cell count is high, process cells in parallel (crops in serial)
+    # Single cell is processed by crop in parallel
+    # Multiple cells are split into (cell, crop) tasks that are scheduled
+    # across pool by estimated cost (see run_task_scheduler())
 
-    cell_mp_list, cell_mp_flag, crop_mp_flag = [], False, False
+    cell_mp_list, task_mp_flag, crop_mp_flag = [], False, False
     if mp_procs > 1:
         logging.warning("\nSetting multiprocessing logic")
-        if data.cet_out['data_structure_type'].upper() == 'RDB':
-            logging.warning("  Multiprocessing is not available for RDB output")
+        if (data.cet_out['data_structure_type'] == 'HDF5' and
+                columnar_output.cell_layout(data)):
+            logging.warning(
+                "  Multiprocessing is not available for HDF5 output by cell")
             mp_procs = 1
+        elif etcid_to_run == 'ALL':
+            logging.warning('  Cell count: {}'.format(
+                len(cells.et_cells_dict.keys())))
+            logging.warning('  Crop count: {}'.format(len(cells.crop_num_list)))
+            logging.warning("  Multiprocessing by cell and crop")
+            task_mp_flag = True
         else:
-            if etcid_to_run == 'ALL':
-                cells_count = len(cells.et_cells_dict.keys())
-                crops_count = len(cells.crop_num_list)
-                logging.warning('  Cell count: {}'.format(cells_count))
-                logging.warning('  Crop count: {}'.format(crops_count))
-        
-                # 0.5 multiplier is to prefer multiprocessing by cell
-                # because of 1 CPU time spent loading/processing weather data
-                # when multiprocessing by crop
-        
-                if (0.5 * cells_count) > crops_count:
-                    logging.warning("  Multiprocessing by cell")
-                    cell_mp_flag = True
-                else:
-                    logging.warning("  Multiprocessing by crop")
-                    crop_mp_flag = True
-            else:
-                logging.warning("  Multiprocessing by crop")
-                crop_mp_flag = True
+            logging.warning("  Multiprocessing by crop")
+            crop_mp_flag = True
+
+            # Crop pool is created for each cell, so reader thread must
+            # not be running when pool workers are forked
+
+            if data.prefetch_depth > 0:
+                logging.warning("  Disabling prefetch for multiprocessing by crop")
+                data.prefetch_depth = 0
+
+        # RDB crops are written to shards that are merged for each cell
+
+        if (mp_procs > 1 and
+                data.cet_out['data_structure_type'].upper() == 'RDB'):
+            data.rdb_shard_ws = tempfile.mkdtemp(
+                prefix = 'cet_rdb_', dir = data.scratch_ws)
 
     # loop thru et cells
-    
+    # Input of next cells is read ahead by prefetch reader while
+    # crops of current cell are computed (see read_cell_inputs())
+    # Cells multiprocessed by cell and crop are read by task scheduler
+
     logging.warning("")
-    cell_count = 0
+    cell_list = []
     for cell_id, cell in sorted(cells.et_cells_dict.items()):
         if etcid_to_run == 'ALL' or etcid_to_run == cell_id:
             logging.info('  Processing node id' + cell_id + ' with name ' + cell.cell_name)
-            cell_count += 1
-            if cell_mp_flag:
-                # Multiprocessing by cell
-
-                cell_mp_list.append([cell_count, data, cell, mp_procs])
-            elif crop_mp_flag:
-                # Multiprocessing by crop
-                logging.warning('CellID: {}'.format(cell_id))
-                if not cell.set_input_timeseries(cell_count, data, cells):
-                    sys.exit()
-                crop_cycle.crop_cycle_mp(data, cell, mp_procs = mp_procs)
-            else:
-                logging.warning('CellID: {}'.format(cell_id))
-                if not cell.set_input_timeseries(cell_count, data, cells):
-                    sys.exit()
+            cell_list.append([len(cell_list) + 1, cell_id])
+    if task_mp_flag:
+        # Multiprocessing by cell and crop
+
+        cell_mp_list, cell_list = cell_list, []
+    cell_batch_list = []
+    for cell_count, cell_id, day_count in read_cell_inputs(
+            data, cells, cell_list, update_flag):
+        cell = cells.et_cells_dict[cell_id]
+        logging.warning('CellID: {}'.format(cell_id))
+        if day_count is None:
+            sys.exit()
+        elif day_count == 0:
+            logging.warning('  No new days to compute')
+            continue
+        journal.set_cell_input(cell)
+        if crop_mp_flag:
+            # Multiprocessing by crop
+
+            crop_flags = journal.skip_done_crops(data, cell)
+            crop_cycle.crop_cycle_mp(
+                data, cell, mp_procs = mp_procs, journal = journal)
+            cell.crop_flags = crop_flags
+            crop_cycle.write_cell_state(data, cell, cell.final_states)
+            cell.final_states = {}
+        elif data.day_loop_engine == 'cell_batch':
+            # Stack cells and process each crop for batch of cells
+
+            cell_batch_list.append(
+                (cell, journal.skip_done_crops(data, cell)))
+            if len(cell_batch_list) >= data.cell_batch_size:
+                run_cell_batch(data, cell_batch_list, journal, debug_flag)
+                cell_batch_list = []
+        else:
+            # Crops are recorded as soon as their output is written,
+            # except for RDB and HDF5 by cell where cell is one file
+
+            crop_flags = journal.skip_done_crops(data, cell)
+            if run_journal.single_file_cells(data):
                 crop_cycle.crop_cycle(data, cell, debug_flag = debug_flag)
+                journal.record_cell(cell, crop_flags)
+            else:
+                crop_cycle.crop_cycle(
+                    data, cell, debug_flag = debug_flag, journal = journal)
+                cell.crop_flags = crop_flags
+            crop_cycle.write_cell_state(data, cell, cell.final_states)
+            cell.final_states = {}
+
+    # Process remaining batch of cells
+
+    if cell_batch_list:
+        run_cell_batch(data, cell_batch_list, journal, debug_flag)
+        del cell_batch_list
 
-    # Multiprocess all cells
+    # Multiprocess all cells and crops
     
-    results = []
     if cell_mp_list:
-        print(cell_mp_list)
-        pool = mp.Pool(mp_procs)
-        results = pool.imap(cell_mp, cell_mp_list, chunksize = 1)
-        pool.close()
-        pool.join()
-        del pool, results
+        run_task_scheduler(
+            data, cells, cell_mp_list, mp_procs, journal, update_flag)
+    if data.rdb_shard_ws is not None:
+        shutil.rmtree(data.rdb_shard_ws, ignore_errors = True)
+    journal.close()
     logging.warning('\nCROPET Run Completed')
     logging.info('\n{} seconds'.format(clock()-clock_start))
 
@@ -188,26 +279,310 @@ def main(ini_path, log_level = logging.WARNING,
                      '  {start_dt.month}/{start_dt.day} - {end_dt.month}/{end_dt.day}').format(
                         crop=crop_num, start_dt=gs_start_dt, end_dt=gs_end_dt))
 
-def cell_mp(tup):
-    """Pool multiprocessing friendly function
+def read_cell_input(cell_count, data, cells, cell, update_flag = False):
+    """Read input time series of cell
 
-    mp.Pool needs all inputs are packed into single tuple
-    Tuple is unpacked and and single processing version of function is called
-    """
-    return cell_sp(*tup)
-
-def cell_sp(cell_count, data, cell, mp_procs = 1):
-    """Compute crop cycle for each cell
+    Processed input is read from and written to persistent input cache
+    when input_cache_flag is set.
+    In daily update mode input is cut to days after saved crop states
 
     Args:
         cell_count: count of cell being processed
         data (): configuration data
+        cells (): ETCellData instance
         cell (): ETCell instance
-        mp_procs: number of processors
+        update_flag (bool): If True, continue from saved crop states
+
+    Returns:
+        number of days to compute (None if input could not be read)
     """
-    if not cell.set_input_timeseries(cell_count, data, cells, debug_flag = False): 
-        sys.exit()
-    crop_cycle.crop_cycle(data, cell, debug_flag = False, mp_procs = mp_procs)
+    if data.input_cache_flag:
+        cache_key, cache_flag = input_cache.load_cell_input(data, cell)
+    else:
+        cache_key, cache_flag = None, False
+    if not cache_flag:
+        if not cell.set_input_timeseries(cell_count, data, cells):
+            return None
+        if cache_key is not None:
+            input_cache.save_cell_input(data, cell, cache_key)
+    if update_flag:
+        return crop_cycle.read_cell_state(data, cell)
+    return len(cell.refet_df.index)
+
+def read_cell_inputs(data, cells, cell_list, update_flag = False):
+    """Read input time series of cells in order
+
+    With prefetch_depth > 0, a reader thread reads, converts and
+    processes climate of following cells while caller computes current
+    cell.  Reader stays at most prefetch_depth cells ahead.  Errors of
+    reader (including sys.exit() of input readers) are raised in caller.
+
+    Args:
+        data (): configuration data
+        cells (): ETCellData instance
+        cell_list (list): cell count and cell id of cells to read
+        update_flag (bool): If True, continue from saved crop states
+
+    Yields:
+        tuple of cell count, cell id and number of days to compute
+        (None if input could not be read)
+    """
+    if data.prefetch_depth < 1 or len(cell_list) < 2:
+        for cell_count, cell_id in cell_list:
+            yield cell_count, cell_id, read_cell_input(
+                cell_count, data, cells, cells.et_cells_dict[cell_id],
+                update_flag)
+        return
+    cell_queue = Queue.Queue(maxsize = data.prefetch_depth)
+
+    def read_cells():
+        try:
+            for cell_count, cell_id in cell_list:
+                day_count = read_cell_input(
+                    cell_count, data, cells, cells.et_cells_dict[cell_id],
+                    update_flag)
+                cell_queue.put((cell_count, cell_id, day_count, None))
+                if day_count is None:
+                    return
+        except BaseException:
+            cell_queue.put((None, None, None, sys.exc_info()))
+
+    # Daemon reader does not keep process alive if caller stops early
+
+    reader = threading.Thread(target = read_cells, name = 'cet_prefetch')
+    reader.daemon = True
+    reader.start()
+    for i in range(len(cell_list)):
+        cell_count, cell_id, day_count, exc_info = cell_queue.get()
+        if exc_info is not None:
+            raise exc_info[0], exc_info[1], exc_info[2]
+        yield cell_count, cell_id, day_count
+        if day_count is None:
+            return
+    reader.join()
+
+def run_cell_batch(data, cell_batch_list, journal, debug_flag = False):
+    """Compute crop ET for batch of cells and record completed crops
+
+    Crops are recorded as soon as their output is written, or with the
+    rest of their cell once its last crop is written when all crops of
+    a cell share one output file.  Crop states of each cell are written
+    as soon as its last crop is done.
+
+    Args:
+        data (): configuration data
+        cell_batch_list (list): ETCell instances and their crop flags
+            returned by journal.skip_done_crops()
+        journal (): RunJournal instance
+        debug_flag (bool): If True, write debug level comments to debug.txt
+
+    Returns:
+        None
+    """
+    single_file_flag = run_journal.single_file_cells(data)
+    crop_flags_dict = dict([
+        (cell.cell_id, crop_flags) for cell, crop_flags in cell_batch_list])
+
+    def cell_done(cell):
+        if single_file_flag:
+            journal.record_cell(cell, crop_flags_dict[cell.cell_id])
+        else:
+            cell.crop_flags = crop_flags_dict[cell.cell_id]
+        crop_cycle.write_cell_state(data, cell, cell.final_states)
+        cell.final_states = {}
+
+    if single_file_flag:
+        crop_cycle.crop_cycle_cell_batch(
+            data, [cell for cell, crop_flags in cell_batch_list],
+            debug_flag = debug_flag, cell_done = cell_done)
+    else:
+        crop_cycle.crop_cycle_cell_batch(
+            data, [cell for cell, crop_flags in cell_batch_list],
+            debug_flag = debug_flag, journal = journal,
+            cell_done = cell_done)
+
+def run_task_scheduler(data, cells, cell_mp_list, mp_procs, journal,
+                       update_flag = False):
+    """Compute crop ET for (cell, crop) tasks across process pool
+
+    Weather data are read and climate is processed once per cell, ahead
+    of current cell when prefetch_depth is set (see read_cell_inputs()).
+    Pool is created before reader thread is started so workers are not
+    forked while reader holds locks.  Each loaded cell is staged to
+    scratch folder where it is shared by all crop tasks of that cell.
+    Crop tasks of cell are queued as soon as cell is staged, largest
+    estimated cost first, and handed out one at a time so idle workers
+    pick up next task as soon as they finish.  At most mp_procs + 1
+    cells are staged at a time and scratch of cell is removed once its
+    last task is done.  Each task is recorded in run journal as soon as
+    it finishes, so a failed task does not lose work of other tasks.
+    RDB crops are written to shards and are recorded once shards of
+    cell are merged.
+
+    Args:
+        data (): configuration data
+        cells (): ETCellData instance
+        cell_mp_list (list): cell count and cell id of cells to process
+        mp_procs (int): number of cores to use for multiprocessing
+        journal (): RunJournal instance
+        update_flag (bool): If True, continue from saved crop states
+
+    Returns:
+        None
+    """
+    scratch_ws = tempfile.mkdtemp(prefix = 'cet_', dir = data.scratch_ws)
+    pool = mp.Pool(
+        mp_procs, initializer = cell_pool_init,
+        initargs = (data, scratch_ws))
+
+    # Tasks are fed to pool from queue until None is queued
+
+    task_queue = Queue.Queue()
+    results = pool.imap_unordered(
+        crop_task_mp, iter(task_queue.get, None), chunksize = 1)
+    staged_cell_limit = mp_procs + 1
+    cell_task_counts, cell_states, cell_crops = {}, {}, {}
+
+    def finish_task(cell_id, crop_num, crop_state):
+        logging.info('  CellID: {}  Crop: {}'.format(cell_id, crop_num))
+        cell = cells.et_cells_dict[cell_id]
+        if data.rdb_shard_ws is None:
+            journal.record(cell, cell.crop_params[crop_num])
+        cell_crops[cell_id].append(crop_num)
+
+        # Crop states of cell are saved once all its tasks are done
+
+        if crop_state is not None:
+            cell_states[cell_id][crop_num] = crop_state
+        cell_task_counts[cell_id] -= 1
+        if cell_task_counts[cell_id] > 0:
+            return
+        crop_cycle.write_cell_state(data, cell, cell_states.pop(cell_id))
+        if data.rdb_shard_ws is not None:
+            crop_nums = sorted(cell_crops[cell_id])
+            crop_cycle.merge_rdb_shards(data, cell, crop_nums)
+            for crop_num in crop_nums:
+                journal.record(cell, cell.crop_params[crop_num])
+        del cell_crops[cell_id], cell_task_counts[cell_id]
+        shutil.rmtree(os.path.join(scratch_ws, cell_id), ignore_errors = True)
+
+    try:
+        for cell_count, cell_id, day_count in read_cell_inputs(
+                data, cells, cell_mp_list, update_flag):
+            cell = cells.et_cells_dict[cell_id]
+            logging.warning('CellID: {}'.format(cell_id))
+            if day_count is None:
+                sys.exit()
+            elif day_count == 0:
+                logging.warning('  No new days to compute')
+                continue
+            journal.set_cell_input(cell)
+
+            # RDB crops are only skipped when whole cell is done
+
+            run_flags = cell.crop_flags
+            if data.rdb_shard_ws is not None:
+                crop_flags = journal.skip_done_crops(data, cell)
+                run_flags, cell.crop_flags = cell.crop_flags, crop_flags
+            task_list = []
+            crop_count = 0
+            for crop_num, crop in sorted(cell.crop_params.items()):
+                if cell.crop_flags[crop_num] == 0:
+                    continue
+                crop_count += 1
+                if run_flags[crop_num] == 0:
+                    continue
+                elif (data.rdb_shard_ws is None and
+                        journal.is_done(data, cell, crop)):
+                    continue
+                task_list.append([
+                    crop_cycle.crop_task_cost(crop, day_count),
+                    cell_id, crop_num, crop_count, mp_procs])
+            if not task_list:
+                continue
+
+            # Wait for staged cells to finish before staging another
+
+            while len(cell_task_counts) >= staged_cell_limit:
+                finish_task(*results.next())
+
+            # Time series are only needed in scratch folder from here on
+
+            crop_cycle.stage_shared_cell(cell, os.path.join(scratch_ws, cell_id))
+            cells.et_cells_dict[cell_id] = crop_cycle.shared_et_cell(cell)
+            del cell
+            cell_task_counts[cell_id] = len(task_list)
+            cell_states[cell_id] = {}
+            cell_crops[cell_id] = []
+
+            # Largest tasks of cell first
+
+            task_list.sort(key = lambda task: -task[0])
+            for task in task_list:
+                task_queue.put(task)
+        task_queue.put(None)
+        for result in results:
+            finish_task(*result)
+        pool.close()
+        pool.join()
+    except BaseException:
+        # Queued tasks are dropped so pool task handler can stop
+
+        exc_info = sys.exc_info()
+        while True:
+            try:
+                task_queue.get_nowait()
+            except Queue.Empty:
+                break
+        task_queue.put(None)
+        pool.terminate()
+        raise exc_info[0], exc_info[1], exc_info[2]
+    finally:
+        shutil.rmtree(scratch_ws, ignore_errors = True)
+
+# Static data set by cell_pool_init() in each pool worker
+
+cell_pool_data = {}
+
+def cell_pool_init(data, scratch_ws):
+    """Pool initializer that loads static data once per worker
+
+    Args:
+        data (): configuration data
+        scratch_ws (str): scratch folder path
+    """
+    cell_pool_data['data'] = data
+    cell_pool_data['scratch_ws'] = scratch_ws
+    cell_pool_data['cell_id'] = None
+    cell_pool_data['cell'] = None
+
+def crop_task_mp(tup):
+    """Pool multiprocessing friendly function for single (cell, crop) task
+
+    Staged cell is loaded from scratch folder and kept by worker
+    until task for different cell is received
+
+    Args:
+        tup (list): task cost, cell id, crop number, crop count and mp_procs
+
+    Returns:
+        tuple of cell id, crop number and end of period crop state
+    """
+    cost, cell_id, crop_num, crop_count, mp_procs = tup
+    data = cell_pool_data['data']
+    if cell_pool_data['cell_id'] != cell_id:
+        cell_pool_data['cell'] = None
+        cell_pool_data['cell'] = crop_cycle.load_shared_cell(
+            data, os.path.join(cell_pool_data['scratch_ws'], cell_id))
+        cell_pool_data['cell_id'] = cell_id
+    cell = cell_pool_data['cell']
+
+    # Force debug_flag false when multiprocessing
+
+    crop_cycle.crop_day_loop_mp([
+        crop_count, data, cell, cell.crop_params[crop_num],
+        False, mp_procs])
+    return cell_id, crop_num, cell.final_states.pop(crop_num, None)
 
 def is_valid_file(parser, arg):
     if not os.path.isfile(arg):
@@ -246,6 +621,12 @@ def parse_args():
     parser.add_argument(
         '--cal', action = 'store_true', default = False,
         help = "Display mean annual start/end dates to screen")
+    parser.add_argument(
+        '--resume', action = 'store_true', default = False,
+        help = "Skip crops completed with same inputs in run journal")
+    parser.add_argument(
+        '--update', action = 'store_true', default = False,
+        help = "Continue from saved crop states and append new days")
     args = parser.parse_args()
     
     # Convert INI path to an absolute path if necessary
@@ -259,4 +640,5 @@ if __name__ == '__main__':
     main(ini_path=args.ini, log_level = args.log_level, 
         etcid_to_run = args.etcid, cal_flag = args.cal, 
         debug_flag = args.debug, 
-        mp_procs = args.multiprocessing)
+        mp_procs = args.multiprocessing, resume_flag = args.resume,
+        update_flag = args.update)
@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+import columnar_output
+
+# Cell x crop x day x variable cube of daily crop ET results
+# Cube is a preallocated .npy file that is memory mapped by each process,
+# so crop results are written in place without a merge step.
+# JSON index holds cell ids, crop numbers, dates, variables and units.
+# Values of crops that are not computed for a cell are NaN.
+
+cube_name = 'cet_cube.npy'
+index_name = 'cet_cube.json'
+cube_dtype = np.float32
+
+# Open cube of each process by cube path
+
+cube_cache = {}
+
+def cube_variables(data):
+    """Daily output fields stored in cube
+
+    Args:
+        data (): configuration data
+
+    Returns:
+        list of str
+    """
+    return [
+        'PM' + data.refet['fields']['etref'], 'ETact', 'ETpot', 'ETbas',
+        'Kc', 'Kcb', 'PPT', 'Irrigation', 'Runoff', 'DPerc', 'NIWR',
+        'Season', 'Cutting']
+
+def create_cube(data, cells, resume_flag = False):
+    """Create results cube and index for cells and crops of run
+
+    Existing cube is reused when resuming a run with same index.
+
+    Args:
+        data (): configuration data
+        cells (): ETCellData instance
+        resume_flag (bool): If True, keep values of existing cube
+
+    Returns:
+        True if new cube was created
+    """
+    cell_ids = sorted(cells.et_cells_dict.keys())
+    crop_nums = [int(crop_num) for crop_num in cells.crop_num_list]
+    dates = pd.date_range(data.start_dt, data.end_dt, freq = 'D')
+    variables = cube_variables(data)
+    units = columnar_output.table_units('daily', variables)
+    crop_names = {}
+    for cell in cells.et_cells_dict.values():
+        for crop_num, crop in cell.crop_params.items():
+            crop_names[str(int(crop_num))] = crop.name
+    cube_index = {
+        'cube_name': cube_name,
+        'dtype': np.dtype(cube_dtype).name,
+        'shape': [len(cell_ids), len(crop_nums), len(dates), len(variables)],
+        'cell_ids': [str(cell_id) for cell_id in cell_ids],
+        'cell_names': [
+            str(cells.et_cells_dict[cell_id].cell_name)
+            for cell_id in cell_ids],
+        'crop_nums': crop_nums,
+        'crop_names': [crop_names.get(str(n), '') for n in crop_nums],
+        'start_date': dates[0].strftime('%Y-%m-%d'),
+        'end_date': dates[-1].strftime('%Y-%m-%d'),
+        'variables': variables,
+        'units': units}
+    cube_path = os.path.join(data.cube_output_ws, cube_name)
+    index_path = os.path.join(data.cube_output_ws, index_name)
+    data.cube_index = cube_index
+    if resume_flag and os.path.isfile(cube_path) and os.path.isfile(index_path):
+        with open(index_path, 'r') as index_f:
+            if json.load(index_f) == json.loads(json.dumps(cube_index)):
+                logging.warning('  Resuming results cube')
+                return False
+        logging.warning('  Results cube index changed, creating new cube')
+
+    # Cube is filled with NaN one cell at a time to limit memory use
+
+    logging.warning('  Creating results cube {} ({:.1f} MB)'.format(
+        cube_path, np.prod(cube_index['shape']) *
+        np.dtype(cube_dtype).itemsize / 1024. ** 2))
+    cube_cache.pop(cube_path, None)
+    cube = np.lib.format.open_memmap(
+        cube_path, mode = 'w+', dtype = cube_dtype,
+        shape = tuple(cube_index['shape']))
+    for cell_i in range(cube.shape[0]):
+        cube[cell_i] = np.nan
+    cube.flush()
+    del cube
+    with open(index_path, 'w') as index_f:
+        json.dump(cube_index, index_f, indent = 1)
+    return True
+
+def write_crop_cube(data, et_cell, crop, daily_output_df):
+    """Write daily output of cell and crop in place to results cube
+
+    Args:
+        data (): configuration data
+        et_cell (): ETCell instance
+        crop (): crop parameters
+        daily_output_df (): daily output data frame with renamed fields
+    """
+    cube_path = os.path.join(data.cube_output_ws, cube_name)
+    if cube_path not in cube_cache:
+        cube_cache[cube_path] = np.load(cube_path, mmap_mode = 'r+')
+    cube = cube_cache[cube_path]
+    cell_i = data.cube_index['cell_ids'].index(str(et_cell.cell_id))
+    crop_i = data.cube_index['crop_nums'].index(int(crop.class_number))
+    day_i = ((daily_output_df.index.values -
+              np.datetime64(data.cube_index['start_date'])) //
+             np.timedelta64(1, 'D')).astype(np.int64)
+    day_mask = (day_i >= 0) & (day_i < cube.shape[2])
+    values = daily_output_df[data.cube_index['variables']].values
+    cube[cell_i, crop_i, day_i[day_mask], :] = values[day_mask].astype(
+        cube_dtype)
+
+def open_cube(cube_ws, mode = 'r'):
+    """Open results cube as memory mapped array
+
+    Args:
+        cube_ws (str): cube output folder
+        mode (str): memory map mode ('r' or 'r+')
+
+    Returns:
+        tuple of cube array and index dict
+    """
+    with open(os.path.join(cube_ws, index_name), 'r') as index_f:
+        cube_index = json.load(index_f)
+    cube = np.load(
+        os.path.join(cube_ws, cube_index['cube_name']), mmap_mode = mode)
+    return cube, cube_index
+
+def cube_dates(cube_index):
+    """Dates of cube day axis
+
+    Args:
+        cube_index (dict): cube index returned by open_cube()
+
+    Returns:
+        pandas.DatetimeIndex
+    """
+    return pd.date_range(
+        cube_index['start_date'], cube_index['end_date'], freq = 'D')
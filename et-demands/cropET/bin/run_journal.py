@@ -0,0 +1,332 @@
+import datetime
+import hashlib
+import logging
+import numbers
+import os
+
+import numpy as np
+import pandas as pd
+
+import columnar_output
+import results_cube
+
+# Run journal of completed (cell, crop) outputs
+# Each line holds cell id, crop number, input hash and parameter hash.
+# Lines are only written after outputs of crop are completely written
+# so that a run can be resumed after a crash (see mod_crop_et --resume).
+
+journal_name = 'cet_journal.csv'
+
+# Configuration values that select cells, crops or day loop engine
+# but do not change results of single (cell, crop) computation
+
+data_hash_skip_list = [
+    'crop_params', 'crop_coeffs', 'cell_skip_list', 'cell_test_list',
+    'crop_skip_list', 'crop_test_list', 'day_loop_engine', 'cell_batch_size',
+    'output_chunk_days', 'scratch_ws', 'state_ws', 'cube_index',
+    'rdb_shard_ws', 'input_cache_flag', 'input_cache_size', 'prefetch_depth']
+
+class RunJournal(object):
+    def __init__(self, data, resume_flag = False):
+        """Open run journal in project folder
+
+        Args:
+            data (): configuration data
+            resume_flag (bool): If True, keep valid entries of existing
+                journal, otherwise start new journal
+        """
+        self.journal_path = os.path.join(data.project_ws, journal_name)
+        self.entries = {}
+        self.input_hashes = {}
+        self.cell_hashes = {}
+        self.data_hash = data_hash(data)
+        if resume_flag and os.path.isfile(self.journal_path):
+            self.read()
+            logging.warning('  Resuming run, {} completed crops in journal'.format(
+                len(self.entries)))
+
+        # Journal is rewritten with valid entries only
+        # so incomplete line of crashed run is dropped
+
+        self.journal_f = open(self.journal_path, 'w')
+        for (cell_id, crop_num), hashes in sorted(self.entries.items()):
+            self.write_entry(cell_id, crop_num, *hashes)
+        self.journal_f.flush()
+
+    def read(self):
+        """Read completed (cell, crop) entries of existing journal
+
+        Incomplete last line of crashed run is ignored
+        """
+        with open(self.journal_path, 'r') as journal_f:
+            for line in journal_f:
+                values = line.strip().split(',')
+                if len(values) != 4 or len(values[3]) != 32:
+                    continue
+                try:
+                    crop_num = int(values[1])
+                except ValueError:
+                    continue
+                self.entries[(values[0], crop_num)] = (values[2], values[3])
+
+    def set_cell_input(self, et_cell, input_hash = None):
+        """Set input hash of cell once input time series are loaded
+
+        Args:
+            et_cell (): ETCell instance
+            input_hash (str): hash computed by cell_input_hash(),
+                computed from et_cell if not set
+        """
+        if input_hash is None:
+            input_hash = cell_input_hash(et_cell)
+        self.input_hashes[et_cell.cell_id] = input_hash
+        self.cell_hashes.pop(et_cell.cell_id, None)
+
+    def crop_hashes(self, et_cell, crop):
+        """Return input and parameter hashes of (cell, crop)
+
+        Args:
+            et_cell (): ETCell instance
+            crop (): crop parameters
+
+        Returns:
+            tuple of input hash and parameter hash
+        """
+        if et_cell.cell_id not in self.cell_hashes:
+            self.cell_hashes[et_cell.cell_id] = cell_param_hash(
+                et_cell, self.data_hash)
+        md5 = hashlib.md5()
+        md5.update(self.cell_hashes[et_cell.cell_id])
+        update_hash(md5, crop)
+        return self.input_hashes[et_cell.cell_id], md5.hexdigest()
+
+    def is_done(self, data, et_cell, crop):
+        """Check if (cell, crop) was completed with same inputs and parameters
+
+        Args:
+            data (): configuration data
+            et_cell (): ETCell instance
+            crop (): crop parameters
+
+        Returns:
+            Bool
+        """
+        entry = self.entries.get((et_cell.cell_id, crop.class_number))
+        if entry is None or entry != self.crop_hashes(et_cell, crop):
+            return False
+        for output_path in crop_output_paths(data, et_cell, crop):
+            if not os.path.isfile(output_path):
+                return False
+        return True
+
+    def skip_done_crops(self, data, et_cell):
+        """Turn off crops of cell that are already done
+
+        RDB and HDF5 output by cell have all crops of a cell in one file,
+        so crops are only skipped when whole cell is done.
+
+        Args:
+            data (): configuration data
+            et_cell (): ETCell instance
+
+        Returns:
+            original crop flags of cell, restore with record_cell()
+        """
+        crop_flags = et_cell.crop_flags
+        done_list = [
+            crop_num for crop_num, crop in et_cell.crop_params.items()
+            if crop_flags[crop_num] and self.is_done(data, et_cell, crop)]
+        if not done_list:
+            return crop_flags
+        if (single_file_cells(data) and
+                len(done_list) < sum(map(bool, crop_flags.values()))):
+            return crop_flags
+        logging.warning('  Skipping {} completed crops'.format(len(done_list)))
+        et_cell.crop_flags = dict(crop_flags)
+        for crop_num in done_list:
+            et_cell.crop_flags[crop_num] = 0
+        return crop_flags
+
+    def record(self, et_cell, crop):
+        """Record completed (cell, crop) output
+
+        Args:
+            et_cell (): ETCell instance
+            crop (): crop parameters
+        """
+        input_hash, param_hash = self.crop_hashes(et_cell, crop)
+        self.entries[(et_cell.cell_id, crop.class_number)] = (
+            input_hash, param_hash)
+        self.write_entry(
+            et_cell.cell_id, crop.class_number, input_hash, param_hash)
+        self.journal_f.flush()
+
+    def write_entry(self, cell_id, crop_num, input_hash, param_hash):
+        """ """
+        self.journal_f.write('{},{},{},{}\n'.format(
+            cell_id, crop_num, input_hash, param_hash))
+
+    def record_cell(self, et_cell, crop_flags):
+        """Record all computed crops of cell and restore crop flags
+
+        Args:
+            et_cell (): ETCell instance
+            crop_flags (dict): crop flags returned by skip_done_crops()
+        """
+        for crop_num, crop in sorted(et_cell.crop_params.items()):
+            if et_cell.crop_flags[crop_num]:
+                self.record(et_cell, crop)
+        et_cell.crop_flags = crop_flags
+
+    def close(self):
+        """ """
+        self.journal_f.flush()
+        os.fsync(self.journal_f.fileno())
+        self.journal_f.close()
+
+def crop_output_paths(data, et_cell, crop):
+    """Output files written for (cell, crop) by write_crop_output()
+
+    Args:
+        data (): configuration data
+        et_cell (): ETCell instance
+        crop (): crop parameters
+
+    Returns:
+        list of file paths
+    """
+    if data.cet_out['data_structure_type'].upper() == 'DRI':
+        output_name = data.cet_out['name_format'].replace(
+            '%c', '%02d' % int(crop.class_number)) % et_cell.cell_id
+    else:    # RDB
+        output_name = data.cet_out['name_format'].replace(
+            '%c', '').replace('__', '_') % et_cell.cell_id
+    output_paths = []
+    for output_key in ['daily', 'monthly', 'annual']:
+        if not data.cet_out[output_key + '_output_flag']:
+            continue
+        if data.cet_out['data_structure_type'] in columnar_output.structure_types:
+            output_paths.append(columnar_output.crop_output_path(
+                data, data.cet_out[output_key + '_output_ws'], et_cell, crop))
+        else:
+            output_paths.append(os.path.join(
+                data.cet_out[output_key + '_output_ws'], output_name))
+    if data.cube_output_flag:
+        output_paths.append(os.path.join(
+            data.cube_output_ws, results_cube.cube_name))
+    if data.gs_output_flag:
+        if data.gs_name_format is None:
+            output_paths.append(os.path.join(
+                data.gs_output_ws, '{0}_gs_crop_{1:02d}.csv'.format(
+                    et_cell.cell_id, int(crop.class_number))))
+        else:
+            output_paths.append(os.path.join(
+                data.gs_output_ws, data.gs_name_format.replace(
+                    '%c', '%02d' % int(crop.class_number)) % et_cell.cell_id))
+    return output_paths
+
+def single_file_cells(data):
+    """Check if all crops of a cell are written to one output file
+
+    Args:
+        data (): configuration data
+
+    Returns:
+        Bool
+    """
+    return (data.cet_out['data_structure_type'].upper() == 'RDB' or (
+        data.cet_out['data_structure_type'] == 'HDF5' and
+        columnar_output.cell_layout(data)))
+
+def cell_input_hash(et_cell):
+    """Hash of refet, weather and climate time series of cell
+
+    Args:
+        et_cell (): ETCell instance with processed climate
+
+    Returns:
+        str
+    """
+    md5 = hashlib.md5()
+    update_hash(md5, et_cell.refet_df)
+    update_hash(md5, et_cell.climate_df)
+    return md5.hexdigest()
+
+def data_hash(data):
+    """Hash of configuration data that can change crop results
+
+    Args:
+        data (): configuration data
+
+    Returns:
+        str
+    """
+    md5 = hashlib.md5()
+    update_hash(md5, dict([
+        (k, v) for k, v in data.__dict__.items()
+        if k not in data_hash_skip_list]))
+    return md5.hexdigest()
+
+def cell_param_hash(et_cell, data_hash_str):
+    """Hash of cell properties and crop coefficients shared by crops of cell
+
+    Winter cover crops (44-46) are included since their parameters are
+    used by all crops outside of growing season.
+
+    Args:
+        et_cell (): ETCell instance
+        data_hash_str (str): hash returned by data_hash()
+
+    Returns:
+        str
+    """
+    md5 = hashlib.md5()
+    md5.update(data_hash_str)
+    update_hash(md5, dict([
+        (k, v) for k, v in et_cell.__dict__.items()
+        if isinstance(v, (basestring, numbers.Number))]))
+    update_hash(md5, et_cell.crop_coeffs)
+    update_hash(md5, [
+        et_cell.crop_params.get(crop_num) for crop_num in [44, 45, 46]])
+    return md5.hexdigest()
+
+def update_hash(md5, value):
+    """Update hash with repeatable representation of value
+
+    Args:
+        md5 (): hashlib hash object
+        value (): value to hash
+    """
+    if isinstance(value, dict):
+        md5.update('{')
+        for key in sorted(value.keys(), key = repr):
+            update_hash(md5, key)
+            update_hash(md5, value[key])
+        md5.update('}')
+    elif isinstance(value, (list, tuple)):
+        md5.update('[')
+        for item in value:
+            update_hash(md5, item)
+        md5.update(']')
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        update_hash(md5, value.index)
+        if isinstance(value, pd.DataFrame):
+            update_hash(md5, list(value.columns))
+        update_hash(md5, value.values)
+    elif isinstance(value, pd.Index):
+        update_hash(md5, value.values)
+    elif isinstance(value, np.ndarray):
+        md5.update(str(value.dtype) + str(value.shape))
+        if value.dtype == object:
+            md5.update(repr(value.tolist()))
+        else:
+            md5.update(np.ascontiguousarray(value).tobytes())
+    elif (value is None or
+            isinstance(value, (basestring, numbers.Number, np.generic,
+                               datetime.date, datetime.datetime))):
+        md5.update(repr(value))
+    elif hasattr(value, '__dict__'):
+        md5.update(type(value).__name__)
+        update_hash(md5, value.__dict__)
+    else:
+        md5.update(repr(value))
@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+
+# Fast delimited text output of DataFrames
+# Writes same bytes as DataFrame.to_csv() for the options used by
+# ET-Demands (DRI/RDB crop output and refET/met output), but formats
+# whole columns at once and writes each block of rows with one write.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# Rows formatted and written per write call
+
+block_rows = 10000
+
+# Date formats that are formatted with numpy.datetime_as_string()
+
+date_units = {'%Y-%m-%d': 'D', '%Y-%m': 'M', '%Y': 'Y'}
+
+def write_csv(output_df, path_or_buf, sep = ',', na_rep = '',
+              float_format = None, columns = None, header = True,
+              index = True, mode = 'w', date_format = None,
+              column_formats = None):
+    """Write DataFrame to delimited text file
+
+    Arguments match DataFrame.to_csv().  Values of column_formats columns
+    are formatted with their own format string (i.e. ' %4d' for year).
+    Frames with other index or value types are written by to_csv().
+
+    Args:
+        output_df (): DataFrame to write
+        path_or_buf (): file path or open file
+        sep (str): field delimiter
+        na_rep (str): missing value representation
+        float_format (str): format of float values
+        columns (list): columns to write, all columns if None
+        header (bool): If True, write column names
+        index (bool): If True, write index
+        mode (str): file mode when path is given
+        date_format (str): format of datetime values
+        column_formats (dict): format strings of columns
+
+    Returns:
+        None
+    """
+    if columns is None:
+        columns = list(output_df.columns)
+    else:
+        columns = list(columns)
+    if column_formats is None:
+        column_formats = {}
+    if (not isinstance(header, bool) or
+            not fast_write_flag(output_df, columns, sep, index)):
+        if column_formats:
+            output_df = output_df.copy()
+            for field, field_format in column_formats.items():
+                if field in columns:
+                    output_df[field] = output_df[field].map(
+                        lambda x: field_format % x)
+        output_df.to_csv(
+            path_or_buf, sep = sep, na_rep = na_rep,
+            float_format = float_format, columns = columns, header = header,
+            index = index, mode = mode, date_format = date_format)
+        return
+    if isinstance(path_or_buf, basestring):
+        with open(path_or_buf, mode) as output_f:
+            write_blocks(
+                output_f, output_df, sep, na_rep, float_format, columns,
+                header, index, date_format, column_formats)
+    else:
+        write_blocks(
+            path_or_buf, output_df, sep, na_rep, float_format, columns,
+            header, index, date_format, column_formats)
+
+def fast_write_flag(output_df, columns, sep, index):
+    """Check if frame has index and column types supported by write_blocks()
+
+    Args:
+        output_df (): DataFrame to write
+        columns (list): columns to write
+        sep (str): field delimiter
+        index (bool): If True, index is written
+
+    Returns:
+        Bool
+    """
+    if len(sep) != 1 or sep in '"\r\n':
+        return False
+    if len(columns) + int(bool(index)) < 2:
+        return False
+    if index and (not isinstance(output_df.index, pd.DatetimeIndex) or
+                  output_df.index.tz is not None):
+        return False
+    if output_df.columns.duplicated().any():
+        return False
+    for field in columns:
+        field_dtype = output_df[field].dtype
+        if (not isinstance(field_dtype, np.dtype) or
+                field_dtype.kind not in 'biufOM'):
+            return False
+    for field in columns:
+        values = output_df[field].values
+        if values.dtype == object and not text_values_flag(values):
+            return False
+    return True
+
+def text_values_flag(values):
+    """Check if object values are text or missing values
+
+    Args:
+        values (): numpy object array
+
+    Returns:
+        Bool
+    """
+    for value in set(values.tolist()):
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            continue
+        if not isinstance(value, str):
+            return False
+    return True
+
+def quote_values(text_values, sep):
+    """Quote text values like csv writer with minimal quoting
+
+    Values with delimiter, quote or line end characters are quoted
+    and quotes in values are doubled.
+
+    Args:
+        text_values (list): text values
+        sep (str): field delimiter
+
+    Returns:
+        list of str
+    """
+    joined_values = ''.join(text_values)
+    if (sep not in joined_values and '"' not in joined_values and
+            '\n' not in joined_values and '\r' not in joined_values):
+        return text_values
+    return [
+        '"' + value.replace('"', '""') + '"'
+        if (sep in value or '"' in value or '\n' in value or '\r' in value)
+        else value
+        for value in text_values]
+
+def write_blocks(output_f, output_df, sep, na_rep, float_format, columns,
+                 header, index, date_format, column_formats):
+    """Format and write header and rows in blocks of rows
+
+    Args:
+        output_f (): open file
+        output_df (): DataFrame to write
+        sep (str): field delimiter
+        na_rep (str): missing value representation
+        float_format (str): format of float values
+        columns (list): columns to write
+        header (bool): If True, write column names
+        index (bool): If True, write index
+        date_format (str): format of datetime values
+        column_formats (dict): format strings of columns
+    """
+    line_end = os.linesep
+    if header:
+        names = [str(field) for field in columns]
+        if index:
+            names.insert(0, str(output_df.index.name or ''))
+        output_f.write(sep.join(quote_values(names, sep)) + line_end)
+    row_template = sep.replace('%', '%%').join(
+        ['%s'] * (len(columns) + int(bool(index)))) + line_end
+    for block_start in range(0, len(output_df.index), block_rows):
+        block_end = min(block_start + block_rows, len(output_df.index))
+        block_values = []
+        if index:
+            block_values.append(format_values(
+                output_df.index.values[block_start:block_end],
+                na_rep, float_format, date_format, None))
+        for field in columns:
+            block_values.append(format_values(
+                output_df[field].values[block_start:block_end],
+                na_rep, float_format, date_format,
+                column_formats.get(field)))
+        row_values = np.empty(
+            (block_end - block_start, len(block_values)), dtype = object)
+        for field_i, field_values in enumerate(block_values):
+            row_values[:, field_i] = quote_values(field_values.tolist(), sep)
+        output_f.write(
+            (row_template * (block_end - block_start)) %
+            tuple(row_values.ravel().tolist()))
+
+def format_values(values, na_rep, float_format, date_format, value_format):
+    """Text values of column as written by DataFrame.to_csv()
+
+    Args:
+        values (): numpy array of column
+        na_rep (str): missing value representation
+        float_format (str): format of float values
+        date_format (str): format of datetime values
+        value_format (str): format string of column, overrides dtype rules
+
+    Returns:
+        numpy array of str or object
+    """
+    if np.issubdtype(values.dtype, np.datetime64):
+        return format_dates(values, na_rep, date_format)
+    if values.dtype == object:
+        mask = pd.isnull(values)
+    elif np.issubdtype(values.dtype, np.floating):
+        mask = np.isnan(values)
+    else:
+        mask = None
+    if value_format is not None:
+        text_values = format_with(values, mask, value_format)
+    elif np.issubdtype(values.dtype, np.floating) and float_format is not None:
+        text_values = format_with(values, mask, float_format)
+    elif values.dtype == np.float64:
+
+        # repr of float64 is same shortest round trip text as astype(str)
+
+        text_values = format_with(values, mask, '%r')
+    elif values.dtype == object:
+        text_values = values.copy()
+    else:
+        text_values = values.astype(str)
+    if mask is not None and mask.any():
+        text_values = text_values.astype(object)
+        text_values[mask] = na_rep
+    return text_values
+
+def format_with(values, mask, value_format):
+    """Format values with format string in one string operation
+
+    Args:
+        values (): numpy array
+        mask (): missing value mask or None
+        value_format (str): format string of one value
+
+    Returns:
+        numpy array of object
+    """
+    text_values = np.empty(len(values), dtype = object)
+    if mask is None:
+        valid = np.ones(len(values), dtype = bool)
+    else:
+        valid = ~mask
+    valid_values = values[valid].tolist()
+    if valid_values:
+        text_values[valid] = ('\0'.join([value_format] * len(valid_values)) %
+                              tuple(valid_values)).split('\0')
+    return text_values
+
+def format_dates(values, na_rep, date_format):
+    """Text values of datetime column as written by DataFrame.to_csv()
+
+    Args:
+        values (): numpy datetime64 array
+        na_rep (str): missing value representation
+        date_format (str): date format
+
+    Returns:
+        numpy array of str or object
+    """
+    values = values.astype('datetime64[ns]')
+    mask = np.isnat(values)
+
+    # Default format of dates without times is same as '%Y-%m-%d'
+
+    if (date_format is None and not mask.any() and
+            (values.astype('datetime64[D]') == values).all()):
+        date_format = '%Y-%m-%d'
+    if date_format in date_units and not mask.any():
+        unit = date_units[date_format]
+        return np.datetime_as_string(
+            values.astype('datetime64[{}]'.format(unit)), unit = unit).astype(str)
+    return np.array(pd.DatetimeIndex(values)._format_native_types(
+        date_format = date_format, na_rep = na_rep), dtype = object)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+# Fast columnar reading of dBASE (.dbf) attribute tables
+# All records are read with one read call into a numpy record array of
+# fixed width text fields, and numeric fields are converted a whole
+# column at a time.  Tables can be kept as binary .npz files keyed by
+# content hash of dbf file, so unchanged tables are not parsed again.
+
+import hashlib
+import logging
+import os
+import struct
+
+import numpy as np
+
+# Field types converted to float64 (missing values are NaN)
+
+numeric_types = 'NF'
+
+table_prefix = 'dbf_'
+
+def read_dbf_table(dbf_path, cache_ws = None):
+    """Read dbf table into typed columns
+
+    Args:
+        dbf_path (str): file path of dbf table
+        cache_ws (str): folder of binary tables, tables are not kept if None
+
+    Returns:
+        tuple of list of field names and list of numpy arrays of columns
+        (float64 for numeric fields, text for other fields)
+    """
+    if cache_ws is None:
+        return read_dbf_columns(dbf_path)
+    table_path = os.path.join(
+        cache_ws, table_prefix + dbf_table_key(dbf_path) + '.npz')
+    if os.path.isfile(table_path):
+        try:
+            table = np.load(table_path, allow_pickle = False)
+            field_names = table['field_names'].tolist()
+            columns = [table['c{}'.format(i)] for i in range(len(field_names))]
+            table.close()
+            os.utime(table_path, None)
+            return field_names, columns
+        except Exception:
+            logging.warning('  Unable to read binary table {}'.format(table_path))
+    field_names, columns = read_dbf_columns(dbf_path)
+    table_dict = dict([('c{}'.format(i), c) for i, c in enumerate(columns)])
+    table_dict['field_names'] = np.array(field_names)
+
+    # Table is renamed into place so other processes never read partial table
+
+    temp_path = '{}.{}.tmp.npz'.format(
+        os.path.splitext(table_path)[0], os.getpid())
+    try:
+        if not os.path.isdir(cache_ws):
+            os.makedirs(cache_ws)
+        np.savez(temp_path, **table_dict)
+        if os.path.isfile(table_path):
+            os.remove(table_path)
+        os.rename(temp_path, table_path)
+    except (IOError, OSError):
+        logging.warning('  Unable to write binary table {}'.format(table_path))
+    return field_names, columns
+
+def dbf_table_key(dbf_path):
+    """Hash of dbf file content and of table reading code
+
+    Args:
+        dbf_path (str): file path of dbf table
+
+    Returns:
+        str
+    """
+    md5 = hashlib.md5()
+    with open(os.path.splitext(__file__)[0] + '.py', 'rb') as code_f:
+        md5.update(code_f.read())
+    with open(dbf_path, 'rb') as dbf_f:
+        for block in iter(lambda: dbf_f.read(1 << 20), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+def read_dbf_columns(dbf_path):
+    """Read all records of dbf table in one pass
+
+    Deleted records are skipped.  Text values are stripped.  Numeric
+    values that are blank or QGIS nulls (all '*') are NaN.
+
+    Args:
+        dbf_path (str): file path of dbf table
+
+    Returns:
+        tuple of list of field names and list of numpy arrays of columns
+    """
+    with open(dbf_path, 'rb') as dbf_f:
+        record_count, header_length, record_length = struct.unpack(
+            '<4xLHH20x', dbf_f.read(32))
+        field_count = (header_length - 33) // 32
+        field_names, field_types, field_sizes = [], [], []
+        for field_i in range(field_count):
+            name, field_type, size = struct.unpack(
+                '<11sc4xB15x', dbf_f.read(32))
+            field_names.append(name.split(b'\x00')[0].strip().decode('ascii'))
+            field_types.append(field_type.decode('ascii').upper())
+            field_sizes.append(size)
+        dbf_f.seek(header_length)
+        record_bytes = dbf_f.read(record_count * record_length)
+
+    # Fixed width text fields at their offsets within each record
+
+    field_offsets = list(np.cumsum([1] + field_sizes[:-1]))
+    record_dtype = np.dtype({
+        'names': ['deletion_flag'] + ['f{}'.format(i) for i in range(field_count)],
+        'formats': ['S1'] + ['S{}'.format(size) for size in field_sizes],
+        'offsets': [0] + field_offsets, 'itemsize': record_length})
+    records = np.frombuffer(
+        record_bytes, dtype = record_dtype,
+        count = len(record_bytes) // record_length)
+    records = records[records['deletion_flag'] == b' ']
+    columns = []
+    for field_i, field_type in enumerate(field_types):
+        text_values = np.char.strip(records['f{}'.format(field_i)])
+        if field_type in numeric_types:
+            columns.append(numeric_values(text_values))
+        else:
+            columns.append(text_values)
+    return field_names, columns
+
+def numeric_values(text_values):
+    """Convert text values of numeric field to float64
+
+    Args:
+        text_values (): numpy array of stripped text values
+
+    Returns:
+        numpy array of float64
+    """
+    text_values = np.char.strip(np.char.replace(
+        np.char.replace(text_values, b'\x00', b''), b'*', b''))
+    values = np.full(len(text_values), np.nan)
+    valid = text_values != b''
+    try:
+        values[valid] = text_values[valid].astype(np.float64)
+    except ValueError:
+        for i in np.flatnonzero(valid):
+            try:
+                values[i] = float(text_values[i])
+            except ValueError:
+                pass
+    return values
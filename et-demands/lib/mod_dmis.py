@@ -13,6 +13,9 @@ import numpy as np
 import openpyxl as op
 from openpyxl.utils.dataframe import dataframe_to_rows
 
+import mod_csv_input
+import mod_csv_output
+
 def is_leap_year(year_to_test):
     """Test if year is a leap year
     
@@ -215,11 +218,8 @@ def ReadOneColumnSlot(file_path, header_lines, names_line, stationToRead,
     lc_station = stationToRead.lower()
     lc_param = parameterToRead.lower()
     try:
-        # Get list of 0 based line numbers to skip - Ignore header but assume header was set as 1's based index
-        data_skip = [i for i in range(header_lines) if i + 1 <> names_line]
-        input_df = pd.read_table(file_path, engine = 'python',
-                header = names_line - len(data_skip) - 1, skiprows = data_skip, 
-                sep = valuesSeparator, na_values = mia_value)
+        input_df = mod_csv_input.read_delimited(file_path, header_lines, 
+                names_line, valuesSeparator, mia_value = mia_value)
         if input_df.empty:
             logging.error("No data read in file" + file_path)
             return return_df
@@ -242,7 +242,7 @@ def ReadOneColumnSlot(file_path, header_lines, names_line, stationToRead,
         
         # make sure that daily, monthly and annual data use end of period dates and do not include a time stamp
         
-        input_df['date'] = pd.to_datetime(input_df['date'])
+        input_df['date'] = mod_csv_input.parse_dates(input_df['date'])
         input_df.set_index('date', inplace = True)
         if time_step == 'day' or time_step == 'month' or time_step == 'year':
             input_df['year'] = input_df.index.year
@@ -256,9 +256,8 @@ def ReadOneColumnSlot(file_path, header_lines, names_line, stationToRead,
                 pydt = pd.to_datetime(datetime.datetime(2000, wyem, 1, pydt.hour, pydt.minute))
                 pydt = pd.to_datetime(datetime.datetime(pydt.year, pydt.month, pydt.days_in_month, pydt.hour, pydt.minute))
                 input_df['day'] = pydt.days_in_month
-            input_df['date'] = input_df[['year', 'month', 'day']].apply(
-                lambda s : datetime.datetime(*s),axis = 1)
-            input_df['date'] = pd.to_datetime(input_df['date'])
+            input_df['date'] = mod_csv_input.ymd_dates(
+                input_df['year'], input_df['month'], input_df['day'])
             input_df.set_index('date', inplace = True)
         
         # verify period
@@ -349,8 +348,8 @@ def ReadOneTextRDB(file_path, header_lines, names_line, stationToRead,
         if names_line == 0:
             # default column names and locations
             
-            input_df = pd.read_table(file_path, engine = 'python', 
-                    header = None, sep = valuesSeparator, na_values = mia_value)
+            input_df = mod_csv_input.read_delimited(file_path, 0, 0, 
+                    valuesSeparator, mia_value = mia_value)
             if input_df.empty:
                 logging.error("No data read in file" + file_path)
                 return return_df
@@ -363,11 +362,8 @@ def ReadOneTextRDB(file_path, header_lines, names_line, stationToRead,
         else:
             # dynamic column names and location
             
-            # Get list of 0 based line numbers to skip - Ignore header but assume header was set as 1's based index
-            data_skip = [i for i in range(header_lines) if i + 1 <> names_line]
-            input_df = pd.read_table(file_path, engine = 'python',
-                    header = names_line - len(data_skip) - 1, skiprows = data_skip, 
-                    na_values = mia_value, sep = valuesSeparator)
+            input_df = mod_csv_input.read_delimited(file_path, header_lines, 
+                    names_line, valuesSeparator, mia_value = mia_value)
             if input_df.empty:
                 logging.error("No data read in file" + file_path)
                 return return_df
@@ -438,7 +434,7 @@ def ReadOneTextRDB(file_path, header_lines, names_line, stationToRead,
         if time_step == 'year' and len(str(input_df['date'][0])) == 4:
             input_df['date'] = pd.to_datetime(input_df['date'], format = '%Y')
         else:
-            input_df['date'] = pd.to_datetime(input_df['date'])
+            input_df['date'] = mod_csv_input.parse_dates(input_df['date'])
         input_df.set_index('date', inplace = True)
         
         # set starting and ending dates
@@ -632,11 +628,8 @@ def ColumnSlotToDataframe(file_path, header_lines, names_line,
     """
     return_df = None
     try:
-        # Get list of 0 based line numbers to skip - Ignore header but assume header was set as 1's based index
-        data_skip = [i for i in range(header_lines) if i + 1 <> names_line]
-        input_df = pd.read_table(file_path, engine = 'python', 
-                header = names_line - len(data_skip) - 1, skiprows = data_skip, 
-                sep = valuesSeparator, na_values = mia_value)
+        input_df = mod_csv_input.read_delimited(file_path, header_lines, 
+                names_line, valuesSeparator, mia_value = mia_value)
         if input_df.empty:
             logging.error("No data read in file" + file_path)
             return return_df
@@ -654,7 +647,7 @@ def ColumnSlotToDataframe(file_path, header_lines, names_line,
         
         # make sure that daily, monthly and annual data use end of period dates and do not include a time stamp
         
-        input_df['date'] = pd.to_datetime(input_df['date'])
+        input_df['date'] = mod_csv_input.parse_dates(input_df['date'])
         input_df.set_index('date', inplace = True)
         if time_step == 'day' or time_step == 'month' or time_step == 'year':
             input_df['year'] = input_df.index.year
@@ -668,9 +661,8 @@ def ColumnSlotToDataframe(file_path, header_lines, names_line,
                 pydt = pd.to_datetime(datetime.datetime(2000, wyem, 1, pydt.hour, pydt.minute))
                 pydt = pd.to_datetime(datetime.datetime(pydt.year, pydt.month, pydt.days_in_month, pydt.hour, pydt.minute))
                 input_df['day'] = pydt.days_in_month
-            input_df['date'] = input_df[['year', 'month', 'day']].apply(
-                lambda s : datetime.datetime(*s),axis = 1)
-            input_df['date'] = pd.to_datetime(input_df['date'])
+            input_df['date'] = mod_csv_input.ymd_dates(
+                input_df['year'], input_df['month'], input_df['day'])
             input_df.set_index('date', inplace = True)
         
         # verify period
@@ -730,8 +722,8 @@ def TextRDBToDataframe(file_path, header_lines, names_line,
         if names_line == 0:
             # default column names and locations
             
-            input_df = pd.read_table(file_path, engine = 'python', 
-                    header = None, sep = valuesSeparator, na_value = mia_value)
+            input_df = mod_csv_input.read_delimited(file_path, 0, 0, 
+                    valuesSeparator, mia_value = mia_value)
             if input_df.empty:
                 logging.error("No data read in file" + file_path)
                 return return_df
@@ -744,11 +736,8 @@ def TextRDBToDataframe(file_path, header_lines, names_line,
         else:
             # dynamic column names and location
             
-            # Get list of 0 based line numbers to skip - Ignore header but assume header was set as 1's based index
-            data_skip = [i for i in range(header_lines) if i + 1 <> names_line]
-            input_df = pd.read_table(file_path, engine = 'python',
-                    header = names_line - len(data_skip) - 1, skiprows = data_skip, 
-                    na_values = mia_value, sep = valuesSeparator)
+            input_df = mod_csv_input.read_delimited(file_path, header_lines, 
+                    names_line, valuesSeparator, mia_value = mia_value)
             if input_df.empty:
                 logging.error("No data read in file" + file_path)
                 return return_df
@@ -799,7 +788,7 @@ def TextRDBToDataframe(file_path, header_lines, names_line,
         if time_step == 'year' and len(str(input_df['date'][0])) == 4:
             input_df['date'] = pd.to_datetime(input_df['date'], format = '%Y')
         else:
-            input_df['date'] = pd.to_datetime(input_df['date'])
+            input_df['date'] = mod_csv_input.parse_dates(input_df['date'])
         pysdt = input_df['date'][0]
         pyedt = input_df['date'][len(input_df) - 1]
         if time_step == 'year':
@@ -1036,6 +1025,72 @@ def ReadOneDataframeColumn(input_df, stationToRead, parameterToRead, units,
         logging.error('\nERROR: ' + str(sys.exc_info()[0]) + ' Error occurred reading column data from dataframe')
         return return_df
 
+class StationStore():
+    """Multi-station time series of one parameter indexed by station
+
+    Values of all stations are read from file once and kept in one
+    column ordered array so that each station is sliced without
+    searching or copying file data.
+    """
+    def __init__(self, input_df):
+        """Initialize store from columnar dataframe
+
+        Args:
+            input_df: dataframe with one column per station and parameter
+        """
+        self.index = input_df.index
+        self.columns = list(input_df.columns)
+        self.values = np.asfortranarray(input_df.values, dtype = np.float64)
+
+        # column numbers by lower case station and parameter
+        # 'station.parameter' names are keyed directly, other names are
+        # found by searching on first request and then remembered
+
+        self.column_dict = {}
+        for column, column_name in enumerate(self.columns):
+            split_values = str(column_name).lower().split('.')
+            if len(split_values) == 2:
+                self.column_dict.setdefault(tuple(split_values), column)
+
+    def column_number(self, stationToRead, parameterToRead):
+        """Column number of station and parameter
+
+        Args:
+            stationToRead: station to read
+            parameterToRead: parameter to read
+
+        Returns:
+            column number or None if not found
+        """
+        key = (str(stationToRead).lower(), parameterToRead.lower())
+        if key not in self.column_dict:
+            self.column_dict[key] = None
+            for column, column_name in enumerate(self.columns):
+                lc_column = str(column_name).lower()
+                if key[0] in lc_column and key[1] in lc_column:
+                    self.column_dict[key] = column
+                    break
+        return self.column_dict[key]
+
+    def station_values(self, stationToRead, parameterToRead, scaleFactor = 1):
+        """Time series values of station and parameter
+
+        Args:
+            stationToRead: station to read
+            parameterToRead: parameter to read
+            scaleFactor: scale to apply to parameter
+
+        Returns:
+            numpy array or None if station and parameter are not found
+        """
+        column = self.column_number(stationToRead, parameterToRead)
+        if column is None:
+            logging.error("Unable to locate station " + str(stationToRead) + " and parameter " + parameterToRead + " in station store.")
+            return None
+        if scaleFactor == 1:
+            return self.values[:, column]
+        return self.values[:, column] * scaleFactor
+
 def csf_output_by_dataframe(file_path, delimiter, new_data_df, 
         float_format, date_format, date_is_posted, 
         mia_value = 'NaN'):
@@ -1055,21 +1110,11 @@ def csf_output_by_dataframe(file_path, delimiter, new_data_df,
     """
     logging.debug('  Posting specified data to a text column slot file')
     try:
-        if float_format is None:
-            if date_is_posted:
-                new_data_df.to_csv(path_or_buf = file_path, sep = delimiter, 
-                            date_format = date_format, na_rep = mia_value)
-            else:
-                new_data_df.to_csv(path_or_buf = file_path, sep = delimiter, 
-                            index = False, na_rep = mia_value)
-        else:    # formatted output causes loss of precision
-            if date_is_posted:
-                new_data_df.to_csv(path_or_buf = file_path, sep = delimiter, 
-                        date_format = date_format, float_format = float_format, 
-                        na_rep = mia_value)
-            else:
-                new_data_df.to_csv(path_or_buf = file_path, sep = delimiter,
-                        index = False, float_format = float_format, na_rep = mia_value)
+        # formatted output causes loss of precision
+
+        mod_csv_output.write_csv(new_data_df, file_path, sep = delimiter,
+                index = date_is_posted, date_format = date_format,
+                float_format = float_format, na_rep = mia_value)
         return True
     except:
         logging.error('\nERROR: ' + str(sys.exc_info()[0]) + 'occurred posting csv output data')
@@ -1116,12 +1161,8 @@ def rdb_output_by_df_nodate_formatting(file_path,
         # create consolidated rdb dataframe
             
         rdb_df = pd.concat(output_dict)
-        if float_format is None:
-            rdb_df.to_csv(path_or_buf = file_path, sep = delimiter, 
-                        index = False, na_rep = mia_value)
-        else:    # formatted output causes loss of precision
-            rdb_df.to_csv(path_or_buf = file_path, sep = delimiter,
-                    index = False, float_format = float_format, na_rep = mia_value)
+        mod_csv_output.write_csv(rdb_df, file_path, sep = delimiter,
+                index = False, float_format = float_format, na_rep = mia_value)
         return True
     except:
         logging.error('\nERROR: ' + str(sys.exc_info()[0]) + 'occurred posting rdb output data')
@@ -1162,22 +1203,9 @@ def rdb_output_by_dataframe(file_path, delimiter,
             column_df['Value'] = new_data_df[sta].values
             column_df['Station'] = station
             column_df['Parameter'] = param
-            if float_format is None:
-                if staCount == 0:
-                    column_df.to_csv(path_or_buf = file_path, sep = delimiter, 
-                                index = False, na_rep = mia_value)
-                else:
-                    column_df.to_csv(path_or_buf = file_path, sep = delimiter, 
-                                index = False, na_rep = mia_value,
-                                header = False, mode = 'a')
-            else:    # formatted output causes loss of precision
-                if staCount == 0:
-                    column_df.to_csv(path_or_buf = file_path, sep = delimiter,
-                        index = False, float_format = float_format, na_rep = mia_value)
-                else:
-                    column_df.to_csv(path_or_buf = file_path, sep = delimiter,
-                        index = False, float_format = float_format, na_rep = mia_value, 
-                        header = False, mode = 'a')
+            mod_csv_output.write_csv(column_df, file_path, sep = delimiter,
+                    index = False, float_format = float_format, na_rep = mia_value,
+                    header = staCount == 0, mode = 'w' if staCount == 0 else 'a')
             del column_df
         return True
     except:
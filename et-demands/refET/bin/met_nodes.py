@@ -11,6 +11,7 @@ import pandas as pd
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lib')))
 import refET
 import ret_utils
+import mod_csv_input
 import mod_dmis
 
 mpdToMps = 3.2808399 * 5280 / 86400
@@ -309,36 +310,38 @@ class MetNode():
 
         # contrain max temperatures to 120 F and min temperature to 90 F
 
-        self.input_met_df['tmax'] = self.input_met_df[['tmax']].apply(lambda s: ret_utils.max_max_temp(*s), axis = 1, raw = True, reduce = True)
-        self.input_met_df['tmin'] = self.input_met_df[['tmin']].apply(lambda s: ret_utils.max_min_temp(*s), axis = 1, raw = True, reduce = True)
+        self.input_met_df['tmax'] = ret_utils.max_max_temp(self.input_met_df['tmax'].values)
+        self.input_met_df['tmin'] = ret_utils.max_min_temp(self.input_met_df['tmin'].values)
+        months = self.input_met_df['month'].values
             
         # fill missing tmax data
 
         # interpolation fails if at least one value is not filled - used try and except to overcome
         
         try:    # fill by interpolation
-            self.input_met_df['tmax'].interpolate(method = 'time', limit = 3, limit_direction = 'both', inplace = True)
+            self.input_met_df['tmax'] = self.input_met_df['tmax'].interpolate(method = 'time', limit = 3, limit_direction = 'both')
         except: pass
         try:    # fill with average monthly values
-            for dt, month in self.input_met_df['month'].iteritems():
-                if pd.isnull(self.input_met_df.at[dt, 'tmax']):
-                   self.input_met_df.at[dt, 'tmax'] = mnd.avg_monthly_tmax[self.met_node_id][month - 1]
+            self.input_met_df['tmax'] = ret_utils.fill_from_avg_monthly_array(
+                self.input_met_df['tmax'].values, months, mnd.avg_monthly_tmax[self.met_node_id])
         except: pass
 
         # fill missing tmin data
 
         try:    # fill by interpolation
-            self.input_met_df['tmin'].interpolate(method = 'time', limit = 3, limit_direction = 'both', inplace = True)
+            self.input_met_df['tmin'] = self.input_met_df['tmin'].interpolate(method = 'time', limit = 3, limit_direction = 'both')
         except: pass
         try:    # fill with average monthly values
-            for dt, month in self.input_met_df['month'].iteritems():
-                if pd.isnull(self.input_met_df.at[dt, 'tmin']):
-                   self.input_met_df.at[dt, 'tmin'] = mnd.avg_monthly_tmin[self.met_node_id][month - 1]
+            self.input_met_df['tmin'] = ret_utils.fill_from_avg_monthly_array(
+                self.input_met_df['tmin'].values, months, mnd.avg_monthly_tmin[self.met_node_id])
         except: pass
             
-        # don't allow tmin to be more than tmax
+        # don't allow tmin to be more than tmax (same as max(tmax, tmin) of each day)
 
-        self.input_met_df['tmax'] = self.input_met_df[['tmax', 'tmin']].apply(lambda s: max(*s), axis = 1, raw = True, reduce = True)
+        tmax = self.input_met_df['tmax'].values
+        tmin = self.input_met_df['tmin'].values
+        with np.errstate(invalid = 'ignore'):
+            self.input_met_df['tmax'] = np.where(tmin > tmax, tmin, tmax)
 
         # Scale wind height to 2m if necessary
 
@@ -349,7 +352,7 @@ class MetNode():
             # fill missing wind by interpolation
             
             try:
-                self.input_met_df['wind'].interpolate(method = 'time', limit = 3, limit_direction = 'both', inplace = True)
+                self.input_met_df['wind'] = self.input_met_df['wind'].interpolate(method = 'time', limit = 3, limit_direction = 'both')
             except: pass
         else:
             self.input_met_df['wind'] = np.nan
@@ -357,9 +360,8 @@ class MetNode():
         # fill missing wind with average monthly values
 
         try:    # fill with average monthly values
-            for dt, month in self.input_met_df['month'].iteritems():
-                if pd.isnull(self.input_met_df.at[dt, 'wind']):
-                   self.input_met_df.at[dt, 'wind'] = mnd.avg_monthly_wind[self.wind_id][month - 1]
+            self.input_met_df['wind'] = ret_utils.fill_from_avg_monthly_array(
+                self.input_met_df['wind'].values, months, mnd.avg_monthly_wind[self.wind_id])
         except: pass
                 
         # Add precip, snow and snow_depth if necessary; otherwise, fill missing values with zeros
@@ -381,35 +383,42 @@ class MetNode():
         
         if 'tdew' in input_met_columns:
             try:    # fill by interpolation
-                self.input_met_df['tdew'].interpolate(method = 'time', limit = 3, limit_direction = 'both', inplace = True)
+                self.input_met_df['tdew'] = self.input_met_df['tdew'].interpolate(method = 'time', limit = 3, limit_direction = 'both')
             except: pass
         else:
             self.input_met_df['tdew'] = np.nan
             if 'q' in self.input_met_df.columns:
                 self.input_met_df['tdew'] = ret_utils.tdew_from_ea(ret_utils.ea_from_q(
                     self.air_pressure, self.input_met_df['q'].values))
-        try:    # fill missing values with tmin minus average monthly Ko
-            for dt, month in self.input_met_df['month'].iteritems():
-                if pd.isnull(self.input_met_df.at[dt, 'tdew']):
-                   self.input_met_df.at[dt, 'tdew'] = self.input_met_df.at[dt, 'tmin'] - mnd.avg_monthly_Ko[self.Ko_id][month - 1]
-        except:
-            logging.error('Unable to develop dew point temperature data.')
-            return False
+        tdew = self.input_met_df['tdew'].values
+        tdew_missing = np.isnan(tdew)
+        if tdew_missing.any():
+            try:    # fill missing values with tmin minus average monthly Ko
+                Ko = np.asarray(mnd.avg_monthly_Ko[self.Ko_id], dtype = np.float64)[months - 1]
+                self.input_met_df['tdew'] = np.where(tdew_missing, self.input_met_df['tmin'].values - Ko, tdew)
+            except:
+                logging.error('Unable to develop dew point temperature data.')
+                return False
 
         # compute solar radiation for missing values
 
         if 'rs' not in self.input_met_df.columns: self.input_met_df['rs'] = np.nan
-        try:
-            for dt, doy in self.input_met_df['doy'].iteritems():
-                if pd.isnull(self.input_met_df.at[dt, 'rs']):
-                   self.input_met_df.at[dt, 'rs'] = ret_utils.compute_rs(doy, self.input_met_df.at[dt, 'tmax'],
-                       self.input_met_df.at[dt,'tmin'], self.input_met_df.at[dt, 'tdew'], self.elevation, self.latitude,
-                       mnd.avg_monthly_tmax[self.met_node_id][self.input_met_df['month'][dt] - 1], 
-                       mnd.avg_monthly_tmin[self.met_node_id][self.input_met_df['month'][dt] - 1],
-                       self.TR_b0, self.TR_b1, self.TR_b2) 
-        except:
-            logging.error('Unable to develop solar radiation.')
-            return False
+        rs = self.input_met_df['rs'].values
+        rs_missing = np.isnan(rs)
+        if rs_missing.any():
+            try:
+                rs_months = months[rs_missing]
+                avg_tmax = np.asarray(mnd.avg_monthly_tmax[self.met_node_id], dtype = np.float64)[rs_months - 1]
+                avg_tmin = np.asarray(mnd.avg_monthly_tmin[self.met_node_id], dtype = np.float64)[rs_months - 1]
+                rs = rs.copy()
+                rs[rs_missing] = ret_utils.compute_rs(self.input_met_df['doy'].values[rs_missing],
+                    self.input_met_df['tmax'].values[rs_missing], self.input_met_df['tmin'].values[rs_missing],
+                    self.input_met_df['tdew'].values[rs_missing], self.elevation, self.latitude,
+                    avg_tmax, avg_tmin, self.TR_b0, self.TR_b1, self.TR_b2)
+                self.input_met_df['rs'] = rs
+            except:
+                logging.error('Unable to develop solar radiation.')
+                return False
         return True
 
     def SF_P_input_met_data(self, cfg):
@@ -431,13 +440,13 @@ class MetNode():
             return False
         logging.debug('  {0}'.format(input_met_path))
 
-        # Get list of 0 based line numbers to skip
-        # Ignore header but assume header was set as 1's based index
-        data_skip = [i for i in range(cfg.input_met['header_lines']) if i + 1 <> cfg.input_met['names_line']]
-        self.input_met_df = pd.read_table(input_met_path, engine = 'python',
-                header = cfg.input_met['names_line'] - len(data_skip) - 1, 
-                skiprows = data_skip, sep = cfg.input_met['delimiter'], 
-                na_values = 'NaN')
+        input_fields, value_fields = mod_csv_input.input_fields(cfg.input_met['fields'])
+        if cfg.time_step != 'day':
+            input_fields.append('hour')
+        self.input_met_df = mod_csv_input.read_delimited(input_met_path, 
+                cfg.input_met['header_lines'], cfg.input_met['names_line'], 
+                cfg.input_met['delimiter'], input_fields, value_fields, 
+                mia_value = 'NaN')
         logging.debug('  Columns: {0}'.format(', '.join(list(self.input_met_df.columns))))
 
         # Check fields
@@ -457,14 +466,16 @@ class MetNode():
         # Convert date strings to datetimes and index on date
         
         if cfg.input_met['fields']['date'] is not None:
-            self.input_met_df['date'] = pd.to_datetime(self.input_met_df['date'])
+            self.input_met_df['date'] = mod_csv_input.parse_dates(self.input_met_df['date'])
         else:
             if cfg.time_step == 'day':
-                self.input_met_df['date'] = self.input_met_df[['year', 'month', 'day']].apply(
-                    lambda s : datetime.datetime(*s),axis = 1)
+                self.input_met_df['date'] = mod_csv_input.ymd_dates(
+                    self.input_met_df['year'], self.input_met_df['month'], 
+                    self.input_met_df['day'])
             else:
-                self.input_met_df['date'] = self.input_met_df[['year', 'month', 'day', 'hour']].apply(
-                    lambda s : datetime.datetime(*s),axis = 1)
+                self.input_met_df['date'] = mod_csv_input.ymd_dates(
+                    self.input_met_df['year'], self.input_met_df['month'], 
+                    self.input_met_df['day'], self.input_met_df['hour'])
         self.input_met_df.set_index('date', inplace = True)
 
         # verify period
@@ -581,90 +592,40 @@ class MetNode():
         try:
             # construct ref et object and set up output
             
-	    retObj = refET.refET(cfg.input_met['TR_b0'], cfg.input_met['TR_b1'], cfg.input_met['TR_b2'])
+            retObj = refET.refET(cfg.input_met['TR_b0'], cfg.input_met['TR_b1'], cfg.input_met['TR_b2'])
             ret_df = mod_dmis.make_ts_dataframe(cfg.time_step, cfg.ts_quantity, cfg.start_dt, cfg.end_dt)
             for fn in cfg.refet_out['refet_out_fields']: ret_df[fn] = np.nan
             if cfg.output_met_flag:
                 self.ref_et_df = mod_dmis.make_ts_dataframe(cfg.time_step, cfg.ts_quantity, cfg.start_dt, cfg.end_dt)
                 self.ref_et_df['ref_et'] = np.nan
-            for dt, row in self.input_met_df.iterrows():
-                HargreavesSamani = retObj.ComputeHargreavesSamaniRefET(dt.dayofyear, row['tmax'],
-                                   row['tmin'], self.latitude)
-	        penmans = retObj.ComputePenmanRefETs(dt.year, dt.month, dt.day, dt.dayofyear,
-	                  cfg.time_step, row['tmax'], row['tmin'], row['tdew'],
-	                  row['rs'], row['wind'], self.elevation, self.latitude)
-	        Penman, PreTay, KimbPeng, ASCEr, ASCEo, FAO56PM, KimbPen = penmans
-                if 'harg' in cfg.refet_out['refet_out_fields']: ret_df['harg'][dt] = HargreavesSamani
-	        if 'penm' in cfg.refet_out['refet_out_fields']: ret_df['penm'][dt] = Penman
-	        if 'pretay' in cfg.refet_out['refet_out_fields']: ret_df['pretay'][dt] = PreTay
-	        if 'kimo' in cfg.refet_out['refet_out_fields']: ret_df['kimo'][dt] = KimbPeng
-	        if 'ascer' in cfg.refet_out['refet_out_fields']: ret_df['ascer'][dt] = ASCEr
-	        if 'asceg' in cfg.refet_out['refet_out_fields']: ret_df['asceg'][dt] = ASCEo
-	        if 'fao56' in cfg.refet_out['refet_out_fields']: ret_df['fao56'][dt] = FAO56PM
-	        if 'kimp' in cfg.refet_out['refet_out_fields']: ret_df['kimp'][dt] = KimbPeng
-	        
-	        # create ref et dataframe for posting via optional met output
-
-                if cfg.output_met_flag:
-                    if cfg.refet_out['ret_method'].lower() == 'asceg':
-                        self.ref_et_df['ref_et'][dt] = ASCEo
-                    elif cfg.refet_out['ret_method'].lower() == 'ascer':
-      	                self.ref_et_df['ref_et'][dt] = ASCEr
-                    elif cfg.refet_out['ret_method'].lower() == 'fao56':
-  	                self.ref_et_df['ref_et'][dt] = FAO56PM
-                    elif cfg.refet_out['ret_method'].lower() == 'harg':
-  	                self.ref_et_df['ref_et'][dt] = HargreavesSamani
-                    elif cfg.refet_out['ret_method'].lower() == 'penm':
-  	                self.ref_et_df['ref_et'][dt] = Penman
-                    elif cfg.refet_out['ret_method'].lower() == 'kimo':
-  	                self.ref_et_df['ref_et'][dt] = KimbPeng
-                    elif cfg.refet_out['ret_method'].lower() == 'kimp':
-  	                self.ref_et_df['ref_et'][dt] = KimbPen
-                    elif cfg.refet_out['ret_method'].lower() == 'pretay':
-                        self.ref_et_df['ref_et'][dt] = PreTay
-	        if 'ret' in cfg.refet_out['refet_out_fields']:
-                    if cfg.refet_out['ret_method'].lower() == 'asceg':
-                        ret_df['ret'][dt] = ASCEo
-                    elif cfg.refet_out['ret_method'].lower() == 'ascer':
-  	                ret_df['ret'][dt] = ASCEr
-                    elif cfg.refet_out['ret_method'].lower() == 'fao56':
-  	                ret_df['ret'][dt] = FAO56PM
-                    elif cfg.refet_out['ret_method'].lower() == 'harg':
-  	                ret_df['ret'][dt] = HargreavesSamani
-                    elif cfg.refet_out['ret_method'].lower() == 'penm':
-  	                ret_df['ret'][dt] = Penman
-                    elif cfg.refet_out['ret_method'].lower() == 'kimo':
-  	                ret_df['ret'][dt] = KimbPeng
-                    elif cfg.refet_out['ret_method'].lower() == 'kimp':
-  	                ret_df['ret'][dt] = KimbPen
-                    elif cfg.refet_out['ret_method'].lower() == 'pretay':
-                        ret_df['ret'][dt] = PreTay
-	        if 'eto' in cfg.refet_out['refet_out_fields']:
-                    if cfg.refet_out['eto_method'].lower() == 'asceg':
-                        ret_df['eto'][dt] = ASCEo
-                    elif cfg.refet_out['eto_method'].lower() == 'fao56':
-  	                ret_df['eto'][dt] = FAO56PM
-                    elif cfg.refet_out['eto_method'].lower() == 'harg':
-  	                ret_df['eto'][dt] = HargreavesSamani
-                    elif cfg.refet_out['eto_method'].lower() == 'penm':
-  	                ret_df['eto'][dt] = Penman
-                    elif cfg.refet_out['eto_method'].lower() == 'kimo':
-  	                ret_df['eto'][dt] = KimbPeng
-                    elif cfg.refet_out['eto_method'].lower() == 'pretay':
-                        ret_df['eto'][dt] = PreTay
-	        if 'etr' in cfg.refet_out['refet_out_fields']:
-                    if cfg.refet_out['etr_method'].lower() == 'ascer':
-  	                ret_df['etr'][dt] = ASCEr
-                    elif cfg.refet_out['etr_method'].lower() == 'fao56':
-  	                ret_df['etr'][dt] = FAO56PM
-                    elif cfg.refet_out['etr_method'].lower() == 'harg':
-  	                ret_df['etr'][dt] = HargreavesSamani
-                    elif cfg.refet_out['etr_method'].lower() == 'penm':
-  	                ret_df['etr'][dt] = Penman
-                    elif cfg.refet_out['etr_method'].lower() == 'kimp':
-  	                ret_df['etr'][dt] = KimbPen
-                    elif cfg.refet_out['etr_method'].lower() == 'pretay':
-                        ret_df['etr'][dt] = PreTay
+
+            # ref et methods of output fields, of ret, eto and etr fields and of met output
+
+            ret_methods = [fn for fn in cfg.refet_out['refet_out_fields'] if fn in refET.ret_methods]
+            for fn in ['ret', 'eto', 'etr']:
+                if fn in cfg.refet_out['refet_out_fields']:
+                    ret_methods.append(cfg.refet_out[fn + '_method'].lower())
+            if cfg.output_met_flag and 'refet' in cfg.used_output_met_fields:
+                ret_methods.append(cfg.refet_out['ret_method'].lower())
+
+            # compute only those ref et's of whole record and post them by column
+
+            tmax, tmin, tdew, rs, wind = self.input_met_df[['tmax', 'tmin', 'tdew', 'rs', 'wind']].values.T
+            ret_arrays = retObj.ComputeRefETArrays(self.input_met_df.index.dayofyear,
+                    self.input_met_df.index.day, cfg.time_step, tmax, tmin, tdew, rs, wind,
+                    self.elevation, self.latitude, set(ret_methods))
+            ret_series = dict([(method, pd.Series(values, index = self.input_met_df.index))
+                               for method, values in ret_arrays.items()])
+            for fn in cfg.refet_out['refet_out_fields']:
+                if fn in ret_series: ret_df[fn] = ret_series[fn]
+
+            # create ref et dataframe for posting via optional met output
+
+            if cfg.output_met_flag and 'refet' in cfg.used_output_met_fields:
+                self.ref_et_df['ref_et'] = ret_series[cfg.refet_out['ret_method'].lower()]
+            for fn in ['ret', 'eto', 'etr']:
+                if fn in cfg.refet_out['refet_out_fields']:
+                    ret_df[fn] = ret_series[cfg.refet_out[fn + '_method'].lower()]
             try:
                 daily_refet_df = pd.merge(self.input_met_df, ret_df, left_index = True, right_index = True)
             except:
@@ -1,6 +1,14 @@
 import math
 import numpy as np
 
+# Reference ET methods computed by ComputeRefETArrays
+
+ret_methods = ['harg', 'penm', 'pretay', 'kimo', 'kimr', 'ascer', 'asceg', 'fao56']
+
+# Array methods compute day of year terms once for each day of year (0 to 366)
+
+doy_days = np.arange(367)
+
 class refET:
 
     def __init__(self, b0, b1, b2):
@@ -12,13 +20,9 @@ class refET:
         self.TR_b1 = b1
         self.TR_b2 = b2
         
-        # these were defined as 'static' variable within a Function in the VB.net version 
+        # soil heat flux state after prior time step (see ComputeSoilHeatArrays)
         
-        self._Tp3 = 0.0 # static
-        self._Tp2 = 0.0 # static
-        self._Tp1 = 0.0 # static
-        self._ndays = 0 # static
-        self._lastDay = 0 # static
+        self.soil_heat_state = None
 
     def ComputeRs(self, doy, TMax, TMin, TDew, elevm, latitude, avgTMax, avgTMin): 
         """ Compute estimated incident solar radiation
@@ -160,6 +164,76 @@ class refET:
         # Penman, PreTay, KimbPeng, ASCEPMstdr, ASCEPMstdo, FAO56PM, KimbPen = penmans
         return penmans
 
+    def ComputeRefETArrays(self, doy, da, time_step, TMax, TMin, TDew, Rs, u24, elevm, latitude,
+                           methods = None):
+        """ Compute reference ET's of whole record by requested methods
+
+        Gives same values as ComputeHargreavesSamaniRefET and
+        ComputePenmanRefETs called for each time step in order.
+        Soil heat flux continues from self.soil_heat_state, so a record
+        can also be computed in consecutive parts.
+
+        Args:
+            doy: day of year (integer array)
+            da: day (integer array)
+            time_step: time step
+            TMax: maximum temperature array
+            TMin: minimum temperature array
+            TDew: dew point temperature array
+            Rs: incident solar radiation array
+            u24: wind array
+            elevm: elevation in meters
+            latitude: latitude
+            methods: ref et methods to compute (all of ret_methods if None)
+
+        Returns:
+            dict of reference ET arrays keyed by ref et method
+        """
+        if methods is None: methods = ret_methods
+        doy = np.asarray(doy, dtype = np.int64)
+        da = np.asarray(da, dtype = np.int64)
+        TMax = np.asarray(TMax, dtype = np.float64)
+        TMin = np.asarray(TMin, dtype = np.float64)
+        TDew = np.asarray(TDew, dtype = np.float64)
+        Rs = np.asarray(Rs, dtype = np.float64)
+        u24 = np.asarray(u24, dtype = np.float64)
+        TAvg = 0.5 * (TMax + TMin)
+        latentHeat = self.aFNHarrison(TAvg)
+        Ra = self.ExtraterrestrialRadiation(doy_days, latitude)[doy]
+        ret_arrays = {}
+
+        # Hargreaves Samani (square root of negative range is not used)
+        # np.power gives same values as scalar ** 0.5 (** 0.5 of arrays is np.sqrt)
+
+        if 'harg' in methods:
+            with np.errstate(invalid = 'ignore'):
+                hsRefET = np.where(TMax < TMin, 0.0, 0.0023 * np.power(TMax - TMin, 0.5) * Ra * (TAvg + 17.8))
+            ret_arrays['harg'] = hsRefET / latentHeat * 1000000.0
+        penman_methods = [m for m in methods if m != 'harg']
+        if not penman_methods: return ret_arrays
+
+        # Penman methods
+
+        Delta = self.aFNDelta(TAvg) # kPa/C
+        ed = self.aFNEs(TDew)
+        pressure = self.aFNPressure(elevm)
+        if 'kimo' in methods or 'kimr' in methods:
+            Gamma = self.aFNGamma(pressure, latentHeat) # kPa/C
+        else:
+            Gamma = None
+        Rso = self.EstimateClearSkyRadiationArray(Ra, pressure, ed, latitude, doy)
+        Rn56, Rn82 = self.FAO56NetRadiationArray(elevm, latitude, doy, Ra, Rs, Rso, TMax, TMin, ed)
+
+        # soil heat flux continues from prior call
+
+        G82, G82o, GFAO, GFAOr, self.soil_heat_state = self.ComputeSoilHeatArrays(
+            da, time_step, TAvg, Rn56, Rn82, self.soil_heat_state)
+        ea = (self.aFNEs(TMax) + self.aFNEs(TMin)) * 0.5
+        ret_arrays.update(self.PenmansArray(
+            latitude, doy, pressure, Rn56, Rn82, ed, ea, latentHeat, Delta, Gamma, TAvg,
+            G82, G82o, GFAO, GFAOr, u24, penman_methods))
+        return ret_arrays
+
     def aFNHarrison(self, TAvg):
         """ Compute latent heat as a function average temperature
         Args:
@@ -191,13 +265,16 @@ class refET:
 
         # [131113] Note:  most of constants below were forced to single precision in VB code
         
+        # numpy functions so that doy can be a scalar or an array
+        # (np.power as ** 0.5 of arrays is np.sqrt, not pow of scalars)
+        
         latRad = lat * math.pi / 180.0  # Lat is station latitude in degrees
-        decl = 0.4093 * math.sin(2.0 * math.pi * (284.0 + doy) / 365.0)
-        omega = 0.5 * math.pi - math.atan((-math.tan(latRad) * math.tan(decl)) / 
-                (1.0 - math.tan(decl) * math.tan(decl) * math.tan(latRad) * math.tan(latRad)) ** 0.5)
-        Dr = 1.0 + 0.033 * math.cos(2.0 * math.pi * doy / 365.0)
-        etr = (24.0 * 60.0 / math.pi) * Gsc * Dr * (omega * math.sin(latRad) * math.sin(decl) + 
-                math.cos(latRad) * math.cos(decl) * math.sin(omega))
+        decl = 0.4093 * np.sin(2.0 * math.pi * (284.0 + doy) / 365.0)
+        omega = 0.5 * math.pi - np.arctan((-np.tan(latRad) * np.tan(decl)) / 
+                np.power(1.0 - np.tan(decl) * np.tan(decl) * np.tan(latRad) * np.tan(latRad), 0.5))
+        Dr = 1.0 + 0.033 * np.cos(2.0 * math.pi * doy / 365.0)
+        etr = (24.0 * 60.0 / math.pi) * Gsc * Dr * (omega * np.sin(latRad) * np.sin(decl) + 
+                np.cos(latRad) * np.cos(decl) * np.sin(omega))
         return etr
 
     def aFNDelta(self, TAvg):
@@ -207,7 +284,7 @@ class refET:
 
     def aFNEs(self, TDew):
         """ Eq. 7 for saturation vapor pressure from dewpoint temperature"""
-        a = 0.6108 * math.exp((17.27 * TDew) / (TDew + 237.3)) # Tetens (1930) equation based
+        a = 0.6108 * np.exp((17.27 * TDew) / (TDew + 237.3)) # Tetens (1930) equation based
         return a
 
     def aFNPressure(self, elevation):
@@ -255,6 +332,29 @@ class refET:
         csRSo = (kbeam + kdiffuse) * extRa
         return csRSo
 
+    def EstimateClearSkyRadiationArray(self, extRa, pressure, ed, latDeg, doy):
+        """ Estimate clear sky radiation (Rso) of arrays as EstimateClearSkyRadiation
+        
+        Args:
+            extRa: extraterresttrial radiaton array
+            pressure: air pressure
+            ed: saturation vapor pressure array
+            latDeg: latitude
+            doy: day of year (integer array)
+        
+        Returns:
+            csRSo: clear sky radiaton array
+        """
+        waterInAtm = 0.14 * ed * pressure + 2.1 # mm as of 9/2000 (was cm)
+        latRad = latDeg * math.pi / 180
+        kturb = 1.0
+        sinphi24 = np.sin(0.85 + 0.3 * latRad * np.sin(2 * math.pi / 365 * doy_days - 1.39) - 0.42 * latRad * latRad)[doy]
+        kbeam = 0.98 * np.exp((-0.00146 * pressure) / (kturb * sinphi24) - 0.075 * (waterInAtm / sinphi24) ** 0.4) # modified 9/25/2000
+        with np.errstate(invalid = 'ignore'):
+            kdiffuse = np.where(kbeam < 0.15, 0.18 + 0.82 * kbeam, 0.35 - 0.36 * kbeam)
+        csRSo = (kbeam + kdiffuse) * extRa
+        return csRSo
+
     def EstimateIncidentRadiation(self, csRSo, maxT, minT, monMaxT, monMinT, 
                                   TR_b0 = None, TR_b1 = None, TR_b2 = None):
         """ Estimate incident radiation using equation 14
@@ -350,10 +450,58 @@ class refET:
         FAO56NR = (1 - 0.23) * incRs - Rnl56
         return FAO56NR, Rn82
 
+    def FAO56NetRadiationArray(self, elevation, lat, doy, etRa, incRs, csRSo, maxT, minT, ed):
+        """ Computes FAO 56 Net Radiation of arrays as FAO56NetRadiation
+        
+        Args:
+            elevation: elevation in meters
+            latitude: latitude
+            doy: day of year (integer array)
+            etRa: extraterresttrial radiaton array
+            incRs: incident radiation array
+            csRSo: clear sky radiaton array
+            TMax: maximum temperature array
+            TMin: maximum temperature array
+            ed: saturation vapor pressure array
+        
+        Returns:
+            FAO56NR: FA056 net radiation array
+            Rn82: Rn82 net radiation array
+        """
+        j = doy_days
+        if lat < 0:
+            j = doy_days - 182
+            j = np.where(j < 1, j + 365, j)
+        Rna1 = (0.26 + 0.1 * np.exp(-(0.0154 * (j - 180)) ** 2))[doy]
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            RsRso = np.where(csRSo > 0, incRs / csRSo, 0.7) # 24-hours
+
+            # same as max(0.2, min(RsRso, 1.0)) (missing ratio is set to 0.2)
+
+            RsRso = np.where(RsRso > 1.0, 1.0, RsRso)
+            RsRso = np.where(RsRso > 0.2, RsRso, 0.2)
+        RsRso2use = RsRso # useRso based on sun angle and water vapor as of 9/25/2000
+        Rna = np.where(RsRso2use > 0.7, 1.126, 1.017)
+        Rnb = np.where(RsRso2use > 0.7, -0.07, -0.06)
+        sigmaT4 = 0.000000004903 * 0.5 * ((maxT + 273.16) ** 4 + (minT + 273.16) ** 4)
+        Rbo = sigmaT4 * (Rna1 - 0.139 * np.sqrt(ed))
+        Rb = (Rna * RsRso2use + Rnb) * Rbo
+        alpha = (0.29 + 0.06 * np.sin((j + 96) / 57.3))[doy]
+        Rn82 = (1 - alpha) * incRs - Rb
+
+        # FAO 56 Net Radiation computation
+
+        Rbo56 = sigmaT4 * (0.34 - 0.14 * np.sqrt(ed))
+        Rnl56 = (1.35 * RsRso2use - 0.35) * Rbo56
+        FAO56NR = (1 - 0.23) * incRs - Rnl56
+        return FAO56NR, Rn82
+
     # soil heat flux
     
     def ComputeSoilHeat(self, da, time_step, TAvg, Rn56, Rn82): # modified 6/24/99
-        """ Computes soil heat flux
+        """ Computes soil heat flux of one time step
+        
+        Prior time steps are carried in self.soil_heat_state.
         
         Args:
             da: day
@@ -368,92 +516,85 @@ class refET:
             GFAO: 
             GFAOr: 
         """
-        # ByRef G82 As Double, ByRef G82o As Double, ByRef GFAO As Double, ByRef GFAOr As Double
-        # Static Tp3, Tp1, Tp2 As Double
-        # Static ndays, lastDay As Long
-        # --> 'Static' means value is persistant between calls, ie, retains its value
-        # use class variable to make static
-        if time_step == 'day':   # Daily or Monthly Time Step  ' added 10/13/90  start if1
-            if self._lastDay < 1:  # start if2
-                G82 = 0.0
-                G82o = 0.0
-                GFAO = 0.0
-                GFAOr = 0.0
-                self._Tp3 = 0.0
-                self._Tp2 = 0.0
-                self._Tp1 = 0.0
-                self._ndays = 0
-            else:
-                if (self._lastDay == 15 and da == 15) or (self._lastDay == 0 and da == 0):
-                    # monthly heat flux
-                    
-                    G82 = 0.0 # assume monthly heat flux is zero
-                    G82 = 0.14 * (TAvg - self._Tp1) # added 3/28/94  (use prior month) (FAO)
-                    GFAO = G82
-                    G82o = G82
-                    GFAOr = G82
-                else:
-                    if self._ndays > 0:
-                        G82 = (TAvg - (self._Tp3 + self._Tp2 + self._Tp1) / self._ndays) * 0.3768 # MJ/m2/d
-                    else:
-                        G82 = 0.0
-                    GFAO = 0.0
-                    G82o = G82
-                    GFAOr = GFAO
-                #  Tp3 = Tp2   ' moved after end of this end if 3/28/94
-                #  Tp2 = Tp1
-                #  Tp1 = TAvg
-                #  ndays = ndays + 1
-                #  IF ndays > 3 THEN ndays = 3
-            self._lastDay = da
-            self._Tp3 = self._Tp2 # moved here 3/28/94
-            self._Tp2 = self._Tp1
-            self._Tp1 = TAvg
-            self._ndays = self._ndays + 1
-            self._ndays = min(self._ndays, 3)
-        else: # hourly time step (assumed)
+        G82, G82o, GFAO, GFAOr, self.soil_heat_state = self.ComputeSoilHeatArrays(
+            np.array([da]), time_step, np.array([TAvg], dtype = np.float64),
+            np.array([Rn56], dtype = np.float64), np.array([Rn82], dtype = np.float64),
+            self.soil_heat_state)
+        return G82[0], G82o[0], GFAO[0], GFAOr[0]
+
+    def ComputeSoilHeatArrays(self, da, time_step, TAvg, Rn56, Rn82, state = None):
+        """ Computes soil heat flux of consecutive time steps
+        
+        Daily flux uses mean average temperature of up to three prior days,
+        or prior day on consecutive 15th days (monthly time step).  Prior
+        temperatures and days are passed in state so that consecutive
+        parts of a record give same values as whole record.
+        
+        Args:
+            da: day array
+            time_step: time step
+            TAvg: average temperature array
+            Rn56: FAO56 net radiation array
+            Rn82: Rn82 net radiation array
+            state: soil heat state after prior time step (start of record if None)
+        
+        Returns:
+            G82, G82o, GFAO, GFAOr arrays and soil heat state after last time step
+        """
+        # VB.net version kept prior temperatures (Tp1, Tp2, Tp3), number of
+        # prior days (ndays) and prior day (lastDay) in 'Static' variables
+
+        if state is None:
+            state = {'Tp1': 0.0, 'Tp2': 0.0, 'Tp3': 0.0, 'ndays': 0, 'lastDay': 0}
+        if time_step != 'day': # hourly time step (assumed)
             # changed Rn to Rn82 dlk 01/27/2016
+            # (units are MJ/m2/day, but will be W/m2 on console.writeout)
 
-            if Rn82 >= 0:  # added 10/13/90  (units are MJ/m2/day, but will be W/m2 on console.writeout)
-                # If Ref < 0.5 Then
-                G82o = 0.1 * Rn82 # Clothier (1986), Kustas et al (1989) in Asrar Remote Sens. Txt
+            with np.errstate(invalid = 'ignore'):
+                # grass: Clothier (1986), Kustas et al (1989) in Asrar Remote Sens. Txt
+                # negative Rn: R.Allen obersvations for USU Drainage Farm.  Alta Fescue
+                # crop near full cover.  Adj. Soil heat flux assuming that
+                # therm. cond. in top 100 mm was 2 MJ/m2/C.
 
-                # for full cover alfalfa (but high for alfalfa. use for grass
+                G82o = np.where(Rn82 >= 0, 0.1 * Rn82, Rn82 * 0.5)
+                GFAO = np.where(Rn56 >= 0, 0.1 * Rn56, Rn56 * 0.5)
 
-                # Else
-                G82 = 0.04 * Rn82 # for alfalfa reference based on Handbook Hydrol.
-                # End If
-            else:
-                # If Ref < 0.5 Then
-                G82o = Rn82 * 0.5 # R.Allen obersvations for USU Drainage Farm.  Alta Fescue
+                # alfalfa reference based on Handbook Hydrol.
 
-                # crop near full cover.  Adj. Soil heat flux assuming that
-                # therm. cond. in top 100 mm was 2 MJ/m2/C.
+                G82 = np.where(Rn82 >= 0, 0.04 * Rn82, Rn82 * 0.2)
+                GFAOr = np.where(Rn56 >= 0, 0.04 * Rn56, Rn56 * 0.2)
+            return G82, G82o, GFAO, GFAOr, state
 
-                # Else
-                G82 = Rn82 * 0.2 # alfalfa
-                # End If
-                # GFAO = G
-            if Rn56 >= 0:      # added 10/13/90  (units are MJ/m2/day, but will be W/m2 on console.writeout)
-                # If Ref < 0.5 Then
-                GFAO = 0.1 * Rn56 # Clothier (1986), Kustas et al (1989) in Asrar Remote Sens. Txt
-                
-                # for full cover alfalfa (fits grass better than alfalfa.  use for grass)
-                
-                # Else
-                GFAOr = 0.04 * Rn56 # alfalfa reference based on Handbook Hydrol.
-                # End If
-            else:
-                # If Ref < 0.5 Then
-                GFAO = Rn56 * 0.5 # R.Allen obersvations for USU Drainage Farm.  Alta Fescue
-                
-                # crop near full cover.  Adj. Soil heat flux assuming that
-                # therm. cond. in top 100 mm was 2 MJ/m2/C.
-                
-                # Else
-                GFAOr = Rn56 * 0.2 # alfalfa
-                # End If
-        return G82, G82o, GFAO, GFAOr
+        # Daily or Monthly Time Step  ' added 10/13/90
+        # History of time steps 0 to n, where step n is state after last time step
+
+        n = len(TAvg)
+        steps = np.arange(n + 1)
+        lastDay = np.concatenate(([state['lastDay']], da))
+        Tp = np.concatenate(([state['Tp3'], state['Tp2'], state['Tp1']], TAvg))
+
+        # prior day less than 1 starts record (zero flux and prior temperatures)
+
+        start = lastDay[:n] < 1
+        lastStart = np.concatenate(([-1], np.maximum.accumulate(np.where(start, steps[:n], -1))))
+        ndays = np.where(lastStart >= 0, np.minimum(steps - lastStart, 3),
+                         np.minimum(state['ndays'] + steps, 3))
+        Tp1, Tp2, Tp3 = [np.where((lastStart >= 0) & (steps - k < lastStart), 0.0, Tp[steps + 3 - k])
+                         for k in [1, 2, 3]]
+
+        # monthly heat flux added 3/28/94  (use prior month) (FAO)
+
+        monthly = (lastDay[:n] == 15) & (da == 15)
+        with np.errstate(invalid = 'ignore'):
+            G82 = np.where(ndays[:n] > 0, 
+                           (TAvg - (Tp3[:n] + Tp2[:n] + Tp1[:n]) / np.maximum(ndays[:n], 1)) * 0.3768, 0.0) # MJ/m2/d
+            G82 = np.where(monthly, 0.14 * (TAvg - Tp1[:n]), G82)
+        G82 = np.where(start, 0.0, G82)
+        G82o = G82
+        GFAO = np.where(monthly & ~start, G82, 0.0)
+        GFAOr = GFAO
+        state = {'Tp1': Tp1[n], 'Tp2': Tp2[n], 'Tp3': Tp3[n], 'ndays': ndays[n], 'lastDay': lastDay[n]}
+        return G82, G82o, GFAO, GFAOr, state
 
     def Penmans(self, lat, doy, pressure, Rn56, Rn82, ed, ea, latentHeat, delta, gamma, TAvg, G82, G82o, GFAO, GFAOr, U242):
         """ Compute Penman based reference ET's
@@ -532,6 +673,96 @@ class refET:
         ASCEPMstdo = max(ASCEPMstdo, zero)
         return  (Penman, PreTay, KimbPeng, ASCEPMstdr, ASCEPMstdo, FAO56PM, KimbPen)
 
+    def PenmansArray(self, lat, doy, pressure, Rn56, Rn82, ed, ea, latentHeat, delta, gamma, TAvg, G82, G82o, GFAO, GFAOr, U242,
+                     methods = None):
+        """ Compute Penman based reference ET's of arrays as Penmans
+        
+        Args:
+            lat: latitude
+            doy: day of year (integer array)
+            pressure: air pressure
+            Rn56: FAO56 net radiation array
+            Rn82: Rn82 net radiation array
+            ed: saturation vapor pressure array
+            latentHeat: latent heat of evaporation array
+            gamma:
+            TAvg: average temperature array
+            G82: 
+            G82o: 
+            GFAO: 
+            GFAOr: 
+            U242: wind array
+            methods: ref et methods to compute (all Penman methods if None)
+        
+        Returns:
+            dict of Penman reference ET arrays keyed by ref et method
+            (penm, pretay, kimo, kimr, ascer, asceg, fao56)
+        """
+        if methods is None: methods = [m for m in ret_methods if m != 'harg']
+        penmans = {}
+        zero = 0.0
+        j = doy_days
+        if lat < 0:
+            j = doy_days - 182
+            j = np.where(j < 1, j + 365, j)
+
+        # max(ref et, zero) keeps missing values
+
+        with np.errstate(invalid = 'ignore'):
+
+            # 1982 Kimberly Penman
+            # day of year terms use integer division as in Penmans
+
+            RnEq = Rn82
+            if 'kimr' in methods:
+                GEq = G82
+                Awk = (0.4 + 1.4 * np.exp(-((j - 173) // 58) ** 2))[doy]
+                Bwk = ((0.007 + 0.004 * np.exp(-((j - 243) // 80) ** 2)) * 86.4)[doy] # for m/s
+                KimbPen = (delta * (RnEq - GEq) + gamma * 6.43 * (ea - ed) * (Awk + Bwk * U242)) / (delta + gamma)
+                KimbPen = KimbPen / latentHeat * 1000000.0
+                penmans['kimr'] = np.where(KimbPen < zero, zero, KimbPen)
+            if 'kimo' in methods:
+                GEq = G82o
+                awkg = (0.3 + 0.58 *  np.exp(-((j - 170) // 45) ** 2))[doy] # Wright(1996) for grass
+                bwkg = (0.32 + 0.54 * np.exp(-((j - 228) // 67) ** 2))[doy] # for m/s
+                KimbPeng = (delta * (RnEq - GEq) + gamma * 6.43 * (ea - ed) * (awkg + bwkg * U242)) / (delta + gamma)
+                KimbPeng = KimbPeng / latentHeat * 1000000.0
+                penmans['kimo'] = np.where(KimbPeng < zero, zero, KimbPeng)
+
+            # FAO-56 Penman-Monteith
+
+            gamma56 = 0.000665 * pressure # kPa/C   May 17 1999
+            RnEq = Rn56
+            GEq = GFAO
+            if 'fao56' in methods:
+                FAO56PM = (0.408 * delta * (RnEq - GEq) + gamma56 * 900 / (TAvg + 273) * U242 * (ea - ed)) / (delta + gamma56 * (1 + 0.34 * U242))
+                penmans['fao56'] = np.where(FAO56PM < zero, zero, FAO56PM)
+
+            # Priestley-Taylor
+
+            if 'pretay' in methods:
+                PreTay = 1.26 * (delta / (delta + gamma56) * (RnEq - GEq)) / latentHeat * 1000000.0
+                penmans['pretay'] = np.where(PreTay < zero, zero, PreTay)
+
+            # Penman 1948 withorig wind Rome wind function
+
+            if 'penm' in methods:
+                ea_TAvg = self.aFNEs(TAvg)
+                Penman = (((delta / (delta + gamma56) * (RnEq - GEq))) / latentHeat * 1000000.0) + ((gamma56 / (delta + gamma56) * (0.26 * (1 + 0.537 * U242)) * ((ea_TAvg * 10) - (ed * 10))))
+                penmans['penm'] = np.where(Penman < zero, zero, Penman)
+
+            # Reduced Forms ofASCE-PM (standardized).
+
+            if 'ascer' in methods:
+                GEq = GFAOr
+                ASCEPMstdr = (0.408 * delta * (RnEq - GEq) + gamma56 * 1600 / (TAvg + 273) * U242 * (ea - ed)) / (delta + gamma56 * (1 + 0.38 * U242))
+                penmans['ascer'] = np.where(ASCEPMstdr < zero, zero, ASCEPMstdr)
+            if 'asceg' in methods:
+                GEq = GFAO
+                ASCEPMstdo = (0.408 * delta * (RnEq - GEq) + gamma56 * 900 / (TAvg + 273) * U242 * (ea - ed)) / (delta + gamma56 * (1 + 0.34 * U242))
+                penmans['asceg'] = np.where(ASCEPMstdo < zero, zero, ASCEPMstdo)
+        return penmans
+
 ############## 
 
 def do_tests():
@@ -110,6 +110,18 @@ def fill_from_avg_monthly(daily_value, avg_monthly_value):
     else:
         return daily_value
 
+def fill_from_avg_monthly_array(daily_values, months, avg_monthly_values):
+    """fill missing daily values from average monthly values
+    Args:
+        daily_values: NumPy array of daily values
+        months: NumPy array of months (1 to 12) of daily values
+        avg_monthly_values: 12 average monthly values
+    Returns:
+        NumPy array of filled daily values
+    """
+    monthly_lut = np.asarray(avg_monthly_values, dtype = np.float64)
+    return np.where(np.isnan(daily_values), monthly_lut[months - 1], daily_values)
+
 def is_winter(et_cell, foo_day):
     """Determine if input day is in winter month
 
@@ -132,12 +144,12 @@ def wind_adjust_func(uz_array, zw):
     return uz_array * 4.87 / np.log(67.8 * zw - 5.42)
 
 def max_max_temp(max_temp):
-    """Adjust maximum temperature to be less than 120F"""
-    return min(max_temp, (120.0 - 32.0) * 5.0 / 9.0)
+    """Adjust maximum temperature(s) to be less than 120F"""
+    return np.minimum(max_temp, (120.0 - 32.0) * 5.0 / 9.0)
 
 def max_min_temp(min_temp):
-    """Adjust minimum temperature to be less than 90F"""
-    return min(min_temp, (90.0 - 32.0) * 5.0 / 9.0)
+    """Adjust minimum temperature(s) to be less than 90F"""
+    return np.minimum(min_temp, (90.0 - 32.0) * 5.0 / 9.0)
 
 def avg_two_arrays(c1, c2):
     """Computes average of two NumPy arrays or df columns
@@ -154,6 +166,8 @@ def avg_two_arrays(c1, c2):
 def compute_rs(doy, TMax, TMin, TDew, elevm, latitude, avgTMax, avgTMin, TR_b0, TR_b1, TR_b2): 
     """ Compute estimated incident solar radiation
 
+    Values can be scalars or NumPy arrays of time steps.
+
     Args:
         doy: day of year
         TMax: maximum temperature
@@ -196,12 +210,12 @@ def extraterrestrial_radiation(doy, lat):
     """
     Gsc = 0.08202 # MJ/m2/min
     latRad = lat * math.pi / 180.0  # Lat is station latitude in degrees
-    decl = 0.4093 * math.sin(2.0 * math.pi * (284.0 + doy) / 365.0)
-    omega = 0.5 * math.pi - math.atan((-math.tan(latRad) * math.tan(decl)) / 
-            (1.0 - math.tan(decl) * math.tan(decl) * math.tan(latRad) * math.tan(latRad)) ** 0.5)
-    Dr = 1.0 + 0.033 * math.cos(2.0 * math.pi * doy / 365.0)
-    etr = (24.0 * 60.0 / math.pi) * Gsc * Dr * (omega * math.sin(latRad) * math.sin(decl) + 
-            math.cos(latRad) * math.cos(decl) * math.sin(omega))
+    decl = 0.4093 * np.sin(2.0 * math.pi * (284.0 + doy) / 365.0)
+    omega = 0.5 * math.pi - np.arctan((-np.tan(latRad) * np.tan(decl)) / 
+            np.power(1.0 - np.tan(decl) * np.tan(decl) * np.tan(latRad) * np.tan(latRad), 0.5))
+    Dr = 1.0 + 0.033 * np.cos(2.0 * math.pi * doy / 365.0)
+    etr = (24.0 * 60.0 / math.pi) * Gsc * Dr * (omega * np.sin(latRad) * np.sin(decl) + 
+            np.cos(latRad) * np.cos(decl) * np.sin(omega))
     return etr
 
 def estimate_clear_sky_radiation(extRa, pressure, ed, latDeg, doy):
@@ -220,12 +234,10 @@ def estimate_clear_sky_radiation(extRa, pressure, ed, latDeg, doy):
     waterInAtm = 0.14 * ed * pressure + 2.1 # mm as of 9/2000 (was cm)
     latRad = latDeg * math.pi / 180
     kturb = 1.0
-    sinphi24 = math.sin(0.85 + 0.3 * latRad * math.sin(2 * math.pi / 365 * doy - 1.39) - 0.42 * latRad * latRad)
-    kbeam = 0.98 * math.exp((-0.00146 * pressure) / (kturb * sinphi24) - 0.075 * (waterInAtm / sinphi24) ** 0.4) # modified 9/25/2000
-    if kbeam < 0.15:
-        kdiffuse = 0.18 + 0.82 * kbeam
-    else:
-        kdiffuse = 0.35 - 0.36 * kbeam
+    sinphi24 = np.sin(0.85 + 0.3 * latRad * np.sin(2 * math.pi / 365 * doy - 1.39) - 0.42 * latRad * latRad)
+    kbeam = 0.98 * np.exp((-0.00146 * pressure) / (kturb * sinphi24) - 0.075 * (waterInAtm / sinphi24) ** 0.4) # modified 9/25/2000
+    with np.errstate(invalid = 'ignore'):
+        kdiffuse = np.where(kbeam < 0.15, 0.18 + 0.82 * kbeam, 0.35 - 0.36 * kbeam)
     csRSo = (kbeam + kdiffuse) * extRa
     return csRSo
 
@@ -247,8 +259,12 @@ def estimate_incident_radiation(csRSo, maxT, minT, monMaxT, monMinT, TR_b0, TR_b
     """
     dt = maxT - minT          # temp difference in C
     dtMon = monMaxT - monMinT # long term monthly temp difference in C
-    dt = max(0.1, dt)
-    dtMon = max(0.1, dtMon)
+
+    # max(0.1, dt) of scalars and arrays
+
+    with np.errstate(invalid = 'ignore'):
+        dt = np.where(dt > 0.1, dt, 0.1)
+        dtMon = np.where(dtMon > 0.1, dtMon, 0.1)
 
     # Orginally used UI determined function for coefficient B based on arid stations in T-R paper
     # BTR = 0.023 + 0.1 * System.Math.Exp(-0.2 * dtMon)
@@ -256,11 +272,11 @@ def estimate_incident_radiation(csRSo, maxT, minT, monMaxT, monMinT, TR_b0, TR_b
     # Changed input of third Thorton and Running coefficient to include sign 08/22/2013.
     # Enabled TR coefficients to be node specific - dlk - 01/20/2016.
 
-    BTR = TR_b0 + TR_b1 * math.exp(TR_b2 * dtMon)
+    BTR = TR_b0 + TR_b1 * np.exp(TR_b2 * dtMon)
 
     # estimate daily Rs using Thornton and Running method (added Nov. 1, 2006)
     # incRs = csRSo * (1 - 0.9 * math.exp(-BTR * dt ** 1.5)) rom Eq. 14
-    incRs = csRSo * (1 - 0.9 * math.exp(-BTR * dt ** 1.5))
+    incRs = csRSo * (1 - 0.9 * np.exp(-BTR * dt ** 1.5))
     return incRs
 
 def pair_from_elev(elevation):